@@ -2,12 +2,31 @@
 Admin configuration for Certificate model.
 """
 from django.contrib import admin
-from .models import Certificate
+from .models import Certificate, CertificateJob, CertificateJobChunk
 
 
 @admin.register(Certificate)
 class CertificateAdmin(admin.ModelAdmin):
     list_display = ('certificate_number', 'registration', 'status', 'issue_date')
+    # EventRegistration.__str__ reads the event title
+    list_select_related = ('registration__event',)
     list_filter = ('status', 'issue_date')
     search_fields = ('certificate_number', 'registration__email')
     readonly_fields = ('issue_date', 'created_at')
+
+
+class CertificateJobChunkInline(admin.TabularInline):
+    model = CertificateJobChunk
+    fields = ('index', 'status', 'done', 'failed', 'attempts', 'finished_at')
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+
+@admin.register(CertificateJob)
+class CertificateJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'event', 'status', 'total', 'created_at', 'finished_at')
+    list_select_related = ('event',)
+    list_filter = ('status',)
+    readonly_fields = ('created_at', 'started_at', 'finished_at')
+    inlines = [CertificateJobChunkInline]
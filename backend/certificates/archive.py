@@ -0,0 +1,111 @@
+"""
+Streaming ZIP archives of generated certificates.
+Archives are produced chunk by chunk so multi-GB events never sit in memory.
+"""
+import zipfile
+
+from .generator import CertificateService
+from .storage import is_stored
+
+# Size of the chunks read from storage and sent to the client
+CHUNK_SIZE = 64 * 1024
+
+
+class _StreamBuffer:
+    """Write-only, unseekable file object that collects bytes written by zipfile."""
+
+    def __init__(self):
+        self._chunks = []
+        self._offset = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._offset
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        """Return and forget everything written since the last drain."""
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def iter_zip(entries, chunk_size=CHUNK_SIZE):
+    """
+    Stream a ZIP archive.
+
+    Args:
+        entries: Iterable of (archive name, callable returning a readable binary file)
+        chunk_size: Number of bytes read from each source file at a time
+
+    Yields:
+        Bytes of the ZIP archive
+    """
+    buffer = _StreamBuffer()
+    # PDFs are already compressed, so store them as-is
+    with zipfile.ZipFile(buffer, mode='w', compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+        for name, open_source in entries:
+            with open_source() as source, archive.open(name, mode='w', force_zip64=True) as target:
+                for chunk in iter(lambda: source.read(chunk_size), b''):
+                    target.write(chunk)
+                    data = buffer.drain()
+                    if data:
+                        yield data
+            yield buffer.drain()
+    yield buffer.drain()
+
+
+def _certificate_entries(event, certificates):
+    """
+    Build ZIP entries for an event's certificates.
+
+    Stored PDFs are read from Certificate.pdf_file; certificates whose file is
+    missing are rendered on the fly, one at a time.
+    """
+    generator = None
+    event_data = None
+
+    for certificate in certificates:
+        name = f"{certificate.certificate_number}.pdf"
+        pdf_file = certificate.pdf_file
+
+        if pdf_file and is_stored(pdf_file.storage, pdf_file.name):
+            yield name, lambda pdf_file=pdf_file: pdf_file.open('rb')
+            continue
+
+        if generator is None:
+            generator = CertificateService(upload_workers=0).generator
+            event_data = CertificateService.build_event_data(event)
+        participant_data = CertificateService.build_participant_data(
+            certificate.registration, certificate.certificate_number
+        )
+        yield name, lambda participant_data=participant_data: generator.generate_certificate(participant_data, event_data)
+
+
+def stream_event_certificates(event, chunk_size=CHUNK_SIZE):
+    """
+    Stream a ZIP archive with every certificate of an event.
+
+    Args:
+        event: Event instance
+        chunk_size: Number of bytes read from each PDF at a time
+
+    Yields:
+        Bytes of the ZIP archive
+    """
+    from .models import Certificate
+
+    certificates = (
+        Certificate.objects
+        .filter(registration__event=event)
+        .select_related('registration')
+        .order_by('certificate_number')
+        .iterator(chunk_size=500)
+    )
+    return iter_zip(_certificate_entries(event, certificates), chunk_size=chunk_size)
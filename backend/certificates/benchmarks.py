@@ -0,0 +1,523 @@
+"""
+Benchmarks for certificate generation.
+Scenarios run against a throwaway SQLite database and scratch storage, and
+return plain dicts so results can be saved as JSON and compared across commits.
+"""
+import contextlib
+import io
+import math
+import multiprocessing
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, time as dt_time
+
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from .generator import (
+    CertificateGenerator,
+    CertificateService,
+    OUTPUT_PROFILES,
+    OUTPUT_PROFILE_STANDARD,
+    RENDER_MODE_FLOW,
+    RENDER_MODES,
+    generate_certificates_for_event,
+)
+from .storage import CERTIFICATE_STORAGE_ALIAS, get_certificate_storage
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Participant counts used for the batch and event scenarios
+DEFAULT_SIZES = (100, 1000, 10000)
+
+# Metrics compared between runs; True when a higher value is better
+COMPARED_METRICS = {
+    'median_ms': False,
+    'p95_ms': False,
+    'certificates_per_second': True,
+    'avg_pdf_bytes': False,
+    'queries_per_certificate': False,
+    'peak_rss_kb': False,
+}
+
+
+@contextlib.contextmanager
+def benchmark_database():
+    """
+    Create a throwaway test database for the duration of a benchmark run.
+    
+    Only SQLite is accepted, so benchmarks never need a database server.
+    """
+    if connection.vendor != 'sqlite':
+        raise RuntimeError(
+            'Benchmarks run on SQLite; use --settings=crosscert.settings_benchmark'
+        )
+    
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+@contextlib.contextmanager
+def scratch_storage():
+    """Point the certificate storage at an empty temporary directory."""
+    location = tempfile.mkdtemp(prefix='crosscert-bench-')
+    storages = dict(settings.STORAGES)
+    storages[CERTIFICATE_STORAGE_ALIAS] = {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+        'OPTIONS': {'location': location},
+    }
+    try:
+        with override_settings(STORAGES=storages):
+            yield get_certificate_storage()
+    finally:
+        shutil.rmtree(location, ignore_errors=True)
+
+
+def create_fixture_event(size):
+    """
+    Create an event with size checked-in, evaluated registrations.
+    
+    Returns:
+        Event instance
+    """
+    from django.contrib.auth.models import User
+    from crosscert.factories import make_eligible_registrations, make_event
+    
+    organizer, _ = User.objects.get_or_create(
+        username='bench-organizer',
+        defaults={'first_name': 'Bench', 'last_name': 'Organizer'},
+    )
+    event = make_event(
+        organizer,
+        title=f'Benchmark Event ({size} participants)',
+        description='Benchmark fixture',
+        date=date(2024, 1, 15),
+        start_time=dt_time(9, 0),
+        end_time=dt_time(17, 0),
+        location='Main Hall',
+        capacity=size,
+        status='completed',
+        speakers=['Dr. Ada Lovelace', 'Prof. Alan Turing'],
+    )
+    make_eligible_registrations(
+        event,
+        size,
+        email='participant{i}@example.com',
+        first_name='Participant{i}',
+        last_name='Benchmark',
+        affiliation='Year 1',
+        qr_code='bench_{event.id}_{i}',
+    )
+    return event
+
+
+def _own_peak_rss_kb():
+    """Peak resident set size of this process's own memory, in KB."""
+    # Linux keeps ru_maxrss across exec, so a spawned process would report
+    # its parent's peak; VmHWM starts again with the new address space
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return usage // 1024 if platform.system() == 'Darwin' else usage
+
+
+def peak_rss_kb():
+    """
+    Peak resident set size of this process and its worker processes, in KB.
+    
+    The peak covers the whole life of the process; run_isolated gives each
+    scenario a fresh process so the value is that scenario's own.
+    """
+    if resource is None:
+        return None
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    if platform.system() == 'Darwin':
+        children //= 1024
+    return max(_own_peak_rss_kb(), children)
+
+
+def _stored_sizes(storage, names):
+    """Return the sizes of the distinct stored files among names."""
+    return [storage.size(name) for name in set(names) if name]
+
+
+def bench_single(iterations=50, output_profile=OUTPUT_PROFILE_STANDARD):
+    """
+    Measure the latency of CertificateGenerator.generate_certificate.
+    
+    Args:
+        iterations: Number of timed renders
+        output_profile: Output profile passed to CertificateGenerator
+        
+    Returns:
+        Result dict
+    """
+    event = create_fixture_event(1)
+    event_data = CertificateService.build_event_data(event)
+    generator = CertificateGenerator(output_profile=output_profile, fonts=settings.CERTIFICATE_FONTS)
+    
+    # The first render loads fonts and glyph widths
+    generator.generate_certificate({'name': 'Warm Up', 'email': 'w@example.com', 'year_level': 'Year 1'}, event_data)
+    
+    timings = []
+    sizes = []
+    for i in range(iterations):
+        participant_data = {'name': f'Participant{i} Benchmark', 'email': f'p{i}@example.com', 'year_level': 'Year 1'}
+        start = time.perf_counter()
+        pdf = generator.generate_certificate(participant_data, event_data)
+        timings.append((time.perf_counter() - start) * 1000)
+        sizes.append(len(pdf.getvalue()))
+    
+    timings.sort()
+    return {
+        'scenario': 'single',
+        'output_profile': output_profile,
+        'size': iterations,
+        'mean_ms': round(statistics.mean(timings), 3),
+        'median_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(timings[math.ceil(len(timings) * 0.95) - 1], 3),
+        'min_ms': round(timings[0], 3),
+        'avg_pdf_bytes': round(statistics.mean(sizes)),
+        'peak_rss_kb': peak_rss_kb(),
+    }
+
+
+def bench_styles(iterations=50, output_profile=OUTPUT_PROFILE_STANDARD):
+    """
+    Measure what building paragraph styles once per generator saves per certificate.
+    
+    Renders the same certificates twice: once rebuilding the styles before
+    every render, as each certificate used to, and once with the styles
+    the generator built at startup.
+    
+    Args:
+        iterations: Number of timed renders per variant
+        output_profile: Output profile passed to CertificateGenerator
+        
+    Returns:
+        Result dict
+    """
+    event = create_fixture_event(1)
+    event_data = CertificateService.build_event_data(event)
+    generator = CertificateGenerator(output_profile=output_profile, fonts=settings.CERTIFICATE_FONTS)
+    generator.generate_certificate({'name': 'Warm Up'}, event_data)
+    
+    def render(rebuild_styles):
+        timings = []
+        for i in range(iterations):
+            participant_data = {'name': f'Participant{i} Benchmark', 'certificate_number': f'CERT-{i}'}
+            start = time.perf_counter()
+            if rebuild_styles:
+                generator.styles = generator._build_styles()
+            generator.generate_certificate(participant_data, event_data)
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
+    
+    start = time.perf_counter()
+    for _ in range(iterations):
+        generator._build_styles()
+    build_ms = (time.perf_counter() - start) * 1000 / iterations
+    
+    rebuilt_ms = render(rebuild_styles=True)
+    cached_ms = render(rebuild_styles=False)
+    return {
+        'scenario': 'styles',
+        'output_profile': output_profile,
+        'size': iterations,
+        'build_styles_ms': round(build_ms, 3),
+        'rebuilt_median_ms': round(rebuilt_ms, 3),
+        'median_ms': round(cached_ms, 3),
+        'saving_ms': round(rebuilt_ms - cached_ms, 3),
+        'peak_rss_kb': peak_rss_kb(),
+    }
+
+
+def bench_batch(size, workers=1, output_profile=OUTPUT_PROFILE_STANDARD):
+    """
+    Measure CertificateService.generate_batch_certificates throughput.
+    
+    Args:
+        size: Number of participants
+        workers: Number of render processes
+        output_profile: Output profile passed to CertificateGenerator
+        
+    Returns:
+        Result dict
+    """
+    event = create_fixture_event(size)
+    registrations = list(event.registrations.select_related('event__organizer'))
+    
+    with scratch_storage() as storage:
+        service = CertificateService(storage=storage, workers=workers, output_profile=output_profile)
+        try:
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                names = service.generate_batch_certificates(event, registrations)
+            elapsed = time.perf_counter() - start
+        finally:
+            service.close()
+        sizes = _stored_sizes(storage, names)
+    
+    return {
+        'scenario': 'batch',
+        'output_profile': output_profile,
+        'workers': workers,
+        'size': size,
+        'generated': len(names),
+        'seconds': round(elapsed, 3),
+        'certificates_per_second': round(len(names) / elapsed, 1) if elapsed else None,
+        'avg_pdf_bytes': round(statistics.mean(sizes)) if sizes else None,
+        'peak_rss_kb': peak_rss_kb(),
+    }
+
+
+def bench_event(size, workers=1, batch_size=500, output_profile=OUTPUT_PROFILE_STANDARD):
+    """
+    Measure generate_certificates_for_event end to end, including queries.
+    
+    Args:
+        size: Number of participants
+        workers: Number of render processes
+        batch_size: Batch size passed to generate_certificates_for_event
+        output_profile: Output profile (as CERTIFICATE_OUTPUT_PROFILE)
+        
+    Returns:
+        Result dict
+    """
+    from .models import Certificate
+    
+    event = create_fixture_event(size)
+    
+    with scratch_storage() as storage, override_settings(CERTIFICATE_OUTPUT_PROFILE=output_profile):
+        with CaptureQueriesContext(connection) as queries, contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            generate_certificates_for_event(event.id, workers=workers, batch_size=batch_size)
+            elapsed = time.perf_counter() - start
+        
+        names = list(
+            Certificate.objects.filter(registration__event=event).values_list('pdf_file', flat=True)
+        )
+        sizes = _stored_sizes(storage, names)
+    
+    generated = len(names)
+    return {
+        'scenario': 'event',
+        'output_profile': output_profile,
+        'workers': workers,
+        'size': size,
+        'generated': generated,
+        'seconds': round(elapsed, 3),
+        'certificates_per_second': round(generated / elapsed, 1) if elapsed else None,
+        'avg_pdf_bytes': round(statistics.mean(sizes)) if sizes else None,
+        'queries': len(queries),
+        'queries_per_certificate': round(len(queries) / generated, 4) if generated else None,
+        'peak_rss_kb': peak_rss_kb(),
+    }
+
+
+def bench_combined(size, render_mode=RENDER_MODE_FLOW, output_profile=OUTPUT_PROFILE_STANDARD):
+    """
+    Measure writing one multi-page PDF for an event.
+    
+    Args:
+        size: Number of participants (pages)
+        render_mode: 'flow' lays out every page, 'overlay' reuses one event page
+        output_profile: Output profile passed to CertificateGenerator
+        
+    Returns:
+        Result dict
+    """
+    event = create_fixture_event(size)
+    registrations = list(event.registrations.select_related('event__organizer', 'certificate'))
+    service = CertificateService(render_mode=render_mode, upload_workers=0, output_profile=output_profile)
+    
+    with tempfile.TemporaryFile() as output:
+        start = time.perf_counter()
+        _, pages = service.generate_combined_for_event(event, registrations, output=output)
+        elapsed = time.perf_counter() - start
+        pdf_bytes = output.tell()
+    
+    return {
+        'scenario': 'combined',
+        'render_mode': render_mode,
+        'output_profile': output_profile,
+        'size': size,
+        'seconds': round(elapsed, 3),
+        'ms_per_page': round(elapsed * 1000 / pages, 3),
+        'certificates_per_second': round(pages / elapsed, 1) if elapsed else None,
+        'pdf_bytes': pdf_bytes,
+        'peak_rss_kb': peak_rss_kb(),
+    }
+
+
+def _run_scenario(settings_module, scenario, kwargs):
+    """Set up Django and a throwaway database in this process, then run one scenario."""
+    import django
+    
+    os.environ['DJANGO_SETTINGS_MODULE'] = settings_module
+    django.setup()
+    with benchmark_database():
+        return SCENARIOS[scenario](**kwargs)
+
+
+def run_isolated(scenario, **kwargs):
+    """
+    Run one scenario in a fresh process.
+    
+    Peak RSS only ever grows within a process, so each scenario gets its
+    own; peak_rss_kb then reports that scenario alone.
+    
+    Args:
+        scenario: Key of SCENARIOS
+        **kwargs: Arguments for the scenario function
+        
+    Returns:
+        Result dict
+    """
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        return executor.submit(_run_scenario, settings.SETTINGS_MODULE, scenario, kwargs).result()
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, iterations=50, workers=1, batch_size=500,
+                   scenarios=('single', 'styles', 'batch', 'event', 'combined'), progress=None,
+                   output_profiles=OUTPUT_PROFILES):
+    """
+    Run the benchmark scenarios, each in its own process and database.
+    
+    Args:
+        sizes: Participant counts for the batch and event scenarios
+        iterations: Number of renders timed by the single and styles scenarios
+        workers: Number of render processes
+        batch_size: Batch size for the event scenario
+        scenarios: Scenarios to run
+        progress: Optional callable receiving each result as it finishes
+        output_profiles: Output profiles to run every scenario with
+        
+    Returns:
+        Dict with run metadata and the list of results
+    """
+    plan = []
+    for profile in output_profiles:
+        if 'single' in scenarios:
+            plan.append(('single', {'iterations': iterations, 'output_profile': profile}))
+        if 'styles' in scenarios:
+            plan.append(('styles', {'iterations': iterations, 'output_profile': profile}))
+    for size in sorted(sizes):
+        for profile in output_profiles:
+            if 'batch' in scenarios:
+                plan.append(('batch', {'size': size, 'workers': workers, 'output_profile': profile}))
+            if 'event' in scenarios:
+                plan.append(('event', {
+                    'size': size, 'workers': workers, 'batch_size': batch_size, 'output_profile': profile,
+                }))
+            if 'combined' in scenarios:
+                # Both modes, so the overlay speedup reads straight off the results
+                for mode in RENDER_MODES:
+                    plan.append(('combined', {'size': size, 'render_mode': mode, 'output_profile': profile}))
+    
+    results = []
+    for scenario, kwargs in plan:
+        result = run_isolated(scenario, **kwargs)
+        results.append(result)
+        if progress:
+            progress(result)
+    
+    return {'meta': run_metadata(), 'results': results}
+
+
+SCENARIOS = {
+    'single': bench_single,
+    'styles': bench_styles,
+    'batch': bench_batch,
+    'event': bench_event,
+    'combined': bench_combined,
+}
+
+
+def run_metadata():
+    """Describe the commit and machine a benchmark ran on."""
+    import django
+    import reportlab
+    
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'],
+            capture_output=True, text=True, check=True, cwd=settings.BASE_DIR,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    
+    return {
+        'commit': commit,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'reportlab': reportlab.Version,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def result_key(result):
+    """Identify a result across runs."""
+    return (
+        result['scenario'],
+        result.get('render_mode', RENDER_MODE_FLOW),
+        result.get('output_profile', OUTPUT_PROFILE_STANDARD),
+        result.get('workers', 1),
+        result['size'],
+    )
+
+
+def compare_results(baseline, current):
+    """
+    Compare two benchmark runs.
+    
+    Args:
+        baseline: Run dict loaded from an earlier results file
+        current: Run dict from this run
+        
+    Returns:
+        List of dicts with keys - key, metric, baseline, current, change_pct, regression
+    """
+    previous = {result_key(result): result for result in baseline.get('results', [])}
+    
+    rows = []
+    for result in current['results']:
+        old = previous.get(result_key(result))
+        if old is None:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            before, after = old.get(metric), result.get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before * 100
+            rows.append({
+                'key': result_key(result),
+                'metric': metric,
+                'baseline': before,
+                'current': after,
+                'change_pct': round(change, 1),
+                'regression': change < 0 if higher_is_better else change > 0,
+            })
+    return rows
@@ -0,0 +1,63 @@
+"""
+pytest-benchmark entry points for the certificate benchmarks.
+Run from backend/ with:
+
+    python -m pytest certificates/benchmarks_test.py --benchmark-autosave
+
+and compare saved runs with --benchmark-compare. The scenario results
+(throughput, PDF sizes, peak RSS) are attached to each entry as extra_info.
+Django's test runner does not collect this module.
+"""
+import os
+
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'crosscert.settings_benchmark')
+
+import django  # noqa: E402
+
+django.setup()
+
+from .benchmarks import (  # noqa: E402
+    bench_batch, bench_combined, bench_single, bench_styles, benchmark_database,
+)
+from .generator import OUTPUT_PROFILES, RENDER_MODES  # noqa: E402
+
+ROUNDS = 3
+
+
+@pytest.fixture(scope='module', autouse=True)
+def database():
+    with benchmark_database():
+        yield
+
+
+def run(benchmark, scenario, **kwargs):
+    result = benchmark.pedantic(scenario, kwargs=kwargs, rounds=ROUNDS, iterations=1)
+    benchmark.extra_info.update(result)
+    return result
+
+
+@pytest.mark.parametrize('output_profile', OUTPUT_PROFILES)
+def test_single(benchmark, output_profile):
+    result = run(benchmark, bench_single, iterations=10, output_profile=output_profile)
+    assert result['avg_pdf_bytes'] > 0
+
+
+@pytest.mark.parametrize('output_profile', OUTPUT_PROFILES)
+def test_styles(benchmark, output_profile):
+    run(benchmark, bench_styles, iterations=10, output_profile=output_profile)
+
+
+@pytest.mark.parametrize('output_profile', OUTPUT_PROFILES)
+def test_batch(benchmark, output_profile):
+    result = run(benchmark, bench_batch, size=50, output_profile=output_profile)
+    assert result['generated'] == 50
+
+
+@pytest.mark.parametrize('render_mode', RENDER_MODES)
+def test_combined(benchmark, render_mode):
+    result = run(benchmark, bench_combined, size=50, render_mode=render_mode)
+    assert result['render_mode'] == render_mode
@@ -0,0 +1,140 @@
+"""
+On-demand certificate delivery.
+Renders a certificate the first time it is downloaded and serves it with
+conditional and range request support afterwards.
+"""
+import hashlib
+import re
+
+from django.db import transaction
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .generator import CertificateService
+from .models import Certificate
+from .storage import is_stored
+
+CHUNK_SIZE = 64 * 1024
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def _stored_name(certificate):
+    """Return the certificate's PDF storage name if the file exists, else None."""
+    pdf_file = certificate.pdf_file
+    if pdf_file and is_stored(pdf_file.storage, pdf_file.name):
+        return pdf_file.name
+    return None
+
+
+def ensure_certificate_pdf(certificate):
+    """
+    Get the certificate's PDF storage name, rendering and saving it on first access.
+    
+    The certificate row is locked while rendering, so concurrent first
+    downloads wait for one render instead of each producing their own.
+    
+    Args:
+        certificate: Certificate instance
+        
+    Returns:
+        Storage name of the PDF
+    """
+    name = _stored_name(certificate)
+    if name:
+        return name
+    
+    with transaction.atomic():
+        locked = (
+            Certificate.objects
+            .select_for_update()
+            .select_related('registration__event__organizer')
+            .get(pk=certificate.pk)
+        )
+        # Another request may have rendered it while this one waited
+        name = _stored_name(locked)
+        if name:
+            return name
+        
+        registration = locked.registration
+        # One PDF saved inline: no upload threads to start (and leak) per request
+        locked.pdf_file = CertificateService(upload_workers=0).generate_for_participant(
+            registration, registration.event, locked.certificate_number
+        )
+        if locked.status == 'pending':
+            locked.status = 'generated'
+        locked.save(update_fields=['pdf_file', 'status'])
+    
+    return locked.pdf_file.name
+
+
+def _iter_file_range(fileobj, length):
+    """Yield length bytes from an open file in chunks, then close it."""
+    try:
+        while length > 0:
+            data = fileobj.read(min(CHUNK_SIZE, length))
+            if not data:
+                break
+            length -= len(data)
+            yield data
+    finally:
+        fileobj.close()
+
+
+def pdf_response(request, storage, name, filename):
+    """
+    Serve a PDF with ETag/Last-Modified validation and single-range support.
+    
+    Args:
+        request: Django request
+        storage: Django storage holding the PDF
+        name: Storage name of the PDF
+        filename: Download filename
+        
+    Returns:
+        HttpResponse (200, 206, 304 or 416)
+    """
+    size = storage.size(name)
+    # Rendered PDFs are content-addressed, so the name identifies the content
+    etag = '"%s"' % hashlib.sha1(f"{name}:{size}".encode()).hexdigest()
+    try:
+        last_modified = int(storage.get_modified_time(name).timestamp())
+    except NotImplementedError:
+        last_modified = None
+    
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        return response
+    
+    range_match = RANGE_RE.match(request.META.get('HTTP_RANGE', '').strip())
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if range_match and any(range_match.groups()) and (not if_range or if_range == etag):
+        start, end = range_match.groups()
+        if start == '':
+            start, end = max(0, size - int(end)), size - 1
+        else:
+            start = int(start)
+            end = min(int(end), size - 1) if end else size - 1
+        
+        if start > end:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+        
+        fileobj = storage.open(name, 'rb')
+        fileobj.seek(start)
+        response = StreamingHttpResponse(
+            _iter_file_range(fileobj, end - start + 1),
+            status=206,
+            content_type='application/pdf',
+        )
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(end - start + 1)
+    else:
+        response = FileResponse(storage.open(name, 'rb'), content_type='application/pdf', filename=filename)
+    
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    return response
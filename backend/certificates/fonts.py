@@ -0,0 +1,82 @@
+"""
+TrueType fonts for certificate PDFs.
+Fonts are registered with ReportLab once per process and shared by every
+generator; ReportLab embeds only the glyphs a document actually uses.
+"""
+import os
+import threading
+
+import reportlab
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+
+# Standard PDF fonts; viewers supply them, so they are never embedded
+BASE_FONTS = ('Helvetica', 'Helvetica-Bold')
+
+# Bitstream Vera ships with ReportLab; used when fonts must be embedded
+_REPORTLAB_FONT_DIR = os.path.join(os.path.dirname(reportlab.__file__), 'fonts')
+BUNDLED_FONTS = {
+    'regular': os.path.join(_REPORTLAB_FONT_DIR, 'Vera.ttf'),
+    'bold': os.path.join(_REPORTLAB_FONT_DIR, 'VeraBd.ttf'),
+}
+
+# Registered font names keyed by (regular path, bold path)
+_registered = {}
+_lock = threading.Lock()
+
+
+def _register_ttf(path):
+    """Register one TrueType file and return its font name."""
+    name = os.path.splitext(os.path.basename(path))[0]
+    if name in pdfmetrics.getRegisteredFontNames():
+        # Same file name from another directory
+        name = f"{name}-{len(pdfmetrics.getRegisteredFontNames())}"
+    pdfmetrics.registerFont(TTFont(name, path))
+    return name
+
+
+def register_font_family(regular, bold=None):
+    """
+    Register a regular/bold TrueType pair, once per process.
+    
+    Args:
+        regular: Path to the regular TTF file
+        bold: Path to the bold TTF file (defaults to regular)
+        
+    Returns:
+        Tuple of (regular font name, bold font name)
+    """
+    key = (os.path.abspath(regular), os.path.abspath(bold or regular))
+    with _lock:
+        names = _registered.get(key)
+        if names is None:
+            regular_name = _register_ttf(key[0])
+            bold_name = regular_name if key[1] == key[0] else _register_ttf(key[1])
+            # Lets <b> in paragraphs switch to the bold file
+            pdfmetrics.registerFontFamily(
+                regular_name,
+                normal=regular_name,
+                bold=bold_name,
+                italic=regular_name,
+                boldItalic=bold_name,
+            )
+            names = _registered[key] = (regular_name, bold_name)
+    return names
+
+
+def resolve_fonts(fonts=None, embed=False):
+    """
+    Get the regular and bold font names for a generator.
+    
+    Args:
+        fonts: Optional dict with keys - regular, bold - of TTF paths
+        embed: Whether every font must be embedded in the PDF
+        
+    Returns:
+        Tuple of (regular font name, bold font name)
+    """
+    if fonts and fonts.get('regular'):
+        return register_font_family(fonts['regular'], fonts.get('bold'))
+    if embed:
+        return register_font_family(BUNDLED_FONTS['regular'], BUNDLED_FONTS['bold'])
+    return BASE_FONTS
@@ -7,36 +7,305 @@ from reportlab.lib.units import inch
 from reportlab.lib.colors import HexColor
 from reportlab.pdfgen import canvas
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image, Table, TableStyle
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image, Table, TableStyle, Frame, Flowable
 from reportlab.lib import colors
+from reportlab.lib.utils import ImageReader
+from reportlab import rl_config
+from reportlab.pdfbase import pdfdoc, pdfutils
+from reportlab.pdfgen import pdfimages
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from crosscert.metrics import CERTIFICATES_GENERATED, phase, timed
+from .fonts import resolve_fonts
+from .textfit import fit_font_size, fit_font_sizes
+from xml.sax.saxutils import escape
 from datetime import datetime
+from itertools import islice
+import hashlib
 import io
+import json
 import os
-from pathlib import Path
+import tempfile
+import threading
+
+
+# Rendering modes
+RENDER_MODE_FLOW = 'flow'
+RENDER_MODE_OVERLAY = 'overlay'
+RENDER_MODES = (RENDER_MODE_FLOW, RENDER_MODE_OVERLAY)
+
+# Output profiles
+OUTPUT_PROFILE_STANDARD = 'standard'
+OUTPUT_PROFILE_COMPACT = 'compact'
+OUTPUT_PROFILE_ARCHIVAL = 'archival'
+OUTPUT_PROFILES = (OUTPUT_PROFILE_STANDARD, OUTPUT_PROFILE_COMPACT, OUTPUT_PROFILE_ARCHIVAL)
+
+# Page margins shared by the flow and overlay layouts
+PAGE_MARGIN = 0.5*inch
+
+# Font size ranges (points) for text shrunk to fit on one line
+NAME_FONT_SIZE = 24
+NAME_MIN_FONT_SIZE = 12
+EVENT_TITLE_FONT_SIZE = 11
+EVENT_TITLE_MIN_FONT_SIZE = 7
+
+# Padding Frame adds inside each side of the page margins
+FRAME_PADDING = 6
+
+
+class _StreamEncodingConfig:
+    """
+    Stand-in for rl_config in ReportLab's PDF writer modules.
+    
+    ReportLab reads the stream encoding (useA85) from the process-wide
+    rl_config. This proxy lets a render override it for its own thread, so
+    concurrent renders with other profiles keep the global setting.
+    """
+    
+    def __init__(self, config):
+        self._config = config
+        self._local = threading.local()
+    
+    @property
+    def useA85(self):
+        return getattr(self._local, 'use_a85', self._config.useA85)
+    
+    def __getattr__(self, name):
+        return getattr(self._config, name)
+    
+    @contextmanager
+    def override(self, use_a85):
+        """Use the given encoding for PDFs written by this thread."""
+        previous = self._local.__dict__.get('use_a85')
+        self._local.use_a85 = use_a85
+        try:
+            yield
+        finally:
+            if previous is None:
+                del self._local.use_a85
+            else:
+                self._local.use_a85 = previous
+
+
+_STREAM_CONFIG = _StreamEncodingConfig(rl_config)
+pdfdoc.rl_config = pdfimages.rl_config = pdfutils.rl_config = _STREAM_CONFIG
+
+# Bump whenever the certificate layout changes so cached PDFs are re-rendered
+TEMPLATE_VERSION = 2
+
+
+class _Slot(Flowable):
+    """Wrap a top-level flowable and record where the frame draws it."""
+    
+    def __init__(self, flowable):
+        Flowable.__init__(self)
+        self.flowable = flowable
+        self.key = getattr(flowable, 'certificate_slot', None)
+        self.hAlign = getattr(flowable, 'hAlign', 'LEFT')
+        self.avail_width = None
+        self.position = None
+    
+    def wrap(self, availWidth, availHeight):
+        self.avail_width = availWidth
+        self.width, self.height = self.flowable.wrap(availWidth, availHeight)
+        return self.width, self.height
+    
+    def getSpaceBefore(self):
+        return self.flowable.getSpaceBefore()
+    
+    def getSpaceAfter(self):
+        return self.flowable.getSpaceAfter()
+    
+    def draw(self):
+        self.position = self.canv.absolutePosition(0, 0)
+        self.flowable.drawOn(self.canv, 0, 0)
+
+
+class CertificateTemplate:
+    """
+    Pre-laid-out certificate page for one event.
+    
+    The static parts (background, header, title, event details, signature
+    table) are laid out once and drawn as a shared form XObject. Only the
+    participant name and certificate footer are drawn per certificate.
+    """
+    
+    FORM_NAME = 'CertificateStatic'
+    
+    def __init__(self, generator, event_data):
+        """
+        Lay out the certificate once with placeholder participant data.
+        
+        Args:
+            generator: CertificateGenerator that owns styles and sections
+            event_data: Event dict as accepted by generate_certificate
+        """
+        self.generator = generator
+        self.event_data = event_data
+        
+        slots = [_Slot(flowable) for flowable in generator.build_elements({}, event_data)]
+        generator.make_frame().addFromList(list(slots), canvas.Canvas(io.BytesIO(), pagesize=A4))
+        
+        self.static_slots = [slot for slot in slots if slot.key is None and slot.position]
+        self.variable_slots = {slot.key: slot for slot in slots if slot.key is not None}
+    
+    def draw_page(self, c, participant_data):
+        """
+        Draw one certificate page onto a canvas and finish the page.
+        
+        Falls back to a full frame layout when the variable text would not
+        fit its pre-measured slot (e.g. a name that wraps to two lines).
+        
+        Args:
+            c: ReportLab canvas
+            participant_data: Participant dict as accepted by generate_certificate
+        """
+        stamps = []
+        for key, flowable in self.generator.variable_flowables(participant_data).items():
+            slot = self.variable_slots[key]
+            width, height = flowable.wrap(slot.avail_width, self.generator.page_height)
+            if height != slot.height:
+                stamps = None
+                break
+            stamps.append((flowable, slot.position))
+        
+        if stamps is None:
+            self.generator.layout_page(c, participant_data, self.event_data)
+        else:
+            if not c.hasForm(self.FORM_NAME):
+                c.beginForm(self.FORM_NAME)
+                self.generator.draw_background(c)
+                for slot in self.static_slots:
+                    slot.flowable.drawOn(c, *slot.position)
+                c.endForm()
+            c.doForm(self.FORM_NAME)
+            for flowable, position in stamps:
+                flowable.drawOn(c, *position)
+        
+        c.showPage()
 
 
 class CertificateGenerator:
     """Generate PDF certificates with customizable templates."""
     
-    def __init__(self, template_path=None):
+    def __init__(self, template_path=None, render_mode=RENDER_MODE_FLOW,
+                 output_profile=OUTPUT_PROFILE_STANDARD, fonts=None):
         """
         Initialize certificate generator.
         
         Args:
             template_path: Optional path to custom certificate template image
+            render_mode: How multi-page PDFs draw their pages: 'flow' lays
+                out every page from scratch, 'overlay' stamps participant text
+                onto one shared event page. Standalone certificates are always
+                laid out in full, since every file needs its own copy of the
+                page and a shared one saves little
+            output_profile: 'standard' (ReportLab defaults), 'compact'
+                (no document info or timestamps, smallest files) or
+                'archival' (PDF/A-leaning: every font embedded, full
+                document info)
+            fonts: Optional dict with keys - regular, bold - of TTF paths;
+                registered once per process and embedded as subsets
         """
+        if render_mode not in RENDER_MODES:
+            raise ValueError(f"Unknown render mode: {render_mode}")
+        if output_profile not in OUTPUT_PROFILES:
+            raise ValueError(f"Unknown output profile: {output_profile}")
+        
         self.template_path = template_path
+        self.render_mode = render_mode
+        self.output_profile = output_profile
+        self.fonts = fonts
+        self.font_name, self.bold_font_name = resolve_fonts(
+            fonts, embed=output_profile == OUTPUT_PROFILE_ARCHIVAL
+        )
+        self.background = ImageReader(template_path) if template_path else None
         self.page_width, self.page_height = A4
         self.primary_color = HexColor('#bf1818')  # CROSSCERT Red
         self.secondary_color = HexColor('#0840bf')  # CROSSCERT Blue
         self.text_color = HexColor('#212121')  # Dark text
         
+        # Styles are built once and reused for every certificate
+        self.styles = self._build_styles()
+        self.signature_table_style = TableStyle([
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, -1), self.font_name),
+            ('FONTNAME', (0, -1), (-1, -1), self.bold_font_name),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('TEXTCOLOR', (0, 0), (-1, -1), self.text_color),
+        ])
+        
+        # Width available to a single line of centered text
+        self.text_width = self.page_width - 2*PAGE_MARGIN - 2*FRAME_PADDING
+        
+        # Event page templates for overlay mode, keyed by event data
+        self._templates = {}
+        
+    def _build_styles(self):
+        """Build all paragraph styles used by the certificate layout."""
+        styles = getSampleStyleSheet()
+        return {
+            'header': ParagraphStyle(
+                'CustomCenter',
+                parent=styles['Normal'],
+                alignment=1,  # Center
+                fontSize=11,
+                textColor=self.secondary_color,
+                fontName=self.bold_font_name,
+            ),
+            'title': ParagraphStyle(
+                'CertTitle',
+                parent=styles['Heading1'],
+                fontSize=28,
+                textColor=self.primary_color,
+                alignment=1,  # Center
+                fontName=self.bold_font_name,
+                spaceAfter=12,
+            ),
+            'intro': ParagraphStyle(
+                'Intro',
+                parent=styles['Normal'],
+                fontSize=12,
+                alignment=1,  # Center
+                textColor=self.text_color,
+                fontName=self.font_name,
+            ),
+            'name': ParagraphStyle(
+                'ParticipantName',
+                parent=styles['Heading2'],
+                fontSize=24,
+                alignment=1,  # Center
+                textColor=self.primary_color,
+                fontName=self.bold_font_name,
+                underline=True,
+            ),
+            'body': ParagraphStyle(
+                'Body',
+                parent=styles['Normal'],
+                fontSize=11,
+                alignment=1,  # Center
+                textColor=self.text_color,
+                fontName=self.font_name,
+                leading=14,
+            ),
+            'footer': ParagraphStyle(
+                'Footer',
+                parent=styles['Normal'],
+                fontSize=10,
+                alignment=1,  # Center
+                textColor=self.text_color,
+                fontName=self.font_name,
+            ),
+        }
+        
     def generate_certificate(self, participant_data, event_data, output_path=None):
         """
         Generate a certificate PDF.
         
         Args:
-            participant_data: Dict with keys - name, email, year_level
+            participant_data: Dict with keys - name, email, year_level,
+                certificate_number, and optionally verification_code and
+                name_size (see fit_name_sizes)
             event_data: Dict with keys - title, date, start_time, end_time, duration, speakers, organizer
             output_path: Path to save PDF (if None, returns BytesIO object)
             
@@ -48,17 +317,176 @@ class CertificateGenerator:
         else:
             os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
             pdf_buffer = output_path
-            
+        
         doc = SimpleDocTemplate(
             pdf_buffer,
             pagesize=A4,
-            rightMargin=0.5*inch,
-            leftMargin=0.5*inch,
-            topMargin=0.5*inch,
-            bottomMargin=0.5*inch,
+            rightMargin=PAGE_MARGIN,
+            leftMargin=PAGE_MARGIN,
+            topMargin=PAGE_MARGIN,
+            bottomMargin=PAGE_MARGIN,
+            **self.pdf_options(),
+            **self.document_info(event_data, participant_data),
         )
         
-        # Create content
+        with phase('render', 'layout'):
+            elements = self.build_elements(participant_data, event_data, doc)
+        
+        # Build PDF
+        with phase('render', 'build'), self.stream_encoding():
+            doc.build(elements, onFirstPage=self.draw_background)
+        
+        if output_path is None:
+            pdf_buffer.seek(0)
+            return pdf_buffer
+        return output_path
+    
+    def generate_combined(self, participants, event_data, output_path):
+        """
+        Generate one multi-page PDF with a certificate page per participant.
+        
+        In overlay mode every page draws the same static form XObject, so the
+        event layout is drawn and stored once however many pages are written;
+        in flow mode each page is laid out in full. Participants are consumed
+        lazily and each page is finished before the next starts.
+        
+        Args:
+            participants: Iterable of participant dicts
+            event_data: Event dict as accepted by generate_certificate
+            output_path: Path or binary file object to save PDF to
+            
+        Returns:
+            Number of certificate pages written
+        """
+        if isinstance(output_path, str):
+            os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+        template = self.get_template(event_data) if self.render_mode == RENDER_MODE_OVERLAY else None
+        
+        count = 0
+        with self.stream_encoding():
+            c = self.make_canvas(output_path, self.document_info(event_data))
+            for participant_data in participants:
+                if template is None:
+                    self.layout_page(c, participant_data, event_data)
+                    c.showPage()
+                else:
+                    template.draw_page(c, participant_data)
+                count += 1
+            c.save()
+        return count
+    
+    def pdf_options(self):
+        """Canvas options for the output profile."""
+        options = {'pageCompression': 1, 'initialFontName': self.font_name}
+        if self.output_profile == OUTPUT_PROFILE_COMPACT:
+            # Fixed dates and document ID, so equal content gives equal bytes
+            options['invariant'] = 1
+        elif self.output_profile == OUTPUT_PROFILE_ARCHIVAL:
+            options['lang'] = 'en'
+        return options
+    
+    def document_info(self, event_data, participant_data=None):
+        """
+        Document info entries (title, author, ...) for the output profile.
+        
+        Args:
+            event_data: Event dict as accepted by generate_certificate
+            participant_data: Participant dict, or None for a combined PDF
+            
+        Returns:
+            Dict of keyword arguments accepted by SimpleDocTemplate
+        """
+        if self.output_profile == OUTPUT_PROFILE_COMPACT:
+            return {key: '' for key in ('title', 'author', 'subject', 'creator', 'producer', 'keywords')}
+        if self.output_profile == OUTPUT_PROFILE_ARCHIVAL:
+            event_title = event_data.get('title', 'Event')
+            if participant_data:
+                title = f"Certificate - {participant_data.get('name', 'Participant')}"
+            else:
+                title = f"Certificates - {event_title}"
+            return {
+                'title': title,
+                'author': event_data.get('organizer', 'CROSSCERT'),
+                'subject': event_title,
+                'creator': 'CROSSCERT',
+                'keywords': 'certificate',
+            }
+        return {}
+    
+    @contextmanager
+    def stream_encoding(self):
+        """
+        Apply the profile's stream encoding while a PDF is written.
+        
+        Compact output keeps compressed streams as raw binary instead of
+        ASCII85 text. The setting only applies to the current thread, so
+        renders with other profiles are unaffected and nothing waits.
+        """
+        if self.output_profile != OUTPUT_PROFILE_COMPACT:
+            yield
+            return
+        
+        with _STREAM_CONFIG.override(0):
+            yield
+    
+    def make_canvas(self, output, info=None):
+        """Create an A4 canvas configured for the output profile."""
+        c = canvas.Canvas(output, pagesize=A4, **self.pdf_options())
+        for key, value in (info or {}).items():
+            getattr(c, f"set{key.title()}")(value)
+        return c
+    
+    def get_template(self, event_data):
+        """
+        Get the cached overlay template for an event, building it if needed.
+        
+        Args:
+            event_data: Event dict as accepted by generate_certificate
+            
+        Returns:
+            CertificateTemplate instance
+        """
+        # The signature date is part of the static page, so include it in the key
+        key = (tuple(sorted(event_data.items())), datetime.now().date())
+        template = self._templates.get(key)
+        if template is None:
+            if len(self._templates) >= 32:
+                self._templates.clear()
+            template = self._templates[key] = CertificateTemplate(self, event_data)
+        return template
+    
+    def make_frame(self):
+        """Create the page frame used by SimpleDocTemplate for this layout."""
+        return Frame(
+            PAGE_MARGIN,
+            PAGE_MARGIN,
+            self.page_width - 2*PAGE_MARGIN,
+            self.page_height - 2*PAGE_MARGIN,
+            id='normal',
+        )
+    
+    def layout_page(self, c, participant_data, event_data):
+        """Lay out and draw a full certificate page onto a canvas."""
+        self.draw_background(c)
+        self.make_frame().addFromList(self.build_elements(participant_data, event_data), c)
+    
+    def draw_background(self, c, doc=None):
+        """Draw the custom template image, if any, across the whole page."""
+        if self.background is not None:
+            c.drawImage(self.background, 0, 0, width=self.page_width, height=self.page_height)
+    
+    def build_elements(self, participant_data, event_data, doc=None):
+        """
+        Build the flowables for one certificate.
+        
+        Args:
+            participant_data: Dict with keys - name, email, year_level
+            event_data: Event dict as accepted by generate_certificate
+            doc: Optional document template being built
+            
+        Returns:
+            List of flowables
+        """
         elements = []
         
         # Header with decorative line
@@ -80,32 +508,65 @@ class CertificateGenerator:
         # Signature section
         elements.extend(self._create_signature_section(event_data, doc))
         
-        # Build PDF
-        doc.build(elements)
+        # Footer with the certificate number
+        elements.append(Spacer(1, 0.2*inch))
+        elements.append(self._footer_paragraph(participant_data))
         
-        if output_path is None:
-            pdf_buffer.seek(0)
-            return pdf_buffer
-        return output_path
+        return elements
+    
+    def variable_flowables(self, participant_data):
+        """Build the flowables that change between participants, keyed by slot."""
+        return {
+            'name': self._name_paragraph(participant_data),
+            'footer': self._footer_paragraph(participant_data),
+        }
+    
+    def fit_name_size(self, name):
+        """Get the font size at which an (uppercased) name fits on one line."""
+        return fit_font_size(name, self.bold_font_name, NAME_FONT_SIZE, NAME_MIN_FONT_SIZE, self.text_width)
+    
+    def fit_name_sizes(self, participants):
+        """
+        Size every participant name of a batch before rendering.
+        
+        Args:
+            participants: Iterable of participant dicts
+            
+        Returns:
+            List of font sizes, usable as each participant's name_size
+        """
+        names = [participant_data.get('name', 'Participant Name').upper() for participant_data in participants]
+        return fit_font_sizes(names, self.bold_font_name, NAME_FONT_SIZE, NAME_MIN_FONT_SIZE, self.text_width)
+    
+    def _name_paragraph(self, participant_data):
+        """Create the emphasized participant name, shrunk to fit one line."""
+        text = participant_data.get('name', 'Participant Name').upper()
+        size = participant_data.get('name_size') or self.fit_name_size(text)
+        # The style's leading is kept, so the slot height does not change
+        name = Paragraph(f'<font size="{size}">{escape(text)}</font>', self.styles['name'])
+        name.certificate_slot = 'name'
+        return name
+    
+    def _footer_paragraph(self, participant_data):
+        """Create the footer with the certificate number and verification code."""
+        number = f"Certificate No: {escape(participant_data.get('certificate_number', 'N/A'))}"
+        if participant_data.get('verification_code'):
+            number += f" &nbsp;&middot;&nbsp; Verification code: {escape(participant_data['verification_code'])}"
+        footer = Paragraph(
+            "This certificate is issued in recognition of successful participation.<br/>" + number,
+            self.styles['footer']
+        )
+        footer.certificate_slot = 'footer'
+        return footer
     
     def _create_header(self, doc):
         """Create header with CROSSCERT branding."""
         elements = []
         
         # Decorative top border
-        styles = getSampleStyleSheet()
-        style_center = ParagraphStyle(
-            'CustomCenter',
-            parent=styles['Normal'],
-            alignment=1,  # Center
-            fontSize=11,
-            textColor=self.secondary_color,
-            fontName='Helvetica-Bold',
-        )
-        
         header_text = Paragraph(
             "CROSSCERT - Certificate of Attendance",
-            style_center
+            self.styles['header']
         )
         elements.append(header_text)
         
@@ -115,18 +576,7 @@ class CertificateGenerator:
         """Create main certificate title."""
         elements = []
         
-        styles = getSampleStyleSheet()
-        title_style = ParagraphStyle(
-            'CertTitle',
-            parent=styles['Heading1'],
-            fontSize=28,
-            textColor=self.primary_color,
-            alignment=1,  # Center
-            fontName='Helvetica-Bold',
-            spaceAfter=12,
-        )
-        
-        title = Paragraph("Certificate of Achievement", title_style)
+        title = Paragraph("Certificate of Achievement", self.styles['title'])
         elements.append(title)
         
         return elements
@@ -135,32 +585,13 @@ class CertificateGenerator:
         """Create participant name section."""
         elements = []
         
-        styles = getSampleStyleSheet()
-        
         # Intro text
-        intro_style = ParagraphStyle(
-            'Intro',
-            parent=styles['Normal'],
-            fontSize=12,
-            alignment=1,  # Center
-            textColor=self.text_color,
-        )
-        intro = Paragraph("This certificate is presented to", intro_style)
+        intro = Paragraph("This certificate is presented to", self.styles['intro'])
         elements.append(intro)
         elements.append(Spacer(1, 0.15*inch))
         
         # Participant name - emphasized
-        name_style = ParagraphStyle(
-            'ParticipantName',
-            parent=styles['Heading2'],
-            fontSize=24,
-            alignment=1,  # Center
-            textColor=self.primary_color,
-            fontName='Helvetica-Bold',
-            underline=True,
-        )
-        name = Paragraph(participant_data.get('name', 'Participant Name').upper(), name_style)
-        elements.append(name)
+        elements.append(self._name_paragraph(participant_data))
         
         return elements
     
@@ -168,30 +599,22 @@ class CertificateGenerator:
         """Create event details section."""
         elements = []
         
-        styles = getSampleStyleSheet()
-        
-        body_style = ParagraphStyle(
-            'Body',
-            parent=styles['Normal'],
-            fontSize=11,
-            alignment=1,  # Center
-            textColor=self.text_color,
-            leading=14,
-        )
-        
         # Main text
         event_title = event_data.get('title', 'Event')
         date = event_data.get('date', 'Date')
         duration = event_data.get('duration', 'Duration')
+        title_size = fit_font_size(
+            event_title, self.bold_font_name, EVENT_TITLE_FONT_SIZE, EVENT_TITLE_MIN_FONT_SIZE, self.text_width
+        )
         
         recognition_text = f"""
         For successfully attending and completing the requirements for<br/>
-        <b>{event_title}</b><br/>
+        <b><font size="{title_size}">{escape(event_title)}</font></b><br/>
         held on <b>{date}</b><br/>
         Duration: <b>{duration}</b>
         """
         
-        recognition = Paragraph(recognition_text, body_style)
+        recognition = Paragraph(recognition_text, self.styles['body'])
         elements.append(recognition)
         
         return elements
@@ -200,16 +623,6 @@ class CertificateGenerator:
         """Create signature and official seal section."""
         elements = []
         
-        styles = getSampleStyleSheet()
-        
-        footer_style = ParagraphStyle(
-            'Footer',
-            parent=styles['Normal'],
-            fontSize=10,
-            alignment=1,  # Center
-            textColor=self.text_color,
-        )
-        
         # Signature lines
         elements.append(Spacer(1, 0.3*inch))
         
@@ -222,59 +635,148 @@ class CertificateGenerator:
         ]
         
         sig_table = Table(sig_data, colWidths=[2*inch, 0.5*inch, 2*inch])
-        sig_table.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('TEXTCOLOR', (0, 0), (-1, -1), self.text_color),
-        ]))
+        sig_table.setStyle(self.signature_table_style)
         
         elements.append(sig_table)
         
-        # Footer text
-        elements.append(Spacer(1, 0.2*inch))
-        footer_text = Paragraph(
-            "This certificate is issued in recognition of successful participation.<br/>" +
-            "Certificate No: CERT-" + datetime.now().strftime('%Y-%m-%d-%H%M%S'),
-            footer_style
-        )
-        elements.append(footer_text)
-        
         return elements
 
 
+# Per-process generator used by batch render workers
+_worker_generator = None
+
+
+def _init_render_worker(template_path, output_profile, fonts):
+    """Create the certificate generator once per pool worker process."""
+    global _worker_generator
+    _worker_generator = CertificateGenerator(
+        template_path=template_path,
+        output_profile=output_profile,
+        fonts=fonts,
+    )
+
+
+def _render_job(generator, job):
+    """
+    Render a single certificate job.
+    
+    Args:
+        generator: CertificateGenerator instance
+        job: Tuple of (participant_data, event_data)
+        
+    Returns:
+        Tuple of (PDF bytes, error) where exactly one is None
+    """
+    participant_data, event_data = job
+    try:
+        return generator.generate_certificate(participant_data, event_data).getvalue(), None
+    except Exception as e:
+        return None, str(e)
+
+
+def _render_job_in_worker(job):
+    """Render a certificate job with the worker process generator."""
+    return _render_job(_worker_generator, job)
+
+
 class CertificateService:
     """Service class to manage certificate generation and storage."""
     
-    def __init__(self, storage_path='certificates'):
+    # Storage name prefix, matching Certificate.pdf_file's upload_to
+    name_prefix = 'certificates'
+    
+    def __init__(self, storage=None, workers=1, render_mode=RENDER_MODE_FLOW, upload_workers=None,
+                 output_profile=None):
         """
         Initialize certificate service.
         
         Args:
-            storage_path: Path to store generated certificates
+            storage: Django storage for PDFs (defaults to the 'certificates' storage)
+            workers: Number of processes used for batch rendering
+            render_mode: Rendering mode for combined PDFs (see CertificateGenerator)
+            upload_workers: Threads saving batch PDFs in the background
+                (defaults to CERTIFICATE_UPLOAD_WORKERS; 0 saves inline)
+            output_profile: Output profile passed to CertificateGenerator
+                (defaults to CERTIFICATE_OUTPUT_PROFILE)
         """
-        self.storage_path = Path(storage_path)
-        self.storage_path.mkdir(parents=True, exist_ok=True)
-        self.generator = CertificateGenerator()
+        from django.conf import settings
+        from .storage import CertificateUploader, get_certificate_storage
+        
+        self.storage = storage or get_certificate_storage()
+        self.generator = CertificateGenerator(
+            render_mode=render_mode,
+            output_profile=output_profile or settings.CERTIFICATE_OUTPUT_PROFILE,
+            fonts=settings.CERTIFICATE_FONTS,
+        )
+        self.workers = workers
+        # Render processes, started on first use and kept until close()
+        self._pool = None
+        self._pool_workers = 0
+        
+        if upload_workers is None:
+            upload_workers = settings.CERTIFICATE_UPLOAD_WORKERS
+        self.uploader = CertificateUploader(self.storage, upload_workers) if upload_workers else None
+    
+    def close(self):
+        """Wait for background uploads to finish and stop the render processes."""
+        if self.uploader is not None:
+            self.uploader.shutdown()
+            self.uploader = None
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
     
-    def generate_for_participant(self, registration, event):
+    def _render_pool(self, workers):
         """
-        Generate certificate for a participant.
+        Get the render process pool, starting it on first use.
+        
+        Workers import ReportLab and build their generator once, so the pool
+        is reused by every batch until close() instead of started per batch.
+        """
+        if self._pool is not None and self._pool_workers != workers:
+            self._pool.shutdown()
+            self._pool = None
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_render_worker,
+                initargs=(
+                    self.generator.template_path,
+                    self.generator.output_profile,
+                    self.generator.fonts,
+                ),
+            )
+            self._pool_workers = workers
+        return self._pool
+    
+    @staticmethod
+    def build_participant_data(registration, certificate_number=None):
+        """
+        Build the plain participant dict used by the generator.
         
         Args:
             registration: EventRegistration instance
-            event: Event instance
-            
-        Returns:
-            Path to generated certificate PDF
+            certificate_number: Number already issued to the registration
+                (defaults to the number build_certificate_number assigns)
         """
+        from django.conf import settings
+        from .numbering import build_certificate_number, verification_code
+        
+        number = certificate_number or build_certificate_number(registration.event_id, registration.id)
         participant_data = {
             'name': f"{registration.first_name} {registration.last_name}",
             'email': registration.email,
             'year_level': registration.affiliation,
+            'certificate_number': number,
         }
-        
-        event_data = {
+        if settings.CERTIFICATE_VERIFICATION_CODES:
+            participant_data['verification_code'] = verification_code(number)
+        return participant_data
+    
+    @staticmethod
+    def build_event_data(event):
+        """Build the plain event dict used by the generator."""
+        return {
             'title': event.title,
             'date': event.date.strftime('%B %d, %Y'),
             'start_time': event.start_time.strftime('%I:%M %p'),
@@ -283,88 +785,387 @@ class CertificateService:
             'speakers': ', '.join(event.speakers) if event.speakers else 'N/A',
             'organizer': event.organizer.get_full_name() or event.organizer.username,
         }
+    
+    def render_cache_key(self, participant_data, event_data):
+        """
+        Hash everything that affects a certificate's content.
         
-        # Generate unique filename
-        filename = f"{registration.id}_{event.id}_{datetime.now().strftime('%Y%m%d%H%M%S')}.pdf"
-        filepath = self.storage_path / filename
+        Changing the participant or event data, the template image or
+        TEMPLATE_VERSION, output profile or fonts yields a new key, so only
+        affected PDFs are re-rendered.
+        """
+        payload = json.dumps(
+            {
+                'participant': participant_data,
+                'event': event_data,
+                'template': [TEMPLATE_VERSION, self.generator.template_path],
+                'output': [self.generator.output_profile, self.generator.fonts],
+            },
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+    
+    def _output_name(self, participant_data, event_data):
+        """Build the content-addressed storage name for a certificate."""
+        key = self.render_cache_key(participant_data, event_data)
+        return f"{self.name_prefix}/{key[:2]}/{key}.pdf"
+    
+    @classmethod
+    def combined_name(cls, event_id):
+        """Storage name of an event's combined PDF; each export replaces the last."""
+        return f"{cls.name_prefix}/combined/event_{event_id}.pdf"
+    
+    @timed('generate_for_participant')
+    def generate_for_participant(self, registration, event, certificate_number=None):
+        """
+        Generate certificate for a participant.
+        
+        Returns the stored PDF without rendering if identical data was
+        rendered before.
         
-        # Generate PDF
-        self.generator.generate_certificate(
-            participant_data,
-            event_data,
-            str(filepath)
+        Args:
+            registration: EventRegistration instance
+            event: Event instance
+            certificate_number: Number already issued to the registration
+            
+        Returns:
+            Storage name of the certificate PDF
+        """
+        from .storage import is_stored, save_pdf
+        
+        participant_data = self.build_participant_data(registration, certificate_number)
+        event_data = self.build_event_data(event)
+        name = self._output_name(participant_data, event_data)
+        
+        if is_stored(self.storage, name):
+            CERTIFICATES_GENERATED.inc(outcome='cached')
+            return name
+        
+        data, error = _render_job(self.generator, (participant_data, event_data))
+        if error:
+            CERTIFICATES_GENERATED.inc(outcome='error')
+            raise RuntimeError(error)
+        with phase('generate_for_participant', 'write'):
+            name = save_pdf(self.storage, name, data)
+        CERTIFICATES_GENERATED.inc(outcome='generated')
+        return name
+    
+    def generate_combined_for_event(self, event, registrations_list, output=None):
+        """
+        Generate a single multi-page PDF for many participants of an event.
+        
+        Without an output the PDF is written to a local temporary file and
+        then streamed into storage under combined_name, replacing the
+        event's previous export.
+        
+        Args:
+            event: Event instance
+            registrations_list: Iterable of EventRegistration instances;
+                select_related('certificate') so issued numbers are reused
+                without a query per page
+            output: Optional path or binary file object to write the PDF to
+                instead of storage
+            
+        Returns:
+            Tuple of (storage name of the combined PDF, or None when written
+            to output, number of pages)
+        """
+        from .storage import write_pdf
+        
+        participants = (
+            self.build_participant_data(registration, _issued_number(registration))
+            for registration in registrations_list
         )
+        event_data = self.build_event_data(event)
+        
+        if output is not None:
+            return None, self.generator.generate_combined(participants, event_data, output)
+        
+        name = self.combined_name(event.id)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            tmp_path = os.path.join(tmp_dir, 'combined.pdf')
+            count = self.generator.generate_combined(participants, event_data, tmp_path)
+            with open(tmp_path, 'rb') as pdf:
+                name = write_pdf(self.storage, name, pdf)
+        
+        return name, count
+    
+    def render_batch(self, event, registrations_list, workers=None):
+        """
+        Render certificates for multiple participants, optionally in parallel.
+        
+        Workers only receive plain dicts, so no ORM instances or database
+        connections cross the process boundary. The worker processes are
+        kept for later batches until close(). With an uploader, PDFs are
+        saved in the background; call wait_for_uploads before relying on them.
+        
+        Args:
+            event: Event instance
+            registrations_list: Iterable of EventRegistration instances
+            workers: Number of worker processes (defaults to self.workers)
+            
+        Returns:
+            List of dicts with keys - registration, path, error, upload - in
+            input order, where path is the storage name and upload is a
+            pending Future or None
+        """
+        from .storage import is_stored, save_pdf
+        
+        registrations_list = list(registrations_list)
+        workers = workers or self.workers
+        event_data = self.build_event_data(event)
+        
+        # Stored PDFs are returned as-is; only the rest is rendered
+        results = []
+        jobs = []
+        pending = []
+        for registration in registrations_list:
+            participant_data = self.build_participant_data(registration)
+            name = self._output_name(participant_data, event_data)
+            result = {'registration': registration, 'path': name, 'error': None, 'upload': None}
+            if not is_stored(self.storage, name):
+                jobs.append((participant_data, event_data))
+                pending.append(result)
+            results.append(result)
+        
+        # Size every name up front so font metrics stay out of the render loop
+        name_sizes = self.generator.fit_name_sizes(participant_data for participant_data, _ in jobs)
+        jobs = [
+            ({**participant_data, 'name_size': size}, event_data)
+            for (participant_data, event_data), size in zip(jobs, name_sizes)
+        ]
+        
+        if workers <= 1 or len(jobs) <= 1:
+            rendered = [_render_job(self.generator, job) for job in jobs]
+        else:
+            chunksize = max(1, len(jobs) // (workers * 4))
+            pool = self._render_pool(workers)
+            rendered = list(pool.map(_render_job_in_worker, jobs, chunksize=chunksize))
+        
+        CERTIFICATES_GENERATED.inc(len(results) - len(pending), outcome='cached')
+        for result, (data, error) in zip(pending, rendered):
+            CERTIFICATES_GENERATED.inc(outcome='error' if error else 'generated')
+            if error:
+                result['path'], result['error'] = None, error
+            elif self.uploader is not None:
+                result['upload'] = self.uploader.submit(result['path'], data)
+            else:
+                try:
+                    result['path'] = save_pdf(self.storage, result['path'], data)
+                except Exception as e:
+                    result['path'], result['error'] = None, str(e)
         
-        return str(filepath)
+        return results
     
-    def generate_batch_certificates(self, event, registrations_list):
+    def wait_for_uploads(self, results):
+        """
+        Wait for the background uploads of render_batch results.
+        
+        Failed uploads are turned into errors on their result.
+        
+        Returns:
+            The same results, with every upload finished
+        """
+        for result in results:
+            upload = result['upload']
+            if upload is None:
+                continue
+            try:
+                result['path'] = upload.result()
+            except Exception as e:
+                result['path'], result['error'] = None, str(e)
+            result['upload'] = None
+        return results
+    
+    def generate_batch_certificates(self, event, registrations_list, workers=None):
         """
         Generate certificates for multiple participants.
         
         Args:
             event: Event instance
             registrations_list: List of EventRegistration instances
+            workers: Number of worker processes (defaults to self.workers)
             
         Returns:
             List of generated certificate paths
         """
         certificate_paths = []
         
-        for registration in registrations_list:
-            try:
-                path = self.generate_for_participant(registration, event)
-                certificate_paths.append(path)
-            except Exception as e:
-                print(f"Error generating certificate for {registration.email}: {e}")
+        results = self.wait_for_uploads(self.render_batch(event, registrations_list, workers=workers))
+        for result in results:
+            if result['error']:
+                print(f"Error generating certificate for {result['registration'].email}: {result['error']}")
+            else:
+                certificate_paths.append(result['path'])
         
         return certificate_paths
 
 
+def get_eligible_registrations(event, include_certified=False):
+    """
+    Get registrations that qualify for a certificate.
+    
+    Args:
+        event: Event instance
+        include_certified: Also include registrations that already have a certificate
+        
+    Returns:
+        EventRegistration queryset
+    """
+    from events.models import EventRegistration
+    
+    # Registrations with completed evaluations and check-ins
+    registrations = EventRegistration.objects.filter(
+        event=event,
+        check_in__isnull=False,
+        evaluation__isnull=False,
+    )
+    if not include_certified:
+        registrations = registrations.exclude(certificate__isnull=False)
+    return registrations
+
+
+def export_combined_certificates(event_id, output=None, render_mode=RENDER_MODE_OVERLAY):
+    """
+    Write every eligible participant of an event into one multi-page PDF.
+    
+    Args:
+        event_id: ID of the event
+        output: Optional path or binary file object to write the PDF to;
+            by default it replaces the event's combined PDF in storage
+        render_mode: 'overlay' (one shared event page) or 'flow'
+        
+    Returns:
+        Tuple of (storage name or None, page count), or None if the event does not exist
+    """
+    from events.models import Event
+    
+    try:
+        event = Event.objects.select_related('organizer').get(id=event_id)
+    except Event.DoesNotExist:
+        print(f"Event with ID {event_id} not found")
+        return None
+    
+    # One file written inline, so no upload threads
+    service = CertificateService(render_mode=render_mode, upload_workers=0)
+    registrations = (
+        get_eligible_registrations(event, include_certified=True)
+        .select_related('certificate')
+        .order_by('last_name', 'first_name')
+    )
+    return service.generate_combined_for_event(event, registrations.iterator(), output=output)
+
+
 # Utility function for Django management commands
-def generate_certificates_for_event(event_id):
+@timed('generate_event')
+def generate_certificates_for_event(event_id, workers=1, batch_size=500):
     """
     Generate certificates for all eligible participants of an event.
     
+    Registrations are read in one streamed query and processed in batches.
+    Each batch's Certificate rows are committed together, and registrations
+    that already have a certificate are skipped, so a run that stops halfway
+    resumes after the last committed batch when started again. A batch is
+    committed once its PDFs are stored, while the next batch renders.
+    
     Args:
         event_id: ID of the event
+        workers: Number of processes used to render PDFs
+        batch_size: Number of registrations rendered and inserted per batch
     """
-    from events.models import Event, EventRegistration
-    from certificates.models import Certificate
-    from django.utils import timezone
-    import uuid
+    from events.models import Event
     
     try:
-        event = Event.objects.get(id=event_id)
-        service = CertificateService()
-        
-        # Get registrations with completed evaluations and check-ins
-        eligible_registrations = EventRegistration.objects.filter(
-            event=event,
-            check_in__isnull=False,
-            evaluation__isnull=False,
-        ).exclude(certificate__isnull=False)  # Exclude already generated
-        
-        print(f"Generating certificates for {eligible_registrations.count()} participants...")
-        
-        for registration in eligible_registrations:
-            # Generate PDF
-            pdf_path = service.generate_for_participant(registration, event)
-            
-            # Create certificate record
-            cert_number = f"CERT-{event.id}-{uuid.uuid4().hex[:8].upper()}"
-            certificate = Certificate.objects.create(
-                registration=registration,
-                certificate_number=cert_number,
-                pdf_file=pdf_path,
-                status='generated',
-                created_at=timezone.now(),
-            )
-            
-            print(f"Generated certificate {cert_number} for {registration.first_name} {registration.last_name}")
-        
-        print("Certificate generation complete!")
-        return True
-        
+        with phase('generate_event', 'query'):
+            event = Event.objects.select_related('organizer').get(id=event_id)
     except Event.DoesNotExist:
         print(f"Event with ID {event_id} not found")
         return False
+    
+    service = CertificateService(workers=workers)
+    
+    # Exclude already generated
+    eligible_registrations = (
+        get_eligible_registrations(event)
+        .select_related('event__organizer')
+        .iterator(chunk_size=batch_size)
+    )
+    
+    print(f"Generating certificates for {event.title}...")
+    
+    generated = 0
+    previous = None
+    batches = _chunked(eligible_registrations, batch_size)
+    try:
+        while True:
+            with phase('generate_event', 'query'):
+                batch = next(batches, None)
+            if batch is None:
+                break
+            
+            # Render PDFs (possibly in parallel), then write records in this process
+            with phase('generate_event', 'render'):
+                results = service.render_batch(event, batch)
+            if previous is not None:
+                generated += _save_certificates(service, event, previous, batch_size)
+                print(f"Generated {generated} certificates so far")
+            previous = results
+        
+        if previous is not None:
+            generated += _save_certificates(service, event, previous, batch_size)
+    finally:
+        service.close()
+    
+    print(f"Certificate generation complete! {generated} certificates generated.")
+    return True
+
+
+def _save_certificates(service, event, results, batch_size):
+    """
+    Create Certificate rows for a rendered batch once its PDFs are stored.
+    
+    Returns:
+        Number of certificates created
+    """
+    from certificates.models import Certificate
+    from django.db import transaction
+    from .numbering import build_certificate_number
+    
+    with phase('generate_event', 'write'):
+        results = service.wait_for_uploads(results)
+    
+    certificates = []
+    for result in results:
+        registration = result['registration']
+        if result['error']:
+            print(f"Error generating certificate for {registration.email}: {result['error']}")
+            continue
+        
+        certificates.append(Certificate(
+            registration=registration,
+            certificate_number=build_certificate_number(event.id, registration.id),
+            pdf_file=result['path'],
+            status='generated',
+        ))
+    
+    with phase('generate_event', 'write'), transaction.atomic():
+        Certificate.objects.bulk_create(certificates, batch_size=batch_size)
+    
+    return len(certificates)
+
+
+def _issued_number(registration):
+    """Get the number of a registration's certificate, if it has one."""
+    certificate = getattr(registration, 'certificate', None)
+    return certificate.certificate_number if certificate else None
+
+
+def _chunked(iterable, size):
+    """Yield lists of up to size items from an iterable."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
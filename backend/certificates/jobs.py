@@ -0,0 +1,284 @@
+"""
+Chunked certificate generation jobs.
+A job splits an event's eligible registrations into chunks that workers
+process independently; progress is read back from the chunk rows.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Prefetch, Q, Sum
+from django.utils import timezone
+
+from .generator import CertificateService, get_eligible_registrations, _chunked
+from .models import Certificate, CertificateJob, CertificateJobChunk
+from .numbering import build_certificate_number
+
+DEFAULT_CHUNK_SIZE = 100
+MAX_CHUNK_SIZE = 1000
+
+# Errors kept per chunk, so one broken event cannot bloat the job rows
+MAX_CHUNK_ERRORS = 50
+
+
+def create_job(event, chunk_size=DEFAULT_CHUNK_SIZE, send_emails=True):
+    """
+    Create a job and its chunks for an event's eligible registrations.
+    
+    Args:
+        event: Event instance
+        chunk_size: Number of registrations per chunk
+        send_emails: Email each certificate once it is generated
+        
+    Returns:
+        CertificateJob instance
+    """
+    registration_ids = list(
+        get_eligible_registrations(event).order_by('id').values_list('id', flat=True)
+    )
+    
+    with transaction.atomic():
+        job = CertificateJob.objects.create(
+            event=event,
+            chunk_size=chunk_size,
+            send_emails=send_emails,
+            total=len(registration_ids),
+        )
+        CertificateJobChunk.objects.bulk_create([
+            CertificateJobChunk(job=job, index=index, registration_ids=ids)
+            for index, ids in enumerate(_chunked(registration_ids, chunk_size))
+        ])
+    return job
+
+
+def process_chunk(chunk):
+    """
+    Generate the certificates of one chunk.
+    
+    Registrations that already have a certificate count as done, so a
+    chunk can be run again after a failure. A failing row is recorded on
+    the chunk instead of stopping the others.
+    
+    Args:
+        chunk: CertificateJobChunk with job and event loaded
+        
+    Returns:
+        IDs of the certificates created
+    """
+    from events.models import EventRegistration
+    
+    event = chunk.job.event
+    chunk.status = 'running'
+    chunk.attempts += 1
+    chunk.started_at = timezone.now()
+    chunk.finished_at = None
+    chunk.done = chunk.failed = 0
+    chunk.errors = []
+    chunk.save()
+    
+    created = []
+    try:
+        registrations = {
+            registration.id: registration
+            for registration in EventRegistration.objects
+            .filter(id__in=chunk.registration_ids)
+            .select_related('event__organizer')
+        }
+        certified = set(
+            Certificate.objects
+            .filter(registration_id__in=chunk.registration_ids)
+            .values_list('registration_id', flat=True)
+        )
+        
+        errors = [
+            {'registration_id': registration_id, 'message': 'Registration not found'}
+            for registration_id in chunk.registration_ids
+            if registration_id not in registrations
+        ]
+        pending = [
+            registration for registration_id, registration in registrations.items()
+            if registration_id not in certified
+        ]
+        
+        service = CertificateService()
+        try:
+            results = service.wait_for_uploads(service.render_batch(event, pending))
+        finally:
+            service.close()
+        
+        certificates = []
+        for result in results:
+            registration = result['registration']
+            if result['error']:
+                errors.append({'registration_id': registration.id, 'message': result['error']})
+                continue
+            certificates.append(Certificate(
+                registration=registration,
+                certificate_number=build_certificate_number(event.id, registration.id),
+                pdf_file=result['path'],
+                status='generated',
+            ))
+        
+        with transaction.atomic():
+            # A forced retry can run the same chunk twice at once; locking the
+            # registrations lets the second run see what the first one created
+            locked = [certificate.registration_id for certificate in certificates]
+            list(EventRegistration.objects.select_for_update().filter(id__in=locked).values_list('id'))
+            certified_since = set(
+                Certificate.objects
+                .filter(registration_id__in=locked)
+                .values_list('registration_id', flat=True)
+            )
+            created = Certificate.objects.bulk_create([
+                certificate for certificate in certificates
+                if certificate.registration_id not in certified_since
+            ])
+        
+        chunk.done = len(certified) + len(certified_since) + len(created)
+        chunk.failed = len(errors)
+        chunk.errors = errors[:MAX_CHUNK_ERRORS]
+        chunk.status = 'failed' if errors else 'completed'
+    except Exception as e:
+        chunk.done = 0
+        chunk.failed = len(chunk.registration_ids)
+        chunk.errors = [{'registration_id': None, 'message': str(e)}]
+        chunk.status = 'failed'
+        created = []
+    
+    chunk.finished_at = timezone.now()
+    chunk.save()
+    return [certificate.id for certificate in created]
+
+
+def start_job(job, chunk_ids):
+    """Mark a job as running before its chunks are dispatched."""
+    with transaction.atomic():
+        CertificateJobChunk.objects.filter(id__in=chunk_ids).update(status='pending', queued_at=timezone.now())
+        job.status = 'running'
+        job.finished_at = None
+        if job.started_at is None:
+            job.started_at = timezone.now()
+        job.save(update_fields=['status', 'started_at', 'finished_at'])
+
+
+def finish_job(job):
+    """
+    Set a job's final status once all of its chunks have run.
+    
+    A forced retry dispatches a second chord while the first may still be
+    running, so this can be called more than once: the job is left alone
+    while other chunks are active, and only a running job is finished.
+    """
+    if has_active_chunks(job):
+        return job
+    
+    failed = job.chunks.filter(status='failed').exists()
+    CertificateJob.objects.filter(pk=job.pk, status__in=('pending', 'running')).update(
+        status='failed' if failed else 'completed',
+        finished_at=timezone.now(),
+    )
+    job.refresh_from_db(fields=['status', 'finished_at'])
+    return job
+
+
+def stale_chunks():
+    """
+    Filter for chunks whose worker is presumed lost.
+    
+    A worker that is killed never marks its chunk, so a chunk still pending
+    or running CERTIFICATE_JOB_CHUNK_TIMEOUT seconds after it was queued or
+    started is treated as abandoned.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.CERTIFICATE_JOB_CHUNK_TIMEOUT)
+    return Q(status='running', started_at__lt=cutoff) | Q(status='pending', queued_at__lt=cutoff)
+
+
+def has_active_chunks(job):
+    """Whether any chunk of a job is pending or running and not stale."""
+    return job.chunks.filter(status__in=('pending', 'running')).exclude(stale_chunks()).exists()
+
+
+def retryable_chunk_ids(job, force=False):
+    """
+    IDs of the chunks a retry would run again.
+    
+    Args:
+        job: CertificateJob instance
+        force: Also take chunks that are pending or running and not yet stale
+    """
+    retryable = Q(status='failed') | stale_chunks()
+    if force:
+        retryable |= Q(status__in=('pending', 'running'))
+    return list(job.chunks.filter(retryable).values_list('id', flat=True))
+
+
+# Chunk totals per job, so a list of jobs reads its progress in one query
+PROGRESS_ANNOTATIONS = {
+    'progress_done': Sum('chunks__done'),
+    'progress_failed': Sum('chunks__failed'),
+    'progress_chunks': Count('chunks'),
+    'progress_failed_chunks': Count('chunks', filter=Q(chunks__status='failed')),
+}
+
+
+def with_progress(queryset):
+    """
+    Annotate a CertificateJob queryset with chunk totals and prefetch the
+    failed chunks, so job_progress and job_errors need no further queries.
+    """
+    return queryset.annotate(**PROGRESS_ANNOTATIONS).prefetch_related(Prefetch(
+        'chunks',
+        queryset=CertificateJobChunk.objects.filter(status='failed').only('job_id', 'index', 'errors'),
+        to_attr='failed_chunk_list',
+    ))
+
+
+def job_errors(job):
+    """Row-level errors of a job's failed chunks, tagged with the chunk index."""
+    chunks = getattr(job, 'failed_chunk_list', None)
+    if chunks is None:
+        chunks = job.chunks.filter(status='failed').only('index', 'errors')
+    errors = []
+    for chunk in chunks:
+        errors.extend(dict(error, chunk=chunk.index) for error in chunk.errors)
+    return errors
+
+
+def job_progress(job):
+    """
+    Summarize a job's progress.
+    
+    Uses the totals added by with_progress when present.
+    
+    Returns:
+        Dict with keys - total, done, failed, remaining, chunks,
+        failed_chunks, throughput (certificates per second), eta_seconds
+    """
+    if hasattr(job, 'progress_chunks'):
+        values = {name: getattr(job, name) for name in PROGRESS_ANNOTATIONS}
+    else:
+        values = CertificateJob.objects.filter(pk=job.pk).aggregate(**PROGRESS_ANNOTATIONS)
+    totals = {name.removeprefix('progress_'): value for name, value in values.items()}
+    done = totals['done'] or 0
+    failed = totals['failed'] or 0
+    remaining = max(0, job.total - done - failed)
+    
+    throughput = None
+    eta_seconds = None
+    if job.started_at:
+        elapsed = ((job.finished_at or timezone.now()) - job.started_at).total_seconds()
+        if elapsed > 0:
+            throughput = round(done / elapsed, 2)
+        if throughput and job.status == 'running':
+            eta_seconds = round(remaining / throughput, 1)
+    
+    return {
+        'total': job.total,
+        'done': done,
+        'failed': failed,
+        'remaining': remaining,
+        'chunks': totals['chunks'],
+        'failed_chunks': totals['failed_chunks'],
+        'throughput': throughput,
+        'eta_seconds': eta_seconds,
+    }
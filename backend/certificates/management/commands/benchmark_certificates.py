@@ -0,0 +1,121 @@
+"""
+Django management command to benchmark certificate generation.
+Usage: python manage.py benchmark_certificates --settings=crosscert.settings_benchmark
+       [--sizes=100,1000,10000] [--profiles=standard,compact] [--output=results.json] [--compare=baseline.json]
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from certificates.benchmarks import DEFAULT_SIZES, SCENARIOS, compare_results, run_benchmarks
+from certificates.generator import OUTPUT_PROFILES, RENDER_MODE_FLOW
+
+
+class Command(BaseCommand):
+    help = 'Benchmark certificate rendering, batch throughput and per-certificate queries on SQLite'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            default=','.join(str(size) for size in DEFAULT_SIZES),
+            help='Comma-separated participant counts for the batch and event scenarios',
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=50,
+            help='Number of renders timed by the single-certificate and styles scenarios',
+        )
+        parser.add_argument(
+            '--scenarios',
+            default=','.join(SCENARIOS),
+            help='Comma-separated scenarios to run (single, styles, batch, event, combined)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Number of processes used to render certificate PDFs',
+        )
+        parser.add_argument(
+            '--profiles',
+            default=','.join(OUTPUT_PROFILES),
+            help='Comma-separated output profiles to benchmark (standard, compact, archival)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Batch size for the event scenario',
+        )
+        parser.add_argument(
+            '--output',
+            help='Write the results as JSON to this file',
+        )
+        parser.add_argument(
+            '--compare',
+            help='Compare against a JSON results file from an earlier run',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',') if size]
+        except ValueError:
+            raise CommandError('--sizes must be a comma-separated list of integers')
+        scenarios = [scenario for scenario in options['scenarios'].split(',') if scenario]
+        unknown = set(scenarios) - set(SCENARIOS)
+        if unknown:
+            raise CommandError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+        profiles = [profile for profile in options['profiles'].split(',') if profile]
+        unknown = set(profiles) - set(OUTPUT_PROFILES)
+        if unknown:
+            raise CommandError(f"Unknown output profiles: {', '.join(sorted(unknown))}")
+        
+        baseline = None
+        if options['compare']:
+            with open(options['compare']) as f:
+                baseline = json.load(f)
+        
+        try:
+            run = run_benchmarks(
+                sizes=sizes,
+                iterations=options['iterations'],
+                workers=options['workers'],
+                batch_size=options['batch_size'],
+                scenarios=scenarios,
+                progress=self._report,
+                output_profiles=profiles,
+            )
+        except RuntimeError as e:
+            raise CommandError(str(e))
+        
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(run, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+        
+        if baseline is not None:
+            self._report_comparison(compare_results(baseline, run))
+
+    def _report(self, result):
+        details = ', '.join(
+            f'{key}={value}' for key, value in result.items()
+            if key not in ('scenario', 'render_mode', 'output_profile', 'size')
+        )
+        self.stdout.write(
+            f"{result['scenario']} [{result.get('render_mode', RENDER_MODE_FLOW)}/{result['output_profile']}] "
+            f"n={result['size']}: {details}"
+        )
+
+    def _report_comparison(self, rows):
+        if not rows:
+            self.stdout.write('No matching results in the baseline')
+            return
+        
+        for row in rows:
+            scenario, render_mode, output_profile, workers, size = row['key']
+            line = (
+                f"{scenario} [{render_mode}/{output_profile}] n={size} {row['metric']}: "
+                f"{row['baseline']} -> {row['current']} ({row['change_pct']:+.1f}%)"
+            )
+            style = self.style.ERROR if row['regression'] and abs(row['change_pct']) >= 5 else self.style.SUCCESS
+            self.stdout.write(style(line))
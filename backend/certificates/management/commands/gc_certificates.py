@@ -0,0 +1,71 @@
+"""
+Django management command to delete certificate PDFs no record points to.
+Usage: python manage.py gc_certificates [--grace-hours=24] [--dry-run]
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from certificates.generator import CertificateService
+from certificates.models import Certificate
+from events.models import Event
+from certificates.storage import PARTIAL_SUFFIX, get_certificate_storage
+
+
+def _walk(storage, path):
+    """Yield the names of all files below a storage directory."""
+    directories, files = storage.listdir(path)
+    for filename in files:
+        yield f"{path}/{filename}"
+    for directory in directories:
+        yield from _walk(storage, f"{path}/{directory}")
+
+
+class Command(BaseCommand):
+    help = 'Delete rendered certificate PDFs that no Certificate record references'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace-hours',
+            type=float,
+            default=24,
+            help='Keep unreferenced files younger than this (they may belong to a running batch)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report the files that would be deleted',
+        )
+
+    def handle(self, *args, **options):
+        storage = get_certificate_storage()
+        prefix = CertificateService.name_prefix
+        cutoff = timezone.now() - timedelta(hours=options['grace_hours'])
+        
+        referenced = set(
+            Certificate.objects.exclude(pdf_file='').values_list('pdf_file', flat=True).iterator()
+        )
+        # Each event keeps its latest combined export; older timestamped
+        # exports and those of deleted events are collected like any orphan
+        referenced.update(
+            CertificateService.combined_name(event_id)
+            for event_id in Event.objects.values_list('id', flat=True).iterator()
+        )
+        
+        removed = 0
+        freed = 0
+        names = _walk(storage, prefix) if storage.exists(prefix) else []
+        for name in names:
+            # Partial files are left behind by writes that crashed
+            if not name.endswith(('.pdf', PARTIAL_SUFFIX)) or name in referenced:
+                continue
+            if storage.get_modified_time(name) > cutoff:
+                continue
+            
+            removed += 1
+            freed += storage.size(name)
+            if not options['dry_run']:
+                storage.delete(name)
+        
+        action = 'Would delete' if options['dry_run'] else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(f'{action} {removed} orphaned PDFs ({freed / 1024 / 1024:.1f} MB)'))
@@ -1,9 +1,15 @@
 """
 Django management command to generate certificates for an event.
-Usage: python manage.py generate_certificates --event_id=1
+Usage: python manage.py generate_certificates --event_id=1 [--workers=4]
+       python manage.py generate_certificates --event_id=1 --combined [--render-mode=flow]
 """
 from django.core.management.base import BaseCommand
-from certificates.generator import generate_certificates_for_event
+from certificates.generator import (
+    generate_certificates_for_event,
+    export_combined_certificates,
+    RENDER_MODES,
+    RENDER_MODE_OVERLAY,
+)
 
 
 class Command(BaseCommand):
@@ -16,10 +22,47 @@ class Command(BaseCommand):
             help='ID of the event to generate certificates for',
             required=True
         )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Number of processes used to render certificate PDFs',
+        )
+        parser.add_argument(
+            '--render-mode',
+            choices=RENDER_MODES,
+            default=RENDER_MODE_OVERLAY,
+            help='With --combined, lay out every page (flow) or stamp names onto one shared event page (overlay)',
+        )
+        parser.add_argument(
+            '--combined',
+            action='store_true',
+            help='Write all eligible certificates of the event into one multi-page PDF',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of certificates rendered and saved per batch',
+        )
 
     def handle(self, *args, **options):
         event_id = options['event_id']
-        success = generate_certificates_for_event(event_id)
+        
+        if options['combined']:
+            result = export_combined_certificates(event_id, render_mode=options['render_mode'])
+            if result is None:
+                self.stdout.write(self.style.ERROR('Failed to export certificates'))
+            else:
+                name, count = result
+                self.stdout.write(self.style.SUCCESS(f'Exported {count} certificates to {name}'))
+            return
+        
+        success = generate_certificates_for_event(
+            event_id,
+            workers=options['workers'],
+            batch_size=options['batch_size'],
+        )
         
         if success:
             self.stdout.write(
@@ -2,7 +2,8 @@
 Certificate models for CROSSCERT.
 """
 from django.db import models
-from events.models import EventRegistration
+from events.models import Event, EventRegistration
+from .storage import get_certificate_storage
 
 
 class Certificate(models.Model):
@@ -17,8 +18,55 @@ class Certificate(models.Model):
     certificate_number = models.CharField(max_length=50, unique=True)
     issue_date = models.DateField(auto_now_add=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
-    pdf_file = models.FileField(upload_to='certificates/', null=True, blank=True)
+    pdf_file = models.FileField(upload_to='certificates/', storage=get_certificate_storage, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
         return f"Certificate {self.certificate_number}"
+
+
+class CertificateJob(models.Model):
+    """Chunked certificate generation run for an event."""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='certificate_jobs')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    chunk_size = models.IntegerField(default=100)
+    send_emails = models.BooleanField(default=True)
+    total = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Certificate job {self.id} - {self.event.title}"
+
+
+class CertificateJobChunk(models.Model):
+    """Slice of a CertificateJob's registrations processed by one worker task."""
+    job = models.ForeignKey(CertificateJob, on_delete=models.CASCADE, related_name='chunks')
+    index = models.IntegerField()
+    registration_ids = models.JSONField(default=list)
+    status = models.CharField(max_length=20, choices=CertificateJob.STATUS_CHOICES, default='pending')
+    done = models.IntegerField(default=0)
+    failed = models.IntegerField(default=0)
+    errors = models.JSONField(default=list)
+    attempts = models.IntegerField(default=0)
+    queued_at = models.DateTimeField(null=True, blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['job', 'index']
+        unique_together = ['job', 'index']
+
+    def __str__(self):
+        return f"Chunk {self.index} of job {self.job_id}"
@@ -2,7 +2,8 @@
 Serializers for Certificates app.
 """
 from rest_framework import serializers
-from .models import Certificate
+from .jobs import DEFAULT_CHUNK_SIZE, MAX_CHUNK_SIZE, job_errors, job_progress
+from .models import Certificate, CertificateJob
 
 
 class CertificateSerializer(serializers.ModelSerializer):
@@ -10,3 +11,33 @@ class CertificateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Certificate
         fields = ['id', 'registration', 'certificate_number', 'issue_date', 'status', 'pdf_file']
+
+
+class CertificateJobSerializer(serializers.ModelSerializer):
+    """Serializer for CertificateJob with its progress."""
+    progress = serializers.SerializerMethodField()
+    errors = serializers.SerializerMethodField()
+
+    class Meta:
+        model = CertificateJob
+        fields = ['id', 'event', 'status', 'chunk_size', 'send_emails', 'created_at',
+                  'started_at', 'finished_at', 'progress', 'errors']
+
+    def get_progress(self, obj):
+        return job_progress(obj)
+
+    def get_errors(self, obj):
+        return job_errors(obj)
+
+
+class CertificateJobCreateSerializer(serializers.Serializer):
+    """Validate a request to start a certificate job."""
+    event = serializers.IntegerField()
+    chunk_size = serializers.IntegerField(min_value=1, max_value=MAX_CHUNK_SIZE, default=DEFAULT_CHUNK_SIZE)
+    send_emails = serializers.BooleanField(default=True)
+
+
+class CertificateJobRetrySerializer(serializers.Serializer):
+    """Validate a request to retry a certificate job."""
+    # Also rerun chunks that are still pending or running
+    force = serializers.BooleanField(default=False)
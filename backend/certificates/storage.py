@@ -0,0 +1,140 @@
+"""
+Storage for generated certificate PDFs.
+Goes through Django's storage API, so the backend is configured in STORAGES.
+"""
+import contextlib
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.files.base import ContentFile, File
+from django.core.files.storage import FileSystemStorage, storages
+
+CERTIFICATE_STORAGE_ALIAS = 'certificates'
+
+# Suffix of local files still being written; gc_certificates removes old ones
+PARTIAL_SUFFIX = '.part'
+
+
+def get_certificate_storage():
+    """Get the storage configured for certificate PDFs."""
+    return storages[CERTIFICATE_STORAGE_ALIAS]
+
+
+def _local_path(storage, name):
+    """Filesystem path of a storage name, or None for storages not on local disk."""
+    if isinstance(storage, FileSystemStorage):
+        return storage.path(name)
+    return None
+
+
+def _is_complete_pdf(path):
+    """Whether a local file ends like a finished PDF, with a %%EOF marker."""
+    try:
+        with open(path, 'rb') as pdf:
+            pdf.seek(0, os.SEEK_END)
+            pdf.seek(max(0, pdf.tell() - 1024))
+            return b'%%EOF' in pdf.read()
+    except FileNotFoundError:
+        return False
+
+
+def is_stored(storage, name):
+    """
+    Whether a complete PDF is stored under a name.
+    
+    Local files are also checked for the PDF end marker, so a file cut short
+    by a crash is rendered again instead of being served from the cache.
+    Remote storages upload whole objects, so there existence is enough.
+    """
+    path = _local_path(storage, name)
+    if path is None:
+        return storage.exists(name)
+    return _is_complete_pdf(path)
+
+
+def _write_local(storage, path, content):
+    """Write a file next to its final path, then rename it into place."""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, partial_path = tempfile.mkstemp(dir=directory, prefix='.', suffix=PARTIAL_SUFFIX)
+    try:
+        with os.fdopen(fd, 'wb') as partial:
+            if isinstance(content, bytes):
+                partial.write(content)
+            else:
+                shutil.copyfileobj(content, partial)
+        mode = getattr(storage, 'file_permissions_mode', None)
+        if mode is not None:
+            os.chmod(partial_path, mode)
+        os.replace(partial_path, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(partial_path)
+        raise
+
+
+def write_pdf(storage, name, content):
+    """
+    Store a PDF under exactly the given name, replacing any file there.
+    
+    Local files are written under a temporary name and renamed into place,
+    so a crash never leaves a partial PDF under the final name.
+    
+    Args:
+        storage: Django storage
+        name: Storage name of the PDF
+        content: PDF bytes or a readable binary file
+        
+    Returns:
+        Name the PDF is stored under
+    """
+    path = _local_path(storage, name)
+    if path is not None:
+        _write_local(storage, path, content)
+        return name
+    
+    if storage.exists(name):
+        storage.delete(name)
+    return storage.save(name, ContentFile(content) if isinstance(content, bytes) else File(content))
+
+
+def save_pdf(storage, name, content):
+    """
+    Save a PDF unless a complete file with the same name is already stored.
+    
+    Args:
+        storage: Django storage
+        name: Storage name of the PDF
+        content: PDF bytes or a readable binary file
+        
+    Returns:
+        Name the PDF is stored under
+    """
+    if is_stored(storage, name):
+        return name
+    return write_pdf(storage, name, content)
+
+
+class CertificateUploader:
+    """Save rendered PDFs on background threads so rendering never waits on storage."""
+    
+    def __init__(self, storage, max_workers=4):
+        """
+        Initialize the uploader.
+        
+        Args:
+            storage: Django storage to save into
+            max_workers: Number of upload threads
+        """
+        self.storage = storage
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='certificate-upload')
+    
+    def submit(self, name, data):
+        """Queue a PDF for saving and return a Future resolving to its stored name."""
+        return self._executor.submit(save_pdf, self.storage, name, data)
+    
+    def shutdown(self):
+        """Wait for queued uploads and stop the threads."""
+        self._executor.shutdown(wait=True)
@@ -2,12 +2,16 @@
 Celery tasks for async certificate generation and email delivery.
 Optional: Use for background processing.
 """
-from celery import shared_task
-from django.core.mail import EmailMessage
-from .generator import CertificateService
-from events.models import Event, EventRegistration
-from .models import Certificate
+from celery import chord, group, shared_task
+from django.conf import settings
+from django.db import transaction
+from django.core.mail import EmailMessage, get_connection
+from crosscert.metrics import CERTIFICATE_EMAILS, phase, timed
+from .jobs import DEFAULT_CHUNK_SIZE, create_job, finish_job, process_chunk, retryable_chunk_ids, start_job
+from events.models import Event
+from .models import Certificate, CertificateJob, CertificateJobChunk
 import os
+import time
 
 
 @shared_task
@@ -15,55 +19,116 @@ def generate_and_send_certificates(event_id):
     """
     Celery task to generate and send certificates for an event.
     
+    Starts a chunked CertificateJob; poll the job for progress.
+    
     Args:
         event_id: ID of the event
     """
     try:
         event = Event.objects.get(id=event_id)
-        service = CertificateService()
-        
-        # Get eligible registrations
-        eligible_registrations = EventRegistration.objects.filter(
-            event=event,
-            check_in__isnull=False,
-            evaluation__isnull=False,
-        ).exclude(certificate__isnull=False)
+    except Event.DoesNotExist:
+        return {'status': 'error', 'message': f'Event with ID {event_id} not found'}
+    
+    job = start_certificate_job(event)
+    return {'status': 'started', 'job': job.id, 'count': job.total}
+
+
+def start_certificate_job(event, chunk_size=DEFAULT_CHUNK_SIZE, send_emails=True):
+    """
+    Create a certificate job for an event and fan its chunks out to workers.
+    
+    Args:
+        event: Event instance
+        chunk_size: Number of registrations per chunk task
+        send_emails: Email each certificate once it is generated
         
-        for registration in eligible_registrations:
-            # Generate certificate
-            pdf_path = service.generate_for_participant(registration, event)
-            
-            # Create certificate record
-            certificate = Certificate.objects.create(
-                registration=registration,
-                certificate_number=f"CERT-{event.id}-{registration.id}",
-                pdf_file=pdf_path,
-                status='generated',
-            )
-            
-            # Send email with certificate
-            send_certificate_email.delay(certificate.id)
+    Returns:
+        CertificateJob instance
+    """
+    job = create_job(event, chunk_size=chunk_size, send_emails=send_emails)
+    _dispatch_chunks(job, list(job.chunks.values_list('id', flat=True)))
+    return job
+
+
+def retry_certificate_job(job, force=False):
+    """
+    Run a job's failed and stale chunks again; finished chunks are left alone.
+    
+    Args:
+        job: CertificateJob instance
+        force: Also rerun chunks that are still pending or running
         
-        return {'status': 'success', 'count': eligible_registrations.count()}
-    except Exception as e:
-        return {'status': 'error', 'message': str(e)}
+    Returns:
+        Number of chunks queued
+    """
+    chunk_ids = retryable_chunk_ids(job, force=force)
+    # A job left running with nothing to rerun lost its chord; finish it now
+    if chunk_ids or job.status in ('pending', 'running'):
+        _dispatch_chunks(job, chunk_ids)
+    return len(chunk_ids)
+
+
+def _dispatch_chunks(job, chunk_ids):
+    """Run chunk tasks in parallel, then finish the job when all are done."""
+    start_job(job, chunk_ids)
+    if not chunk_ids:
+        finish_job(job)
+        return
+    
+    header = group(process_certificate_chunk.s(chunk_id) for chunk_id in chunk_ids)
+    # Workers must see the job and chunk rows before they start
+    transaction.on_commit(lambda: chord(header)(finish_certificate_job.si(job.id)))
 
 
 @shared_task
-def send_certificate_email(certificate_id):
+def process_certificate_chunk(chunk_id):
     """
-    Celery task to send certificate via email.
+    Celery task to generate one chunk of a certificate job.
+    
+    Never raises, so a failed chunk does not stop the job's chord.
     
     Args:
-        certificate_id: ID of the certificate
+        chunk_id: ID of the CertificateJobChunk
     """
-    try:
-        from .models import Certificate
-        certificate = Certificate.objects.get(id=certificate_id)
-        registration = certificate.registration
+    chunk = CertificateJobChunk.objects.select_related('job__event__organizer').get(id=chunk_id)
+    certificate_ids = process_chunk(chunk)
+    
+    if chunk.job.send_emails:
+        # Send emails in batches, one SMTP session per batch
+        batch_size = settings.CERTIFICATE_EMAIL_BATCH_SIZE
+        for start in range(0, len(certificate_ids), batch_size):
+            send_certificate_emails.delay(certificate_ids[start:start + batch_size])
+    
+    return {'chunk': chunk.id, 'status': chunk.status, 'done': chunk.done, 'failed': chunk.failed}
+
+
+@shared_task
+def finish_certificate_job(job_id):
+    """
+    Celery task run after every chunk of a job has finished.
+    
+    Args:
+        job_id: ID of the CertificateJob
+    """
+    job = finish_job(CertificateJob.objects.get(id=job_id))
+    return {'job': job.id, 'status': job.status}
+
+
+def build_certificate_email(certificate, connection=None):
+    """
+    Build the email message for a certificate.
+    
+    Args:
+        certificate: Certificate instance with registration and event loaded
+        connection: Optional email backend connection to send through
         
-        subject = f"Your Certificate - {registration.event.title}"
-        message = f"""
+    Returns:
+        EmailMessage instance
+    """
+    registration = certificate.registration
+    
+    subject = f"Your Certificate - {registration.event.title}"
+    message = f"""
         Dear {registration.first_name},
         
         Congratulations! Your certificate for {registration.event.title} is ready.
@@ -76,23 +141,94 @@ def send_certificate_email(certificate_id):
         Best regards,
         CROSSCERT Team
         """
-        
-        email = EmailMessage(
-            subject=subject,
-            body=message,
-            from_email=os.getenv('EMAIL_FROM', 'noreply@crosscert.com'),
-            to=[registration.email],
-        )
-        
-        # Attach certificate PDF
-        if certificate.pdf_file:
-            email.attach_file(certificate.pdf_file)
-        
-        email.send()
+    
+    email = EmailMessage(
+        subject=subject,
+        body=message,
+        from_email=os.getenv('EMAIL_FROM', 'noreply@crosscert.com'),
+        to=[registration.email],
+        connection=connection,
+    )
+    
+    # Attach certificate PDF
+    if certificate.pdf_file:
+        with certificate.pdf_file.open('rb') as pdf:
+            email.attach(f"{certificate.certificate_number}.pdf", pdf.read(), 'application/pdf')
+    
+    return email
+
+
+@shared_task
+@timed('send_certificate_email')
+def send_certificate_email(certificate_id):
+    """
+    Celery task to send certificate via email.
+    
+    Args:
+        certificate_id: ID of the certificate
+    """
+    try:
+        with phase('send_certificate_email', 'query'):
+            certificate = Certificate.objects.select_related('registration__event').get(id=certificate_id)
+        with phase('send_certificate_email', 'build'):
+            email = build_certificate_email(certificate)
+        with phase('send_certificate_email', 'send'):
+            email.send()
         
         certificate.status = 'sent'
-        certificate.save()
+        with phase('send_certificate_email', 'write'):
+            certificate.save(update_fields=['status'])
         
-        return {'status': 'success', 'email': registration.email}
+        CERTIFICATE_EMAILS.inc(outcome='sent')
+        return {'status': 'success', 'email': certificate.registration.email}
     except Exception as e:
+        CERTIFICATE_EMAILS.inc(outcome='failed')
         return {'status': 'error', 'message': str(e)}
+
+
+@shared_task
+@timed('send_certificate_emails')
+def send_certificate_emails(certificate_ids, rate_limit=None):
+    """
+    Celery task to send a batch of certificates over one email connection.
+    
+    Args:
+        certificate_ids: IDs of the certificates to send
+        rate_limit: Maximum messages per second (defaults to
+            CERTIFICATE_EMAIL_RATE_LIMIT; 0 or None means unlimited)
+    """
+    if rate_limit is None:
+        rate_limit = settings.CERTIFICATE_EMAIL_RATE_LIMIT
+    interval = 1.0 / rate_limit if rate_limit else 0
+    
+    with phase('send_certificate_emails', 'query'):
+        certificates = list(
+            Certificate.objects.select_related('registration__event').filter(id__in=certificate_ids)
+        )
+    
+    sent = []
+    errors = []
+    with get_connection() as connection:
+        for certificate in certificates:
+            started = time.monotonic()
+            try:
+                with phase('send_certificate_emails', 'build'):
+                    email = build_certificate_email(certificate, connection=connection)
+                with phase('send_certificate_emails', 'send'):
+                    email.send()
+            except Exception as e:
+                CERTIFICATE_EMAILS.inc(outcome='failed')
+                errors.append({'certificate_id': certificate.id, 'message': str(e)})
+                continue
+            
+            CERTIFICATE_EMAILS.inc(outcome='sent')
+            certificate.status = 'sent'
+            sent.append(certificate)
+            
+            if interval:
+                time.sleep(max(0, interval - (time.monotonic() - started)))
+    
+    with phase('send_certificate_emails', 'write'):
+        Certificate.objects.bulk_update(sent, ['status'])
+    
+    return {'status': 'success' if not errors else 'partial', 'sent': len(sent), 'errors': errors}
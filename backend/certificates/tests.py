@@ -0,0 +1,832 @@
+"""
+Tests for Certificates app.
+"""
+import contextlib
+import io
+import os
+import tempfile
+import threading
+import time
+import zipfile
+from datetime import timedelta
+from unittest import mock
+
+from celery import current_app
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, InMemoryStorage
+from django.core.management import call_command
+from django.http import StreamingHttpResponse
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from reportlab import rl_config
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen.canvas import Canvas
+from reportlab.platypus import Paragraph, Table
+from rest_framework.test import APIClient
+
+from crosscert.factories import make_eligible_registrations, make_event
+from . import generator, jobs, storage, tasks
+from .generator import (
+    OUTPUT_PROFILE_COMPACT,
+    OUTPUT_PROFILE_STANDARD,
+    RENDER_MODE_FLOW,
+    RENDER_MODE_OVERLAY,
+    RENDER_MODES,
+    CertificateGenerator,
+    CertificateService,
+)
+from .management.commands.gc_certificates import _walk
+from .models import Certificate, CertificateJob, CertificateJobChunk
+from .numbering import build_certificate_number, check_verification_code, verification_code
+from .storage import get_certificate_storage, is_stored, save_pdf
+from .textfit import SIZE_STEP, fit_font_size
+
+TEST_STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    'certificates': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+}
+
+
+def failing_for(name):
+    """Patch certificate rendering to fail for one participant name."""
+    render = CertificateGenerator.generate_certificate
+
+    def generate_certificate(self, participant_data, event_data, output_path=None):
+        if participant_data['name'] == name:
+            raise ValueError('template error')
+        return render(self, participant_data, event_data, output_path)
+
+    return mock.patch.object(CertificateGenerator, 'generate_certificate', generate_certificate)
+
+
+PARTICIPANT_DATA = {'name': 'Ada Lovelace', 'certificate_number': 'CERT-1-1'}
+EVENT_DATA = {
+    'title': 'Workshop',
+    'date': 'March 03, 2026',
+    'duration': '09:00 AM - 05:00 PM',
+    'speakers': 'N/A',
+    'organizer': 'organizer',
+}
+
+
+class OutputProfileTests(SimpleTestCase):
+    """Compact output switches ReportLab's global stream encoding without blocking other renders."""
+
+    def test_compact_uses_raw_streams_and_restores_setting(self):
+        compact = CertificateGenerator(output_profile=OUTPUT_PROFILE_COMPACT)
+        standard = CertificateGenerator(output_profile=OUTPUT_PROFILE_STANDARD)
+
+        compact_pdf = compact.generate_certificate(PARTICIPANT_DATA, EVENT_DATA).getvalue()
+        standard_pdf = standard.generate_certificate(PARTICIPANT_DATA, EVENT_DATA).getvalue()
+
+        self.assertNotIn(b'ASCII85Decode', compact_pdf)
+        self.assertIn(b'ASCII85Decode', standard_pdf)
+        self.assertLess(len(compact_pdf), len(standard_pdf))
+        self.assertEqual(rl_config.useA85, 1)
+
+    def test_concurrent_renders_keep_their_own_encoding(self):
+        compact = CertificateGenerator(output_profile=OUTPUT_PROFILE_COMPACT)
+        standard = CertificateGenerator(output_profile=OUTPUT_PROFILE_STANDARD)
+        rendered = []
+        render = threading.Thread(
+            target=lambda: rendered.append(standard.generate_certificate(PARTICIPANT_DATA, EVENT_DATA).getvalue())
+        )
+
+        # A compact PDF is being written (e.g. a long combined export)
+        with compact.stream_encoding(), compact.stream_encoding():
+            render.start()
+            render.join(timeout=30)
+            self.assertFalse(render.is_alive())
+            compact_pdf = compact.generate_certificate(PARTICIPANT_DATA, EVENT_DATA).getvalue()
+            self.assertEqual(rl_config.useA85, 1)
+
+        self.assertIn(b'ASCII85Decode', rendered[0])
+        self.assertNotIn(b'ASCII85Decode', compact_pdf)
+        self.assertIn(b'ASCII85Decode', standard.generate_certificate(PARTICIPANT_DATA, EVENT_DATA).getvalue())
+
+
+class TextFitTests(SimpleTestCase):
+    """Names and titles shrink to the largest size that fits one line."""
+
+    font = 'Helvetica-Bold'
+    width = 300
+
+    def test_short_text_keeps_the_preferred_size(self):
+        self.assertEqual(fit_font_size('ADA LOVELACE', self.font, 24, 12, self.width), 24)
+
+    def test_long_name_shrinks_to_fit(self):
+        name = 'AUGUSTA ADA KING, COUNTESS OF LOVELACE'
+
+        size = fit_font_size(name, self.font, 24, 12, self.width)
+
+        self.assertLess(size, 24)
+        self.assertLessEqual(stringWidth(name, self.font, size), self.width)
+        self.assertGreater(stringWidth(name, self.font, size + SIZE_STEP), self.width)
+
+    def test_size_never_drops_below_the_minimum(self):
+        self.assertEqual(fit_font_size('X' * 200, self.font, 24, 12, self.width), 12)
+
+    def test_batch_sizes_match_single_sizes(self):
+        certificate_generator = CertificateGenerator()
+        participants = [{'name': 'Ada Lovelace'}, {'name': 'Augusta Ada King, Countess of Lovelace ' * 2}]
+
+        self.assertEqual(
+            certificate_generator.fit_name_sizes(participants),
+            [certificate_generator.fit_name_size(p['name'].upper()) for p in participants],
+        )
+
+
+class StyleCacheTests(SimpleTestCase):
+    """Paragraph styles are built with the generator, not per certificate."""
+
+    def test_styles_are_built_once(self):
+        with mock.patch.object(
+            CertificateGenerator, '_build_styles', autospec=True, side_effect=CertificateGenerator._build_styles
+        ) as build_styles:
+            generator = CertificateGenerator()
+            for i in range(3):
+                generator.generate_certificate({**PARTICIPANT_DATA, 'certificate_number': f'CERT-1-{i}'}, EVENT_DATA)
+            generator.generate_combined([PARTICIPANT_DATA] * 2, EVENT_DATA, io.BytesIO())
+
+        build_styles.assert_called_once_with(generator)
+
+    def test_cached_styles_render_the_same_pdf(self):
+        generator = CertificateGenerator(output_profile=OUTPUT_PROFILE_COMPACT)
+        cached = generator.generate_certificate(PARTICIPANT_DATA, EVENT_DATA).getvalue()
+
+        generator.styles = generator._build_styles()
+        rebuilt = generator.generate_certificate(PARTICIPANT_DATA, EVENT_DATA).getvalue()
+
+        self.assertEqual(cached, rebuilt)
+
+
+class OverlayLayoutTests(SimpleTestCase):
+    """Overlay pages put every flowable exactly where the flow layout does."""
+
+    PARTICIPANTS = [
+        {'name': 'Ada Lovelace', 'certificate_number': 'CERT-1-1'},
+        {'name': 'Grace Brewster Murray Hopper-Van Rossum Lovelace', 'certificate_number': 'CERT-1-2'},
+        # Wraps even at the smallest size, so the page falls back to a full layout
+        {'name': ' '.join(['Wolfeschlegelsteinhausenbergerdorff'] * 4), 'certificate_number': 'CERT-1-3'},
+        {'name': 'Alan Turing', 'certificate_number': 'CERT-1-4', 'verification_code': 'ABCD-EFGH'},
+    ]
+
+    def drawn_pages(self, render_mode):
+        """Render a combined PDF, recording each page's (slot, text, x, y) draws."""
+        output = io.BytesIO()
+        pages = {}
+
+        def recording(draw):
+            def record(flowable):
+                if flowable.canv._filename is output:
+                    x, y = flowable.canv.absolutePosition(0, 0)
+                    pages.setdefault(flowable.canv.getPageNumber(), set()).add((
+                        getattr(flowable, 'certificate_slot', None),
+                        getattr(flowable, 'text', type(flowable).__name__),
+                        round(x, 2),
+                        round(y, 2),
+                    ))
+                return draw(flowable)
+            return record
+
+        form_pages = []
+        do_form = Canvas.doForm
+
+        def record_form(canv, name):
+            form_pages.append(canv.getPageNumber())
+            return do_form(canv, name)
+
+        with mock.patch.object(Paragraph, 'draw', recording(Paragraph.draw)), \
+                mock.patch.object(Table, 'draw', recording(Table.draw)), \
+                mock.patch.object(Canvas, 'doForm', record_form):
+            CertificateGenerator(render_mode=render_mode).generate_combined(self.PARTICIPANTS, EVENT_DATA, output)
+        return pages, form_pages
+
+    def test_overlay_matches_flow_layout(self):
+        flow, _ = self.drawn_pages(RENDER_MODE_FLOW)
+        overlay, form_pages = self.drawn_pages(RENDER_MODE_OVERLAY)
+
+        # The static page is drawn once, into the form the other overlay pages show
+        form = {draw for draw in overlay[1] if draw[0] is None}
+        self.assertEqual(form_pages, [1, 2, 4])
+        self.assertEqual(len(flow), len(self.PARTICIPANTS))
+        for page, drawn in flow.items():
+            with self.subTest(page=page):
+                shown = form | overlay[page] if page in form_pages else overlay[page]
+                self.assertEqual(shown, drawn)
+
+    def test_overlay_is_faster_for_multi_page_output(self):
+        participants = [
+            {'name': f'Participant {i}', 'certificate_number': f'CERT-1-{i}'} for i in range(100)
+        ]
+        seconds = {}
+        for render_mode in RENDER_MODES:
+            generator = CertificateGenerator(render_mode=render_mode)
+            generator.generate_combined(participants[:1], EVENT_DATA, io.BytesIO())
+            started = time.perf_counter()
+            generator.generate_combined(participants, EVENT_DATA, io.BytesIO())
+            seconds[render_mode] = time.perf_counter() - started
+
+        self.assertLess(seconds[RENDER_MODE_OVERLAY] * 2, seconds[RENDER_MODE_FLOW], seconds)
+
+
+class CertificateTestCase(TestCase):
+    """Base class giving every test an empty certificate storage."""
+
+    def setUp(self):
+        # Per test, since rendered PDFs are cached by content in the storage;
+        # Certificate.pdf_file keeps its storage instance but follows MEDIA_ROOT
+        media_root = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(
+            STORAGES=TEST_STORAGES, MEDIA_ROOT=media_root, CERTIFICATE_UPLOAD_WORKERS=0
+        ))
+
+
+class EagerCeleryTestCase(CertificateTestCase):
+    """Base class running Celery tasks in eager mode, without a broker."""
+
+    def setUp(self):
+        super().setUp()
+        eager = {'task_always_eager': True, 'task_eager_propagates': True}
+        previous = {key: current_app.conf[key] for key in eager}
+        current_app.conf.update(eager)
+        self.addCleanup(current_app.conf.update, previous)
+
+
+class CertificateJobTests(EagerCeleryTestCase):
+    """Chunked certificate jobs fan out to chunk tasks and finish through a chord."""
+
+    def setUp(self):
+        super().setUp()
+        self.organizer = User.objects.create(username='organizer', is_staff=True, is_superuser=True)
+        self.event = make_event(self.organizer)
+        self.registrations = make_eligible_registrations(self.event, 7)
+        self.client = APIClient()
+        self.client.force_authenticate(self.organizer)
+
+    def start_job(self, **data):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/certificate-jobs/', {'event': self.event.id, **data}, format='json')
+        self.assertEqual(response.status_code, 202)
+        return CertificateJob.objects.get(id=response.data['id'])
+
+    def retry(self, job, **data):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(f'/api/certificate-jobs/{job.id}/retry/', data, format='json')
+
+    def progress(self, job):
+        return self.client.get(f'/api/certificate-jobs/{job.id}/').data['progress']
+
+    def test_chunking(self):
+        job = self.start_job(chunk_size=3)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'completed')
+        self.assertEqual(
+            [len(chunk.registration_ids) for chunk in job.chunks.all()],
+            [3, 3, 1],
+        )
+        self.assertEqual(Certificate.objects.count(), 7)
+        self.assertEqual(len(mail.outbox), 7)
+        progress = self.progress(job)
+        self.assertEqual((progress['done'], progress['failed'], progress['remaining']), (7, 0, 0))
+
+    def test_partial_failure_then_retry(self):
+        with failing_for('P4 X'):
+            job = self.start_job(chunk_size=3, send_emails=False)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertEqual(Certificate.objects.count(), 6)
+        self.assertEqual(
+            list(job.chunks.values_list('status', flat=True)),
+            ['completed', 'failed', 'completed'],
+        )
+        response = self.client.get(f'/api/certificate-jobs/{job.id}/')
+        self.assertEqual(response.data['progress']['failed'], 1)
+        self.assertEqual(response.data['errors'][0]['registration_id'], self.registrations[4].id)
+        self.assertEqual(response.data['errors'][0]['chunk'], 1)
+
+        response = self.retry(job)
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['retried_chunks'], 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'completed')
+        self.assertEqual(Certificate.objects.count(), 7)
+        self.assertEqual(list(job.chunks.values_list('attempts', flat=True)), [1, 2, 1])
+
+    def test_retry_refuses_running_job(self):
+        job = self.start_job(chunk_size=3, send_emails=False)
+        CertificateJob.objects.filter(id=job.id).update(status='running')
+        CertificateJobChunk.objects.filter(job=job, index=2).update(status='running', started_at=timezone.now())
+
+        response = self.retry(job)
+
+        self.assertEqual(response.status_code, 409)
+
+    def test_retry_stale_running_chunk(self):
+        job = self.start_job(chunk_size=3, send_emails=False)
+        # The worker of the last chunk was killed before it finished
+        Certificate.objects.filter(registration=self.registrations[6]).delete()
+        CertificateJob.objects.filter(id=job.id).update(status='running', finished_at=None)
+        CertificateJobChunk.objects.filter(job=job, index=2).update(
+            status='running', started_at=timezone.now() - timedelta(hours=1)
+        )
+
+        with override_settings(CERTIFICATE_JOB_CHUNK_TIMEOUT=600):
+            response = self.retry(job)
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['retried_chunks'], 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'completed')
+        self.assertEqual(Certificate.objects.count(), 7)
+
+    def test_force_retry_running_chunk(self):
+        job = self.start_job(chunk_size=3, send_emails=False)
+        CertificateJob.objects.filter(id=job.id).update(status='running', finished_at=None)
+        CertificateJobChunk.objects.filter(job=job, index=0).update(status='running', started_at=timezone.now())
+
+        response = self.retry(job, force=True)
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['retried_chunks'], 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'completed')
+
+    def test_concurrent_run_of_a_chunk_does_not_conflict(self):
+        job = self.start_job(chunk_size=3, send_emails=False)
+        chunk = CertificateJobChunk.objects.select_related('job__event__organizer').get(job=job, index=0)
+        Certificate.objects.filter(registration__in=self.registrations[:3]).delete()
+        render_batch = CertificateService.render_batch
+
+        def other_run_finishes_first(service, event, registrations):
+            # The original run stores its certificate while this one renders
+            Certificate.objects.create(
+                registration=registrations[0],
+                certificate_number=build_certificate_number(event.id, registrations[0].id),
+                status='generated',
+            )
+            return render_batch(service, event, registrations)
+
+        with mock.patch.object(CertificateService, 'render_batch', other_run_finishes_first):
+            created = jobs.process_chunk(chunk)
+
+        self.assertEqual(len(created), 2)
+        self.assertNotIn(self.registrations[0].certificate.id, created)
+        self.assertEqual((chunk.status, chunk.done, chunk.failed), ('completed', 3, 0))
+        self.assertEqual(Certificate.objects.count(), 7)
+
+    def test_finishing_twice_keeps_the_first_result(self):
+        job = self.start_job(chunk_size=3, send_emails=False)
+        job.refresh_from_db()
+        finished_at = job.finished_at
+
+        tasks.finish_certificate_job(job.id)
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.finished_at), ('completed', finished_at))
+
+    def test_finish_waits_for_active_chunks(self):
+        job = self.start_job(chunk_size=3, send_emails=False)
+        CertificateJob.objects.filter(id=job.id).update(status='running', finished_at=None)
+        # A forced retry of chunk 0 is still running when the first chord ends
+        CertificateJobChunk.objects.filter(job=job, index=0).update(status='running', started_at=timezone.now())
+
+        tasks.finish_certificate_job(job.id)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'running')
+
+    def test_list_query_count_does_not_grow_with_jobs(self):
+        with failing_for('P0 X'):
+            self.start_job(chunk_size=2, send_emails=False)
+
+        with self.assertNumQueries(3):
+            self.client.get('/api/certificate-jobs/')
+
+        for _ in range(3):
+            self.start_job(chunk_size=2, send_emails=False)
+
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/certificate-jobs/')
+        self.assertEqual(response.data['count'], 4)
+        failed = [job for job in response.data['results'] if job['status'] == 'failed']
+        self.assertEqual(len(failed), 1)
+        self.assertEqual(failed[0]['progress']['failed_chunks'], 1)
+
+
+class CombinedExportTests(CertificateTestCase):
+    """Combined exports never accumulate in certificate storage."""
+
+    def setUp(self):
+        super().setUp()
+        self.organizer = User.objects.create(username='organizer', is_staff=True, is_superuser=True)
+        self.event = make_event(self.organizer)
+        make_eligible_registrations(self.event, 3)
+        self.storage = get_certificate_storage()
+
+    def stored_names(self):
+        if not self.storage.exists('certificates'):
+            return []
+        return sorted(_walk(self.storage, 'certificates'))
+
+    def test_api_export_streams_without_storing(self):
+        client = APIClient()
+        client.force_authenticate(self.organizer)
+
+        response = client.post(f'/api/events/{self.event.id}/export-certificates/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Certificate-Count'], '3')
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+        response.close()
+        self.assertEqual(self.stored_names(), [])
+
+    def test_command_export_replaces_previous_export(self):
+        for _ in range(2):
+            call_command('generate_certificates', event_id=self.event.id, combined=True, stdout=io.StringIO())
+
+        self.assertEqual(self.stored_names(), [CertificateService.combined_name(self.event.id)])
+
+    def test_gc_collects_stale_exports(self):
+        call_command('generate_certificates', event_id=self.event.id, combined=True, stdout=io.StringIO())
+        current = CertificateService.combined_name(self.event.id)
+        stale = [
+            self.storage.save('certificates/event_1_20250101000000.pdf', ContentFile(b'%PDF-1.4')),
+            self.storage.save(CertificateService.combined_name(self.event.id + 1), ContentFile(b'%PDF-1.4')),
+            # Left behind by a write that crashed
+            self.storage.save('certificates/ab/.cert.part', ContentFile(b'%PDF-1.4')),
+        ]
+        old = time.time() - 2 * 24 * 3600
+        for name in [current] + stale:
+            os.utime(self.storage.path(name), (old, old))
+
+        call_command('gc_certificates', stdout=io.StringIO())
+
+        self.assertEqual(self.stored_names(), [current])
+
+
+class ArchiveTests(CertificateTestCase):
+    """ZIP archives stream stored certificates and render missing ones."""
+
+    def setUp(self):
+        super().setUp()
+        self.organizer = User.objects.create(username='organizer', is_staff=True, is_superuser=True)
+        self.event = make_event(self.organizer)
+        make_eligible_registrations(self.event, 3)
+        with contextlib.redirect_stdout(io.StringIO()):
+            generator.generate_certificates_for_event(self.event.id)
+        self.certificates = list(Certificate.objects.order_by('certificate_number'))
+        self.client = APIClient()
+        self.client.force_authenticate(self.organizer)
+
+    def download(self):
+        response = self.client.get(f'/api/events/{self.event.id}/certificates.zip/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response, StreamingHttpResponse)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        return zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+
+    def test_entries_are_the_stored_pdfs(self):
+        archive = self.download()
+
+        self.assertEqual(
+            archive.namelist(),
+            [f'{certificate.certificate_number}.pdf' for certificate in self.certificates],
+        )
+        self.assertIsNone(archive.testzip())
+        for certificate in self.certificates:
+            with certificate.pdf_file.open('rb') as pdf:
+                self.assertEqual(archive.read(f'{certificate.certificate_number}.pdf'), pdf.read())
+
+    def test_missing_pdf_is_rendered(self):
+        missing = self.certificates[1]
+        missing.pdf_file.storage.delete(missing.pdf_file.name)
+
+        archive = self.download()
+
+        self.assertEqual(len(archive.namelist()), 3)
+        self.assertTrue(archive.read(f'{missing.certificate_number}.pdf').startswith(b'%PDF'))
+        self.assertFalse(is_stored(missing.pdf_file.storage, missing.pdf_file.name))
+
+
+@override_settings(CERTIFICATE_SIGNING_KEY='test-signing-key')
+class VerificationTests(TestCase):
+    """Certificates are verified by code without the database, or by lookup."""
+
+    def setUp(self):
+        organizer = User.objects.create(username='organizer')
+        self.event = make_event(organizer)
+        registration = make_eligible_registrations(self.event, 1)[0]
+        self.number = build_certificate_number(self.event.id, registration.id)
+        Certificate.objects.create(registration=registration, certificate_number=self.number, status='generated')
+        self.client = APIClient()
+
+    def verify(self, number, **params):
+        return self.client.get(f'/api/certificates/verify/{number}/', params)
+
+    def test_code_round_trip(self):
+        code = verification_code(self.number)
+
+        self.assertEqual(len(code), 10)
+        self.assertTrue(check_verification_code(self.number, code))
+        self.assertTrue(check_verification_code(self.number, f' {code.lower()} '))
+        self.assertFalse(check_verification_code(self.number, 'A' * 10))
+        self.assertFalse(check_verification_code(build_certificate_number(self.event.id, 999), code))
+
+    def test_code_depends_on_signing_key(self):
+        code = verification_code(self.number)
+
+        with override_settings(CERTIFICATE_SIGNING_KEY='other-key'):
+            self.assertNotEqual(verification_code(self.number), code)
+
+    def test_valid_code_needs_no_query(self):
+        with self.assertNumQueries(0):
+            response = self.verify(self.number, code=verification_code(self.number))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['valid'])
+        self.assertIn('max-age', response['Cache-Control'])
+
+    def test_wrong_code(self):
+        response = self.verify(self.number, code='A' * 10)
+
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.data['valid'])
+        self.assertFalse(response.has_header('Cache-Control'))
+
+    def test_code_for_another_number(self):
+        other = build_certificate_number(self.event.id, 999)
+
+        response = self.verify(other, code=verification_code(self.number))
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_lookup_by_number(self):
+        response = self.verify(self.number)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['participant_name'], 'P0 X')
+        self.assertEqual(response.data['event_title'], 'Workshop')
+
+    def test_lookup_of_unknown_number(self):
+        response = self.verify(build_certificate_number(self.event.id, 999))
+
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.data['valid'])
+
+
+class SlowStorage(InMemoryStorage):
+    """In-memory storage that takes a fixed time per saved file, like a remote bucket."""
+
+    delay = 0.1
+
+    def _save(self, name, content):
+        time.sleep(self.delay)
+        return super()._save(name, content)
+
+
+class StorageTests(CertificateTestCase):
+    """PDF writes never leave partial files that look cached, and never block rendering."""
+
+    def setUp(self):
+        super().setUp()
+        self.storage = FileSystemStorage(location=self.enterContext(tempfile.TemporaryDirectory()))
+
+    def test_crash_during_write_leaves_no_file(self):
+        class Interrupted(Exception):
+            pass
+
+        class BrokenFile(io.BytesIO):
+            def read(self, *args):
+                raise Interrupted
+
+        with self.assertRaises(Interrupted):
+            save_pdf(self.storage, 'certificates/ab/cert.pdf', BrokenFile())
+
+        self.assertFalse(is_stored(self.storage, 'certificates/ab/cert.pdf'))
+        self.assertEqual(self.storage.listdir('certificates/ab'), ([], []))
+
+    def test_truncated_file_is_not_a_cache_hit(self):
+        pdf = CertificateGenerator().generate_certificate(PARTICIPANT_DATA, EVENT_DATA).getvalue()
+        self.storage.save('certificates/ab/cert.pdf', ContentFile(pdf[:len(pdf) // 2]))
+
+        self.assertFalse(is_stored(self.storage, 'certificates/ab/cert.pdf'))
+        save_pdf(self.storage, 'certificates/ab/cert.pdf', pdf)
+
+        self.assertTrue(is_stored(self.storage, 'certificates/ab/cert.pdf'))
+        with self.storage.open('certificates/ab/cert.pdf') as stored:
+            self.assertEqual(stored.read(), pdf)
+
+    def test_slow_storage_does_not_slow_rendering(self):
+        organizer = User.objects.create(username='organizer')
+        event = make_event(organizer)
+        registrations = make_eligible_registrations(event, 8)
+        storage = SlowStorage()
+        service = CertificateService(storage=storage, upload_workers=4)
+        self.addCleanup(service.close)
+
+        started = time.perf_counter()
+        results = service.render_batch(event, registrations)
+        render_seconds = time.perf_counter() - started
+        service.wait_for_uploads(results)
+        total_seconds = time.perf_counter() - started
+
+        # Saving inline would take at least len(registrations) * delay
+        self.assertLess(render_seconds, len(registrations) * SlowStorage.delay / 2)
+        self.assertLess(total_seconds, len(registrations) * SlowStorage.delay)
+        self.assertEqual([result['error'] for result in results], [None] * len(results))
+        self.assertTrue(all(storage.exists(result['path']) for result in results))
+
+
+class RenderCacheTests(CertificateTestCase):
+    """Rendered PDFs are reused until their content changes, and orphans are collected."""
+
+    def setUp(self):
+        super().setUp()
+        self.organizer = User.objects.create(username='organizer')
+        self.event = make_event(self.organizer)
+        self.registration = make_eligible_registrations(self.event, 1)[0]
+        self.service = CertificateService(upload_workers=0)
+        self.addCleanup(self.service.close)
+        self.storage = self.service.storage
+
+    def generate(self):
+        return self.service.generate_for_participant(self.registration, self.event, 'CERT-1')
+
+    def test_identical_data_is_not_rendered_again(self):
+        name = self.generate()
+
+        with mock.patch.object(generator, '_render_job', wraps=generator._render_job) as render:
+            self.assertEqual(self.generate(), name)
+
+        render.assert_not_called()
+
+    def test_title_change_renders_a_new_pdf(self):
+        name = self.generate()
+        self.event.title = 'Renamed workshop'
+        self.event.save()
+
+        self.assertNotEqual(self.generate(), name)
+        self.assertTrue(is_stored(self.storage, name))
+
+    def test_organizer_change_renders_a_new_pdf(self):
+        name = self.generate()
+        self.organizer.first_name = 'Ada'
+        self.organizer.last_name = 'Lovelace'
+        self.organizer.save()
+        self.event.refresh_from_db()
+
+        self.assertNotEqual(self.generate(), name)
+
+    def test_gc_deletes_only_old_unreferenced_pdfs(self):
+        referenced = self.generate()
+        Certificate.objects.create(
+            registration=self.registration, certificate_number='CERT-1', pdf_file=referenced
+        )
+        old_orphan = self.storage.save('certificates/ff/old.pdf', ContentFile(b'%PDF-1.4'))
+        new_orphan = self.storage.save('certificates/ff/new.pdf', ContentFile(b'%PDF-1.4'))
+        old = time.time() - 2 * 24 * 3600
+        for name in (referenced, old_orphan):
+            os.utime(self.storage.path(name), (old, old))
+
+        call_command('gc_certificates', dry_run=True, stdout=io.StringIO())
+        self.assertTrue(self.storage.exists(old_orphan))
+
+        call_command('gc_certificates', stdout=io.StringIO())
+
+        self.assertTrue(self.storage.exists(referenced))
+        self.assertFalse(self.storage.exists(old_orphan))
+        self.assertTrue(self.storage.exists(new_orphan))
+
+
+class BatchGenerationTests(CertificateTestCase):
+    """Event generation renders every batch in one process pool."""
+
+    def test_pool_is_started_once_per_run(self):
+        organizer = User.objects.create(username='organizer')
+        event = make_event(organizer)
+        make_eligible_registrations(event, 7)
+
+        with mock.patch.object(generator, 'ProcessPoolExecutor', wraps=generator.ProcessPoolExecutor) as pool_class, \
+                contextlib.redirect_stdout(io.StringIO()):
+            self.assertTrue(generator.generate_certificates_for_event(event.id, workers=2, batch_size=3))
+
+        self.assertEqual(pool_class.call_count, 1)
+        self.assertEqual(Certificate.objects.count(), 7)
+        self.assertTrue(all(is_stored(get_certificate_storage(), c.pdf_file.name) for c in Certificate.objects.all()))
+
+
+class DeliveryTests(CertificateTestCase):
+    """Certificates rendered on first download and served afterwards."""
+
+    def setUp(self):
+        super().setUp()
+        self.organizer = User.objects.create(username='organizer', is_staff=True, is_superuser=True)
+        self.event = make_event(self.organizer)
+        registration = make_eligible_registrations(self.event, 1)[0]
+        self.certificate = Certificate.objects.create(
+            registration=registration,
+            certificate_number=build_certificate_number(self.event.id, registration.id),
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.organizer)
+
+    @override_settings(CERTIFICATE_UPLOAD_WORKERS=4)
+    def test_first_download_creates_no_uploader(self):
+        with mock.patch.object(storage, 'CertificateUploader', wraps=storage.CertificateUploader) as uploader_class:
+            for _ in range(3):
+                response = self.client.get(f'/api/certificates/{self.certificate.id}/download/')
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+                response.close()
+                Certificate.objects.filter(id=self.certificate.id).update(pdf_file=None)
+            self.client.post(f'/api/events/{self.event.id}/export-certificates/').close()
+
+        # Each uploader's executor would otherwise live on after the request
+        uploader_class.assert_not_called()
+
+
+class EmailDeliveryTests(EagerCeleryTestCase):
+    """Certificate emails go out in batches, one connection and one status write per batch."""
+
+    def setUp(self):
+        super().setUp()
+        self.organizer = User.objects.create(username='organizer')
+        self.event = make_event(self.organizer)
+        self.certificates = [
+            Certificate.objects.create(
+                registration=registration,
+                certificate_number=build_certificate_number(self.event.id, registration.id),
+            )
+            for registration in make_eligible_registrations(self.event, 7)
+        ]
+        self.ids = [certificate.id for certificate in self.certificates]
+
+    def connections(self):
+        return mock.patch.object(tasks, 'get_connection', wraps=tasks.get_connection)
+
+    def test_batch_reuses_one_connection(self):
+        # One SELECT for the batch and one UPDATE for every sent status
+        with self.connections() as get_connection, self.assertNumQueries(2):
+            result = tasks.send_certificate_emails(self.ids)
+
+        self.assertEqual(result, {'status': 'success', 'sent': 7, 'errors': []})
+        get_connection.assert_called_once()
+        self.assertEqual(len(mail.outbox), 7)
+        connections = {message.connection for message in mail.outbox}
+        self.assertEqual(len(connections), 1)
+        self.assertIsNotNone(connections.pop())
+        self.assertEqual(set(Certificate.objects.values_list('status', flat=True)), {'sent'})
+
+    def test_failure_is_reported_per_certificate(self):
+        failing = self.certificates[2]
+        build = tasks.build_certificate_email
+
+        def build_certificate_email(certificate, connection=None):
+            if certificate.id == failing.id:
+                raise ValueError('bad address')
+            return build(certificate, connection=connection)
+
+        with mock.patch.object(tasks, 'build_certificate_email', build_certificate_email):
+            result = tasks.send_certificate_emails(self.ids)
+
+        self.assertEqual(result['status'], 'partial')
+        self.assertEqual(result['sent'], 6)
+        self.assertEqual(result['errors'], [{'certificate_id': failing.id, 'message': 'bad address'}])
+        self.assertEqual(len(mail.outbox), 6)
+        failing.refresh_from_db()
+        self.assertEqual(failing.status, 'pending')
+
+    def test_rate_limit_spaces_messages(self):
+        with mock.patch.object(tasks.time, 'sleep') as sleep:
+            tasks.send_certificate_emails(self.ids, rate_limit=10)
+
+        self.assertEqual(sleep.call_count, 7)
+        for call in sleep.call_args_list:
+            self.assertLessEqual(call.args[0], 0.1)
+
+    @override_settings(CERTIFICATE_EMAIL_RATE_LIMIT=0)
+    def test_unlimited_rate_does_not_sleep(self):
+        with mock.patch.object(tasks.time, 'sleep') as sleep:
+            tasks.send_certificate_emails(self.ids)
+
+        sleep.assert_not_called()
+
+    @override_settings(CERTIFICATE_EMAIL_BATCH_SIZE=3)
+    def test_job_sends_in_configured_batches(self):
+        Certificate.objects.all().delete()
+
+        with self.connections() as get_connection, self.captureOnCommitCallbacks(execute=True):
+            job = tasks.start_certificate_job(self.event, chunk_size=10)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'completed')
+        self.assertEqual(get_connection.call_count, 3)
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), [f'p{i}@example.com' for i in range(7)])
+        self.assertEqual(set(Certificate.objects.values_list('status', flat=True)), {'sent'})
@@ -0,0 +1,80 @@
+"""
+Fit-to-width sizing for certificate text.
+Glyph widths are measured once per font and cached, so sizing a string is a
+table lookup per character with no trial layouts. Without kerning a string's
+width scales linearly with the font size, so the fitting size is computed
+directly, and sizes for repeated strings such as the event title are memoized.
+"""
+from functools import lru_cache
+from math import floor
+
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+# Font sizes are rounded down to this step (points)
+SIZE_STEP = 0.5
+
+
+class _GlyphWidths(dict):
+    """Per-font table of character widths at 1000pt, filled on first use."""
+    
+    def __init__(self, font_name):
+        super().__init__()
+        self.font_name = font_name
+    
+    def __missing__(self, char):
+        width = self[char] = stringWidth(char, self.font_name, 1000)
+        return width
+
+
+@lru_cache(maxsize=None)
+def glyph_widths(font_name):
+    """Get the cached glyph width table of a registered font."""
+    return _GlyphWidths(font_name)
+
+
+def text_width(text, font_name, font_size):
+    """
+    Measure a string with the cached glyph widths.
+    
+    Args:
+        text: String to measure
+        font_name: Registered ReportLab font name
+        font_size: Font size in points
+        
+    Returns:
+        Width in points
+    """
+    return sum(map(glyph_widths(font_name).__getitem__, text)) * font_size / 1000
+
+
+@lru_cache(maxsize=4096)
+def fit_font_size(text, font_name, max_size, min_size, width):
+    """
+    Get the largest font size at which text fits on one line.
+    
+    Args:
+        text: String to fit
+        font_name: Registered ReportLab font name
+        max_size: Preferred font size in points
+        min_size: Smallest allowed font size; text that does not fit at
+            this size is left to wrap
+        width: Available width in points
+        
+    Returns:
+        Font size in points
+    """
+    units = text_width(text, font_name, 1000)
+    if units <= width * 1000 / max_size:
+        return max_size
+    size = floor(width * 1000 / units / SIZE_STEP) * SIZE_STEP
+    return max(min_size, size)
+
+
+def fit_font_sizes(texts, font_name, max_size, min_size, width):
+    """
+    Fit many strings at once, e.g. every name of a batch before rendering.
+    
+    Returns:
+        List of font sizes in the order of texts
+    """
+    return [fit_font_size(text, font_name, max_size, min_size, width) for text in texts]
@@ -1,12 +1,150 @@
 """
 Views for Certificates app.
 """
-from rest_framework import viewsets
-from .models import Certificate
-from .serializers import CertificateSerializer
+from django.conf import settings
+from django.utils.cache import patch_cache_control
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from events.models import Event
+from .delivery import ensure_certificate_pdf, pdf_response
+from .jobs import has_active_chunks, with_progress
+from .numbering import check_verification_code
+from .models import Certificate, CertificateJob
+from .serializers import (
+    CertificateSerializer, CertificateJobSerializer, CertificateJobCreateSerializer, CertificateJobRetrySerializer,
+)
 
 
 class CertificateViewSet(viewsets.ModelViewSet):
     """ViewSet for Certificate management."""
     queryset = Certificate.objects.all()
     serializer_class = CertificateSerializer
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        """Download the certificate PDF, rendering it on first access."""
+        certificate = self.get_object()
+        name = ensure_certificate_pdf(certificate)
+        return pdf_response(request, certificate.pdf_file.storage, name, f"{certificate.certificate_number}.pdf")
+
+    @action(
+        detail=False,
+        methods=['get'],
+        url_path=r'verify/(?P<certificate_number>[^/]+)',
+        permission_classes=[AllowAny],
+        authentication_classes=[],
+    )
+    def verify(self, request, certificate_number=None):
+        """
+        Publicly verify a certificate number.
+        
+        With ?code=, the printed verification code is checked against the
+        number without a database query. Otherwise the number is looked up
+        through its unique index.
+        """
+        code = request.query_params.get('code')
+        if code is not None:
+            valid = check_verification_code(certificate_number, code)
+            response = Response(
+                {'valid': valid, 'certificate_number': certificate_number},
+                status=status.HTTP_200_OK if valid else status.HTTP_404_NOT_FOUND
+            )
+        else:
+            certificate = (
+                Certificate.objects
+                .filter(certificate_number=certificate_number)
+                .values(
+                    'certificate_number',
+                    'issue_date',
+                    'status',
+                    'registration__first_name',
+                    'registration__last_name',
+                    'registration__event__title',
+                    'registration__event__date',
+                )
+                .first()
+            )
+            if certificate is None:
+                response = Response(
+                    {'valid': False, 'certificate_number': certificate_number},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            else:
+                response = Response({
+                    'valid': True,
+                    'certificate_number': certificate['certificate_number'],
+                    'participant_name': f"{certificate['registration__first_name']} {certificate['registration__last_name']}",
+                    'event_title': certificate['registration__event__title'],
+                    'event_date': certificate['registration__event__date'],
+                    'issue_date': certificate['issue_date'],
+                    'status': certificate['status'],
+                })
+        
+        # Issued numbers do not change, so let clients and proxies absorb repeat checks
+        if response.data['valid']:
+            patch_cache_control(response, public=True, max_age=settings.CERTIFICATE_VERIFY_CACHE_SECONDS)
+        return response
+
+
+class CertificateJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """Start certificate generation jobs and poll their progress."""
+    # Progress and errors come from annotations and one prefetch, not per job
+    queryset = with_progress(CertificateJob.objects.select_related('event')).order_by(
+        *CertificateJob._meta.ordering  # Meta.ordering is dropped in GROUP BY queries
+    )
+    serializer_class = CertificateJobSerializer
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        event_id = self.request.query_params.get('event')
+        if event_id:
+            queryset = queryset.filter(event_id=event_id)
+        return queryset
+
+    def create(self, request):
+        """Start generating certificates for an event's eligible participants."""
+        from .tasks import start_certificate_job
+        
+        params = CertificateJobCreateSerializer(data=request.data)
+        params.is_valid(raise_exception=True)
+        
+        try:
+            event = Event.objects.select_related('organizer').get(id=params.validated_data['event'])
+        except Event.DoesNotExist:
+            return Response(
+                {'error': 'Event not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        job = start_certificate_job(
+            event,
+            chunk_size=params.validated_data['chunk_size'],
+            send_emails=params.validated_data['send_emails'],
+        )
+        job.refresh_from_db()
+        serializer = self.get_serializer(job)
+        return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=True, methods=['post'])
+    def retry(self, request, pk=None):
+        """Run the job's failed and stale chunks again (force=true also takes running ones)."""
+        from .tasks import retry_certificate_job
+        
+        params = CertificateJobRetrySerializer(data=request.data)
+        params.is_valid(raise_exception=True)
+        force = params.validated_data['force']
+        
+        job = self.get_object()
+        if job.status in ('pending', 'running') and not force and has_active_chunks(job):
+            return Response(
+                {'error': 'Job is still running'},
+                status=status.HTTP_409_CONFLICT
+            )
+        
+        queued = retry_certificate_job(job, force=force)
+        job.refresh_from_db()
+        data = self.get_serializer(job).data
+        data['retried_chunks'] = queued
+        return Response(data, status=status.HTTP_202_ACCEPTED)
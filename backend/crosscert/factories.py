@@ -0,0 +1,77 @@
+"""
+Model factories shared by the test suites and the certificate benchmarks.
+Rows are bulk-created, so model signals do not run for them.
+"""
+import datetime
+
+from events.models import CheckIn, Event, EventRegistration
+from participants.models import Evaluation
+
+# Values of generated registrations; strings are formatted with the row index i and the event
+REGISTRATION_FIELDS = {
+    'email': 'p{i}@example.com',
+    'first_name': 'P{i}',
+    'last_name': 'X',
+    'affiliation': 'Y',
+}
+
+
+def make_event(organizer, title='Workshop', **fields):
+    """Create an event; fields override the defaults."""
+    defaults = {
+        'description': '',
+        'date': datetime.date(2026, 3, 3),
+        'start_time': datetime.time(9),
+        'end_time': datetime.time(17),
+        'location': 'Hall A',
+    }
+    return Event.objects.create(title=title, organizer=organizer, **{**defaults, **fields})
+
+
+def make_registrations(event, count, **fields):
+    """
+    Create count registrations for an event.
+    
+    Args:
+        event: Event instance
+        count: Number of registrations
+        **fields: Values overriding REGISTRATION_FIELDS, formatted the same way
+        
+    Returns:
+        List of EventRegistration instances
+    """
+    templates = {**REGISTRATION_FIELDS, **fields}
+    return EventRegistration.objects.bulk_create(
+        [
+            EventRegistration(
+                event=event,
+                **{name: value.format(i=i, event=event) for name, value in templates.items()}
+            )
+            for i in range(count)
+        ],
+        batch_size=500,
+    )
+
+
+def make_eligible(registrations):
+    """Check in and evaluate registrations, so they get a certificate."""
+    CheckIn.objects.bulk_create(
+        [CheckIn(registration=registration) for registration in registrations],
+        batch_size=500,
+    )
+    Evaluation.objects.bulk_create(
+        [
+            Evaluation(
+                registration=registration, name=registration.first_name, email=registration.email,
+                year_level='1', content_rating=5, instructor_rating=5, facilities_rating=5, overall_rating=5,
+            )
+            for registration in registrations
+        ],
+        batch_size=500,
+    )
+    return registrations
+
+
+def make_eligible_registrations(event, count, **fields):
+    """Create count registrations that are checked in and evaluated."""
+    return make_eligible(make_registrations(event, count, **fields))
@@ -0,0 +1,62 @@
+"""
+Sparse fieldsets for CROSSCERT list endpoints.
+Clients pass ?fields=id,email,... to receive (and load) only those fields.
+"""
+
+FIELDS_PARAM = 'fields'
+
+
+def requested_fields(request):
+    """
+    Get the field names a GET request asked for.
+    
+    Returns:
+        Set of field names, or None when every field is wanted
+    """
+    if request is None or request.method != 'GET':
+        return None
+    value = request.query_params.get(FIELDS_PARAM)
+    if not value:
+        return None
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+def defer_unrequested(queryset, request, deferrable_fields):
+    """
+    Skip loading heavy columns the request did not ask for.
+    
+    Args:
+        queryset: QuerySet to narrow
+        request: DRF request
+        deferrable_fields: Model fields that may be left out of the query
+        
+    Returns:
+        QuerySet
+    """
+    requested = requested_fields(request)
+    if requested is None:
+        return queryset
+    deferred = [name for name in deferrable_fields if name not in requested]
+    return queryset.defer(*deferred) if deferred else queryset
+
+
+class SparseFieldsetSerializerMixin:
+    """Drop the serializer fields a ?fields= request did not ask for; id is always kept."""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        requested = requested_fields(self.context.get('request'))
+        if requested is None:
+            return
+        for name in set(self.fields) - requested - {'id'}:
+            self.fields.pop(name)
+
+
+class SparseFieldsetViewMixin:
+    """Defer heavy model columns that a ?fields= request leaves out."""
+    
+    # Model fields that may be left out of the query
+    deferrable_fields = ()
+    
+    def get_queryset(self):
+        return defer_unrequested(super().get_queryset(), self.request, self.deferrable_fields)
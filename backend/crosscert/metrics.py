@@ -0,0 +1,200 @@
+"""
+In-process metrics for CROSSCERT.
+Counters and histograms for the certificate and check-in hot paths, exposed
+in the Prometheus text format at /metrics when METRICS_ENABLED is set.
+
+Metrics are kept per process; scrape each worker (or run one per host).
+Render phases recorded inside generation worker processes are not collected.
+"""
+import functools
+import threading
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+
+# Histogram buckets in seconds, from a cache hit to a slow SMTP round trip
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+_DISABLED = nullcontext()
+
+
+def metrics_enabled():
+    """Whether metrics are recorded (METRICS_ENABLED setting)."""
+    # The generator is also used outside Django, where nothing is recorded
+    return settings.configured and getattr(settings, 'METRICS_ENABLED', False)
+
+
+def _label_key(labelnames, labels):
+    return tuple(str(labels.get(name, '')) for name in labelnames)
+
+
+def _format_labels(labelnames, key, extra=()):
+    pairs = list(zip(labelnames, key)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (
+        '%s="%s"' % (name, value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in pairs
+    )
+    return '{%s}' % ','.join(escaped)
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+    
+    kind = 'counter'
+    
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+    
+    def inc(self, amount=1, **labels):
+        """Add amount to the counter for the given labels."""
+        if not metrics_enabled():
+            return
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+    
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            yield self.name, _format_labels(self.labelnames, key), value
+
+
+class Histogram:
+    """Histogram of observed durations with optional labels."""
+    
+    kind = 'histogram'
+    
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+    
+    def observe(self, value, **labels):
+        """Record one observation for the given labels."""
+        if not metrics_enabled():
+            return
+        key = _label_key(self.labelnames, labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.get(key) or ([0] * (len(self.buckets) + 1), 0.0)
+            counts[index] += 1
+            self._values[key] = (counts, total + value)
+    
+    def time(self, **labels):
+        """Context manager observing the duration of its block."""
+        if not metrics_enabled():
+            return _DISABLED
+        return _Timer(self, labels)
+    
+    def samples(self):
+        with self._lock:
+            values = {key: (list(counts), total) for key, (counts, total) in self._values.items()}
+        for key, (counts, total) in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                yield f'{self.name}_bucket', _format_labels(self.labelnames, key, [('le', le)]), cumulative
+            yield f'{self.name}_sum', _format_labels(self.labelnames, key), total
+            yield f'{self.name}_count', _format_labels(self.labelnames, key), cumulative
+
+
+class _Timer:
+    """Times a block and records it on a histogram."""
+    
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+    
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+
+
+REGISTRY = []
+
+OPERATION_SECONDS = Histogram(
+    'crosscert_operation_seconds',
+    'Duration of instrumented operations',
+    ('operation',),
+)
+PHASE_SECONDS = Histogram(
+    'crosscert_phase_seconds',
+    'Time spent in each phase (query, layout, build, render, write, send) of an operation',
+    ('operation', 'phase'),
+)
+CERTIFICATES_GENERATED = Counter(
+    'crosscert_certificates_generated_total',
+    'Certificates generated, by outcome',
+    ('outcome',),
+)
+CERTIFICATE_EMAILS = Counter(
+    'crosscert_certificate_emails_total',
+    'Certificate emails, by outcome',
+    ('outcome',),
+)
+CHECK_INS = Counter(
+    'crosscert_check_ins_total',
+    'Check-in attempts, by outcome and whether the cache index answered',
+    ('outcome', 'source'),
+)
+
+
+def phase(operation, name):
+    """
+    Time one phase of an operation.
+    
+    Usage:
+        with phase('generate_event', 'query'):
+            ...
+    """
+    return PHASE_SECONDS.time(operation=operation, phase=name)
+
+
+def timed(operation):
+    """Decorator recording a function's duration as an operation."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with OPERATION_SECONDS.time(operation=operation):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def render_metrics():
+    """Render every registered metric in the Prometheus text format."""
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f'# HELP {metric.name} {metric.documentation}')
+        lines.append(f'# TYPE {metric.name} {metric.kind}')
+        for name, labels, value in metric.samples():
+            lines.append(f'{name}{labels} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request):
+    """Serve the metrics for Prometheus to scrape."""
+    if not metrics_enabled():
+        raise Http404('Metrics are disabled')
+    return HttpResponse(render_metrics(), content_type=CONTENT_TYPE)
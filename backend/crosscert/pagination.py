@@ -0,0 +1,17 @@
+"""
+Pagination classes for CROSSCERT list endpoints.
+"""
+from rest_framework.pagination import CursorPagination
+
+
+class IdCursorPagination(CursorPagination):
+    """
+    Cursor pagination keyed on the primary key.
+    
+    Each page is a range scan on the primary key index from the previous
+    position, with no OFFSET and no COUNT(*), so deep pages of large
+    tables are as fast as the first one.
+    """
+    ordering = 'id'
+    page_size_query_param = 'page_size'
+    max_page_size = 200
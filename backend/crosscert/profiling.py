@@ -0,0 +1,56 @@
+"""
+Opt-in per-request profiling for CROSSCERT.
+With PROFILING_ENABLED set, a staff user logged in through the session can
+append ?profile=1 to any request to get cProfile statistics for it instead of
+the normal response.
+"""
+import cProfile
+import io
+import pstats
+
+from django.conf import settings
+from django.http import HttpResponse
+
+# Number of functions listed in a profile report
+PROFILE_LIMIT = 50
+
+# ?profile= values that ask for a profile
+PROFILE_VALUES = ('1', 'true', 'yes', 'on')
+
+
+class ProfileMiddleware:
+    """Profile requests that ask for it; a no-op unless PROFILING_ENABLED is set."""
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'PROFILING_ENABLED', False)
+    
+    def __call__(self, request):
+        if not (self.enabled and self.wants_profile(request)):
+            return self.get_response(request)
+        
+        profiler = cProfile.Profile()
+        profiler.runcall(self.get_response, request)
+        
+        sort = request.GET.get('profile_sort', 'cumulative')
+        if sort not in pstats.Stats.sort_arg_dict_default:
+            sort = 'cumulative'
+        
+        output = io.StringIO()
+        stats = pstats.Stats(profiler, stream=output)
+        stats.sort_stats(sort).print_stats(PROFILE_LIMIT)
+        return HttpResponse(output.getvalue(), content_type='text/plain; charset=utf-8')
+    
+    @staticmethod
+    def wants_profile(request):
+        """
+        Whether a request asks for a profile and may have one.
+        
+        Checked before anything runs under the profiler, so nobody else can
+        make requests pay the profiling overhead. The user comes from
+        AuthenticationMiddleware, which must be listed before this one.
+        """
+        if request.GET.get('profile', '').lower() not in PROFILE_VALUES:
+            return False
+        user = getattr(request, 'user', None)
+        return bool(user and user.is_authenticated and user.is_staff)
@@ -36,6 +36,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'crosscert.profiling.ProfileMiddleware',
 ]
 
 ROOT_URLCONF = 'crosscert.urls'
@@ -82,6 +83,21 @@ USE_I18N = True
 USE_TZ = True
 
 STATIC_URL = '/static/'
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.getenv('MEDIA_ROOT', str(BASE_DIR / 'media'))
+
+# Generated certificate PDFs use their own storage so any backend can be plugged in
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+    'certificates': {
+        'BACKEND': os.getenv('CERTIFICATE_STORAGE_BACKEND', 'django.core.files.storage.FileSystemStorage'),
+    },
+}
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # REST Framework configuration
@@ -98,6 +114,50 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Cache (locmem by default; point at Redis with CACHE_BACKEND/CACHE_LOCATION)
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+
+# Answer duplicate check-in scans for live events from the cache
+CHECKIN_INDEX_ENABLED = os.getenv('CHECKIN_INDEX_ENABLED', 'false').lower() == 'true'
+
+# Certificate PDF output: standard, compact (smallest files) or archival
+# (PDF/A-leaning, every font embedded)
+CERTIFICATE_OUTPUT_PROFILE = os.getenv('CERTIFICATE_OUTPUT_PROFILE', 'standard')
+# Optional TrueType fonts for certificate text, registered once per process
+CERTIFICATE_FONTS = {
+    'regular': os.getenv('CERTIFICATE_FONT_REGULAR'),
+    'bold': os.getenv('CERTIFICATE_FONT_BOLD'),
+} if os.getenv('CERTIFICATE_FONT_REGULAR') else None
+
+# Print an HMAC verification code next to each certificate number; the code
+# is signed with CERTIFICATE_SIGNING_KEY (SECRET_KEY when empty)
+CERTIFICATE_VERIFICATION_CODES = os.getenv('CERTIFICATE_VERIFICATION_CODES', 'true').lower() == 'true'
+CERTIFICATE_SIGNING_KEY = os.getenv('CERTIFICATE_SIGNING_KEY', '')
+# Seconds clients and proxies may cache certificate verification responses
+CERTIFICATE_VERIFY_CACHE_SECONDS = int(os.getenv('CERTIFICATE_VERIFY_CACHE_SECONDS', '300'))
+
+# Threads saving rendered certificate PDFs in the background; 0 saves inline
+CERTIFICATE_UPLOAD_WORKERS = int(os.getenv('CERTIFICATE_UPLOAD_WORKERS', '4'))
+
+# Hot-path timings and counters served at /metrics
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'false').lower() == 'true'
+# Let staff users profile a request by adding ?profile=1
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'false').lower() == 'true'
+
+# Seconds after which a pending or running certificate job chunk counts as
+# lost (its worker was killed) and can be retried
+CERTIFICATE_JOB_CHUNK_TIMEOUT = int(os.getenv('CERTIFICATE_JOB_CHUNK_TIMEOUT', '1800'))
+
+# Certificate email delivery
+CERTIFICATE_EMAIL_BATCH_SIZE = int(os.getenv('CERTIFICATE_EMAIL_BATCH_SIZE', '50'))
+# Maximum messages per second sent over one connection; 0 disables the limit
+CERTIFICATE_EMAIL_RATE_LIMIT = float(os.getenv('CERTIFICATE_EMAIL_RATE_LIMIT', '0'))
+
 # CORS Configuration
 CORS_ALLOWED_ORIGINS = [
     'http://localhost:3000',
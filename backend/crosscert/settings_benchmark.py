@@ -0,0 +1,16 @@
+"""
+Settings for running the certificate benchmarks offline on SQLite.
+Usage: python manage.py benchmark_certificates --settings=crosscert.settings_benchmark
+"""
+from .settings import *  # noqa: F401,F403
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'benchmark.sqlite3',
+    }
+}
+
+# Benchmarks measure rendering, not the network
+CERTIFICATE_STORAGE_BACKEND = 'django.core.files.storage.FileSystemStorage'
+STORAGES['certificates'] = {'BACKEND': CERTIFICATE_STORAGE_BACKEND}
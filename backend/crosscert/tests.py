@@ -0,0 +1,255 @@
+"""
+Tests for the CROSSCERT project-level metrics, profiling and list query counts.
+"""
+import statistics
+import time
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from certificates.models import Certificate, CertificateJob
+from participants.models import Evaluation
+from . import profiling
+from .factories import make_eligible_registrations, make_event
+from .pagination import IdCursorPagination
+from .metrics import CHECK_INS
+
+
+@override_settings(PROFILING_ENABLED=True)
+class ProfileMiddlewareTests(TestCase):
+    """Only staff requests that ask for a profile run under cProfile."""
+
+    def get(self, query):
+        with mock.patch.object(profiling.cProfile, 'Profile', wraps=profiling.cProfile.Profile) as profile_class:
+            response = self.client.get(f'/api/events/{query}')
+        return response, profile_class.call_count
+
+    def test_anonymous_request_is_not_profiled(self):
+        response, profiles = self.get('?profile=1')
+
+        self.assertEqual(profiles, 0)
+        self.assertEqual(response['Content-Type'], 'application/json')
+
+    def test_falsy_profile_value_is_not_profiled(self):
+        self.client.force_login(User.objects.create(username='staff', is_staff=True))
+
+        response, profiles = self.get('?profile=0')
+
+        self.assertEqual(profiles, 0)
+        self.assertEqual(response['Content-Type'], 'application/json')
+
+    def test_non_staff_request_is_not_profiled(self):
+        self.client.force_login(User.objects.create(username='user'))
+
+        _, profiles = self.get('?profile=1')
+
+        self.assertEqual(profiles, 0)
+
+    def test_staff_request_gets_profile(self):
+        self.client.force_login(User.objects.create(username='staff', is_staff=True))
+
+        response, profiles = self.get('?profile=1&profile_sort=tottime')
+
+        self.assertEqual(profiles, 1)
+        self.assertEqual(response['Content-Type'], 'text/plain; charset=utf-8')
+        self.assertIn('function calls', response.content.decode())
+
+    @override_settings(PROFILING_ENABLED=False)
+    def test_disabled(self):
+        self.client.force_login(User.objects.create(username='staff', is_staff=True))
+
+        _, profiles = self.get('?profile=1')
+
+        self.assertEqual(profiles, 0)
+
+
+class MetricsViewTests(TestCase):
+    """The /metrics endpoint only exists when METRICS_ENABLED is set."""
+
+    @override_settings(METRICS_ENABLED=False)
+    def test_disabled(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 404)
+
+    @override_settings(METRICS_ENABLED=True)
+    def test_renders_recorded_counters(self):
+        CHECK_INS.inc(outcome='created', source='db')
+
+        response = self.client.get('/metrics')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('crosscert_check_ins_total{outcome="created",source="db"}', response.content.decode())
+
+
+class ListQueryCountTests(TestCase):
+    """Every list endpoint runs a fixed number of queries however many rows it renders."""
+
+    # Cursor-paginated lists run a single query; page-number lists add a COUNT(*)
+    API_LISTS = {
+        '/api/events/': 2,
+        '/api/registrations/': 1,
+        '/api/check-ins/': 1,
+        '/api/evaluations/': 1,
+        '/api/certificates/': 2,
+        '/api/certificate-jobs/': 3,
+        '/api/admin/events/': 2,
+        '/api/admin/check-ins/': 1,
+        '/api/admin/evaluations/': 1,
+        '/api/admin/certificates/': 2,
+        '/api/admin/certificate-jobs/': 3,
+    }
+    ADMIN_CHANGELISTS = [
+        '/admin/certificates/certificate/',
+        '/admin/certificates/certificatejob/',
+    ]
+
+    def setUp(self):
+        self.organizer = User.objects.create(username='organizer', is_staff=True, is_superuser=True)
+        self.events = 0
+
+    def add_event(self, registrations):
+        self.events += 1
+        event = make_event(self.organizer, title=f'Event {self.events}')
+        Certificate.objects.bulk_create([
+            Certificate(registration=registration, certificate_number=f'CERT-{event.id}-{i}')
+            for i, registration in enumerate(make_eligible_registrations(event, registrations))
+        ])
+        CertificateJob.objects.create(event=event, total=registrations)
+
+    def assertConstantQueries(self, url, num):
+        with self.assertNumQueries(num):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+
+    def test_api_lists(self):
+        self.add_event(1)
+        for url, num in self.API_LISTS.items():
+            self.assertConstantQueries(url, num)
+
+        for _ in range(3):
+            self.add_event(6)
+        for url, num in self.API_LISTS.items():
+            with self.subTest(url=url):
+                self.assertConstantQueries(url, num)
+
+    def test_admin_changelists(self):
+        self.client.force_login(self.organizer)
+        self.add_event(1)
+        baseline = {}
+        for url in self.ADMIN_CHANGELISTS:
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get(url)
+            baseline[url] = len(queries)
+
+        for _ in range(3):
+            self.add_event(6)
+        for url, num in baseline.items():
+            with self.subTest(url=url):
+                self.assertConstantQueries(url, num)
+
+
+class CursorPaginationTests(TestCase):
+    """Cursor-paginated lists seek on the primary key and load only requested fields."""
+
+    CURSOR_LISTS = ['/api/registrations/', '/api/check-ins/', '/api/evaluations/']
+
+    def setUp(self):
+        organizer = User.objects.create(username='organizer')
+        self.event = make_event(organizer)
+
+    def populate(self, count):
+        make_eligible_registrations(self.event, count, qr_code='badge-{i}')
+        Evaluation.objects.filter(registration__event=self.event).update(feedback='Long feedback ' * 50)
+
+    def walk(self, url):
+        """Follow next links from url, returning every row and the SQL run."""
+        rows = []
+        with CaptureQueriesContext(connection) as queries:
+            while url:
+                data = self.client.get(url).data
+                rows += data['results']
+                url = data['next']
+        return rows, [query['sql'] for query in queries]
+
+    def test_pages_cover_every_row_without_offset_or_count(self):
+        self.populate(23)
+
+        for url in self.CURSOR_LISTS:
+            with self.subTest(url=url):
+                rows, sql = self.walk(f'{url}?page_size=5')
+
+                ids = [row['id'] for row in rows]
+                self.assertEqual(len(ids), 23)
+                self.assertEqual(ids, sorted(set(ids)))
+                self.assertEqual(len(sql), 5)
+                self.assertFalse([query for query in sql if 'OFFSET' in query or 'COUNT(' in query])
+
+    def test_page_size_is_capped(self):
+        self.populate(IdCursorPagination.max_page_size + 5)
+
+        response = self.client.get('/api/registrations/?page_size=100000')
+
+        self.assertEqual(len(response.data['results']), IdCursorPagination.max_page_size)
+        self.assertIsNotNone(response.data['next'])
+
+    def test_event_registrations_use_cursor(self):
+        self.populate(12)
+
+        rows, sql = self.walk(f'/api/events/{self.event.id}/registrations/?page_size=5&fields=id,email')
+
+        self.assertEqual(len(rows), 12)
+        self.assertEqual(set(rows[0]), {'id', 'email'})
+        self.assertFalse([query for query in sql if 'OFFSET' in query or 'qr_code' in query])
+
+    def test_fields_trims_output_and_defers_heavy_columns(self):
+        self.populate(3)
+
+        cases = [
+            ('/api/registrations/?fields=id,email', {'id', 'email'}, 'qr_code'),
+            ('/api/evaluations/?fields=overall_rating', {'id', 'overall_rating'}, 'feedback'),
+            ('/api/check-ins/?fields=id,participant_name', {'id', 'participant_name'}, None),
+        ]
+        for url, fields, deferred in cases:
+            with self.subTest(url=url), CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(set(response.data['results'][0]), fields)
+                if deferred:
+                    self.assertNotIn(deferred, queries[0]['sql'])
+
+    def test_requested_heavy_column_is_loaded(self):
+        self.populate(3)
+
+        response = self.client.get('/api/evaluations/?fields=feedback')
+
+        self.assertEqual(set(response.data['results'][0]), {'id', 'feedback'})
+        self.assertTrue(response.data['results'][0]['feedback'].startswith('Long feedback'))
+
+    def test_deep_page_costs_the_same_as_the_first(self):
+        self.populate(1000)
+        first_url = '/api/registrations/?page_size=10'
+        deep_url = first_url
+        for _ in range(90):
+            deep_url = self.client.get(deep_url).data['next']
+
+        def median_latency(url):
+            samples = []
+            for _ in range(15):
+                started = time.perf_counter()
+                self.client.get(url)
+                samples.append(time.perf_counter() - started)
+            return statistics.median(samples)
+
+        for url in (first_url, deep_url):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(len(response.data['results']), 10)
+            self.assertEqual(len(queries), 1)
+            self.assertNotIn('OFFSET', queries[0]['sql'])
+
+        self.assertEqual(response.data['results'][0]['email'], 'p900@example.com')
+        # A seek on the primary key, so depth adds no work; allow for timer noise
+        self.assertLess(median_latency(deep_url), median_latency(first_url) * 2)
@@ -6,7 +6,8 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from events.views import EventViewSet, EventRegistrationViewSet, CheckInViewSet
 from participants.views import ParticipantViewSet, EvaluationViewSet
-from certificates.views import CertificateViewSet
+from certificates.views import CertificateViewSet, CertificateJobViewSet
+from crosscert.metrics import metrics_view
 
 # General API router for public/participant endpoints
 api_router = DefaultRouter()
@@ -15,6 +16,7 @@ api_router.register(r'registrations', EventRegistrationViewSet, basename='regist
 api_router.register(r'check-ins', CheckInViewSet, basename='check-in')
 api_router.register(r'evaluations', EvaluationViewSet, basename='evaluation')
 api_router.register(r'certificates', CertificateViewSet, basename='certificate')
+api_router.register(r'certificate-jobs', CertificateJobViewSet, basename='certificate-job')
 
 # Admin API router for admin-specific endpoints
 admin_router = DefaultRouter()
@@ -23,10 +25,12 @@ admin_router.register(r'participants', ParticipantViewSet, basename='admin-parti
 admin_router.register(r'check-ins', CheckInViewSet, basename='admin-check-in')
 admin_router.register(r'evaluations', EvaluationViewSet, basename='admin-evaluation')
 admin_router.register(r'certificates', CertificateViewSet, basename='admin-certificate')
+admin_router.register(r'certificate-jobs', CertificateJobViewSet, basename='admin-certificate-job')
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include(api_router.urls)),
     path('api/admin/', include(admin_router.urls)),
     path('api-auth/', include('rest_framework.urls')),
+    path('metrics', metrics_view, name='metrics'),
 ]
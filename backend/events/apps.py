@@ -0,0 +1,11 @@
+"""
+App configuration for Event app.
+"""
+from django.apps import AppConfig
+
+
+class EventsConfig(AppConfig):
+    name = 'events'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,194 @@
+"""
+Check-in helpers for CROSSCERT.
+Resolves scanned QR payloads, records attendance in bulk and keeps an
+optional cache-backed check-in index for live events.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from .models import Event, EventRegistration, CheckIn
+
+# Per-item results of a bulk check-in
+CHECKIN_CREATED = 'created'
+CHECKIN_ALREADY = 'already_checked_in'
+CHECKIN_NOT_FOUND = 'not_found'
+
+# Index entries outlive the entrance rush of a typical event day
+CHECKIN_INDEX_TIMEOUT = 60 * 60 * 12
+CHECKIN_INDEX_WARM_BATCH = 1000
+
+
+def parse_registration_id(value):
+    """
+    Extract a registration ID from a scanned value.
+    
+    Args:
+        value: Registration ID (int or digit string) or a 'checkin_<id>' QR payload
+        
+    Returns:
+        Registration ID, or None if the value is not in a known format
+    """
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        value = value.strip()
+        if value.startswith('checkin_'):
+            value = value[len('checkin_'):]
+        if value.isdigit():
+            return int(value)
+    return None
+
+
+def bulk_check_in(items):
+    """
+    Check in many registrations at once.
+    
+    Repeating an item, or sending one that is already checked in, is not an
+    error, so offline scanner queues can safely be flushed more than once.
+    
+    Args:
+        items: List of registration IDs or QR payloads
+        
+    Returns:
+        List of dicts with keys - item, registration_id, status - in input order
+    """
+    ids = [parse_registration_id(item) for item in items]
+    # Custom payloads stored on the registration are matched by qr_code
+    payloads = [item for item, registration_id in zip(items, ids) if registration_id is None and isinstance(item, str)]
+    
+    registrations = EventRegistration.objects.in_bulk([i for i in ids if i is not None])
+    by_payload = {}
+    if payloads:
+        by_payload = dict(EventRegistration.objects.filter(qr_code__in=payloads).values_list('qr_code', 'id'))
+    
+    resolved = []
+    for item, registration_id in zip(items, ids):
+        if registration_id is None:
+            registration_id = by_payload.get(item) if isinstance(item, str) else None
+        elif registration_id not in registrations:
+            registration_id = None
+        resolved.append(registration_id)
+    
+    checked_in = set(
+        CheckIn.objects
+        .filter(registration_id__in={i for i in resolved if i is not None})
+        .values_list('registration_id', flat=True)
+    )
+    
+    results = []
+    new_check_ins = []
+    for item, registration_id in zip(items, resolved):
+        if registration_id is None:
+            status = CHECKIN_NOT_FOUND
+        elif registration_id in checked_in:
+            status = CHECKIN_ALREADY
+        else:
+            status = CHECKIN_CREATED
+            checked_in.add(registration_id)
+            new_check_ins.append(CheckIn(registration_id=registration_id))
+        results.append({'item': item, 'registration_id': registration_id, 'status': status})
+    
+    # A concurrent scan may have inserted the same row since the lookup above
+    CheckIn.objects.bulk_create(new_check_ins, ignore_conflicts=True)
+    # bulk_create sends no signals, so update the index directly
+    mark_checked_in([check_in.registration_id for check_in in new_check_ins])
+    
+    return results
+
+
+def checkin_index_enabled():
+    """Whether the cache-backed check-in index is turned on."""
+    return settings.CHECKIN_INDEX_ENABLED
+
+
+def _index_key(registration_id):
+    return f"checkin:registration:{registration_id}"
+
+
+def warm_checkin_index(event):
+    """
+    Load an event's registrations and check-in state into the cache.
+    
+    Args:
+        event: Event instance
+    """
+    rows = (
+        EventRegistration.objects
+        .filter(event=event)
+        .values_list('id', 'first_name', 'last_name', 'check_in__id')
+        .iterator(chunk_size=CHECKIN_INDEX_WARM_BATCH)
+    )
+    
+    entries = {}
+    for registration_id, first_name, last_name, check_in_id in rows:
+        entries[_index_key(registration_id)] = {
+            'event_id': event.id,
+            'event_title': event.title,
+            'first_name': first_name,
+            'last_name': last_name,
+            'checked_in': check_in_id is not None,
+        }
+        if len(entries) >= CHECKIN_INDEX_WARM_BATCH:
+            cache.set_many(entries, CHECKIN_INDEX_TIMEOUT)
+            entries = {}
+    if entries:
+        cache.set_many(entries, CHECKIN_INDEX_TIMEOUT)
+
+
+def invalidate_checkin_index(registration_id):
+    """Drop a registration from the index so the next scan reads the database."""
+    cache.delete(_index_key(registration_id))
+
+
+def mark_checked_in(registration_ids):
+    """Record check-ins in the index for registrations that are indexed."""
+    if not checkin_index_enabled() or not registration_ids:
+        return
+    
+    entries = cache.get_many([_index_key(registration_id) for registration_id in registration_ids])
+    for entry in entries.values():
+        entry['checked_in'] = True
+    if entries:
+        cache.set_many(entries, CHECKIN_INDEX_TIMEOUT)
+
+
+def check_in_from_index(registration_id):
+    """
+    Check in a registration using the cache-backed index.
+    
+    Duplicate scans are answered from the cache alone; first scans write the
+    CheckIn row through to the database.
+    
+    Args:
+        registration_id: ID of the registration
+        
+    Returns:
+        Tuple of (status, CheckIn or None), or None if the registration is
+        not indexed and the caller should use the database path
+    """
+    key = _index_key(registration_id)
+    entry = cache.get(key)
+    if entry is None:
+        return None
+    if entry['checked_in']:
+        return CHECKIN_ALREADY, None
+    
+    # Build the related objects from the index so serializing needs no queries
+    registration = EventRegistration(
+        id=registration_id,
+        first_name=entry['first_name'],
+        last_name=entry['last_name'],
+        event=Event(id=entry['event_id'], title=entry['event_title']),
+    )
+    try:
+        with transaction.atomic():
+            check_in = CheckIn.objects.create(registration=registration)
+        status = CHECKIN_CREATED
+    except IntegrityError:
+        # Checked in through another worker whose cache we cannot see
+        check_in = None
+        status = CHECKIN_ALREADY
+    
+    entry['checked_in'] = True
+    cache.set(key, entry, CHECKIN_INDEX_TIMEOUT)
+    return status, check_in
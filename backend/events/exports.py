@@ -0,0 +1,90 @@
+"""
+Streaming exports of event registrations and attendance.
+Rows are read with queryset.iterator() so memory stays flat for any event size.
+"""
+import csv
+import tempfile
+
+from .models import EventRegistration
+
+try:
+    from openpyxl import Workbook
+except ImportError:  # XLSX export is optional
+    Workbook = None
+
+EXPORT_CHUNK_SIZE = 2000
+
+# (header, lookup) pairs for each exported column
+EXPORT_COLUMNS = [
+    ('Registration ID', 'id'),
+    ('First Name', 'first_name'),
+    ('Last Name', 'last_name'),
+    ('Email', 'email'),
+    ('Affiliation', 'affiliation'),
+    ('Registered At', 'registered_at'),
+    ('Checked In At', 'check_in__checked_in_at'),
+    ('Checked Out At', 'check_in__check_out_at'),
+    ('Content Rating', 'evaluation__content_rating'),
+    ('Instructor Rating', 'evaluation__instructor_rating'),
+    ('Facilities Rating', 'evaluation__facilities_rating'),
+    ('Overall Rating', 'evaluation__overall_rating'),
+    ('Certificate Number', 'certificate__certificate_number'),
+]
+
+
+class _Echo:
+    """File-like object that returns what is written instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def iter_export_rows(event):
+    """
+    Yield one row per registration with attendance, ratings and certificate.
+    
+    Args:
+        event: Event instance
+    """
+    return (
+        EventRegistration.objects
+        .filter(event=event)
+        .order_by('id')
+        .values_list(*[lookup for _, lookup in EXPORT_COLUMNS])
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+
+
+def iter_csv(event):
+    """Yield the CSV export of an event line by line."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow([header for header, _ in EXPORT_COLUMNS])
+    for row in iter_export_rows(event):
+        yield writer.writerow(['' if value is None else value for value in row])
+
+
+def write_xlsx(event):
+    """
+    Write the XLSX export of an event to a temporary file.
+    
+    Uses openpyxl's write-only mode, which flushes rows to disk as they are
+    added instead of building the sheet in memory.
+    
+    Returns:
+        Open temporary file positioned at the start, or None if openpyxl is
+        not installed
+    """
+    if Workbook is None:
+        return None
+    
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Registrations')
+    sheet.append([header for header, _ in EXPORT_COLUMNS])
+    for row in iter_export_rows(event):
+        # Excel cannot store timezone-aware datetimes
+        sheet.append([value.replace(tzinfo=None) if hasattr(value, 'tzinfo') else value for value in row])
+    
+    output = tempfile.TemporaryFile()
+    workbook.save(output)
+    output.seek(0)
+    return output
@@ -0,0 +1,200 @@
+"""
+Bulk import of event registrations from CSV or JSON.
+Rows are validated and inserted in chunks; bad rows are reported, not fatal.
+"""
+import codecs
+import csv
+import json
+from itertools import islice
+
+from django.db import IntegrityError, transaction
+from rest_framework import serializers
+
+from .models import EventRegistration
+
+IMPORT_CHUNK_SIZE = 500
+IMPORT_FORMATS = ('csv', 'json')
+
+
+class RegistrationRowSerializer(serializers.Serializer):
+    """Validate one imported row without touching the database."""
+    email = serializers.EmailField(max_length=254)
+    first_name = serializers.CharField(max_length=100)
+    last_name = serializers.CharField(max_length=100)
+    affiliation = serializers.CharField(max_length=100)
+
+
+class RowError(Exception):
+    """A row that could not be read; it is reported like an invalid row."""
+
+
+def _decode_lines(fileobj, bad_lines):
+    """
+    Decode a binary file line by line.
+    
+    Lines that are not valid UTF-8 are decoded with replacement characters
+    and their numbers added to bad_lines, so one bad byte does not end the file.
+    """
+    for number, raw in enumerate(fileobj, start=1):
+        if number == 1:
+            raw = raw.removeprefix(codecs.BOM_UTF8)
+        try:
+            yield raw.decode('utf-8')
+        except UnicodeDecodeError:
+            bad_lines.add(number)
+            yield raw.decode('utf-8', errors='replace')
+
+
+def _iter_csv(fileobj):
+    bad_lines = set()
+    reader = csv.DictReader(_decode_lines(fileobj, bad_lines))
+    number = 0
+    last_line = 0
+    while True:
+        try:
+            row = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as e:
+            row = RowError(f'Invalid CSV: {e}')
+        number += 1
+        # A quoted field can span several physical lines
+        if any(line in bad_lines for line in range(last_line + 1, reader.line_num + 1)):
+            row = RowError('Row is not valid UTF-8')
+        last_line = reader.line_num
+        yield number, row
+
+
+def _iter_json(fileobj):
+    bad_lines = set()
+    array = None
+    started = False
+    for number, line in enumerate(_decode_lines(fileobj, bad_lines), start=1):
+        if array is not None:
+            array.append(line)
+            continue
+        if not line.strip():
+            continue
+        if not started and line.lstrip().startswith('['):
+            array = [line]
+            continue
+        started = True
+        
+        if number in bad_lines:
+            row = RowError('Line is not valid UTF-8')
+        else:
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                row = RowError(f'Invalid JSON: {e}')
+        yield number, row
+    
+    if array is not None:
+        # An array is parsed in one go, before any row is imported
+        if bad_lines:
+            raise ValueError('File is not valid UTF-8')
+        yield from enumerate(json.loads(''.join(array)), start=1)
+
+
+def iter_rows(fileobj, file_format):
+    """
+    Yield numbered rows from an uploaded file without reading it all at once.
+    
+    Rows that cannot be decoded or parsed are yielded as RowError instances
+    so the import reports them and carries on.
+    
+    Args:
+        fileobj: Binary file object
+        file_format: 'csv', or 'json' for JSON Lines (one object per line)
+            or a JSON array (which is parsed in one go)
+    
+    Yields:
+        (number, row) pairs; numbers count data rows from 1 for CSV and JSON
+        arrays, and are line numbers for JSON Lines
+    
+    Raises:
+        ValueError: If a JSON array cannot be parsed (nothing is yielded then)
+    """
+    if file_format == 'csv':
+        return _iter_csv(fileobj)
+    return _iter_json(fileobj)
+
+
+def import_registrations(event, rows, chunk_size=IMPORT_CHUNK_SIZE):
+    """
+    Import registrations for an event.
+    
+    Args:
+        event: Event instance
+        rows: Iterable of (row number, row) pairs as yielded by iter_rows; rows
+            are dicts with keys - email, first_name, last_name, affiliation
+        chunk_size: Number of rows validated and inserted together
+        
+    Returns:
+        Dict with keys - created, duplicates, errors (list of row-level errors)
+    """
+    report = {'created': 0, 'duplicates': 0, 'errors': []}
+    rows = iter(rows)
+    
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return report
+        
+        valid = []
+        for number, row in chunk:
+            if isinstance(row, RowError):
+                report['errors'].append({'row': number, 'errors': {'non_field_errors': [str(row)]}})
+                continue
+            serializer = RegistrationRowSerializer(data=row if isinstance(row, dict) else {})
+            if serializer.is_valid():
+                valid.append((number, serializer.validated_data))
+            else:
+                report['errors'].append({'row': number, 'errors': serializer.errors})
+        
+        # One query per chunk against unique_together = ('event', 'email');
+        # earlier chunks are already inserted, so they are covered too
+        seen = set(
+            EventRegistration.objects
+            .filter(event=event, email__in=[data['email'] for _, data in valid])
+            .values_list('email', flat=True)
+        )
+        
+        registrations = []
+        for number, data in valid:
+            if data['email'] in seen:
+                report['duplicates'] += 1
+                continue
+            seen.add(data['email'])
+            registrations.append(EventRegistration(event=event, **data))
+        
+        created = _insert(registrations)
+        report['created'] += created
+        report['duplicates'] += len(registrations) - created
+
+
+def _insert(registrations):
+    """
+    Insert registrations and return how many were actually created.
+    
+    A sign-up that arrives while the import runs makes the chunk insert
+    fail; the chunk is then inserted row by row and conflicting rows are
+    left out, so they can be reported as duplicates.
+    """
+    try:
+        with transaction.atomic():
+            EventRegistration.objects.bulk_create(registrations)
+        return len(registrations)
+    except IntegrityError:
+        pass
+    
+    created = 0
+    for registration in registrations:
+        registration.pk = None
+        try:
+            with transaction.atomic():
+                registration.save(force_insert=True)
+        except IntegrityError:
+            continue
+        created += 1
+    return created
@@ -0,0 +1,60 @@
+"""
+Django management command to bulk import registrations for an event.
+Usage: python manage.py import_registrations --event_id=1 --file=roster.csv
+"""
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from events.imports import IMPORT_CHUNK_SIZE, IMPORT_FORMATS, import_registrations, iter_rows
+from events.models import Event
+
+
+class Command(BaseCommand):
+    help = 'Import registrations for an event from a CSV or JSON file'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--event_id',
+            type=int,
+            help='ID of the event to import registrations into',
+            required=True
+        )
+        parser.add_argument(
+            '--file',
+            help='Path to a CSV or JSON (array or JSON Lines) file',
+            required=True
+        )
+        parser.add_argument(
+            '--file-format',
+            choices=IMPORT_FORMATS,
+            help='File format (defaults to the file extension)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=IMPORT_CHUNK_SIZE,
+            help='Number of rows validated and inserted per chunk',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            event = Event.objects.get(id=options['event_id'])
+        except Event.DoesNotExist:
+            raise CommandError(f"Event with ID {options['event_id']} not found")
+        
+        path = Path(options['file'])
+        file_format = options['file_format'] or ('csv' if path.suffix.lower() == '.csv' else 'json')
+        
+        with path.open('rb') as fileobj:
+            try:
+                report = import_registrations(event, iter_rows(fileobj, file_format), options['chunk_size'])
+            except ValueError as e:
+                raise CommandError(f'Could not parse {path}: {e}')
+        
+        for error in report['errors']:
+            self.stdout.write(self.style.WARNING(f"Row {error['row']}: {error['errors']}"))
+        
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {report['created']} registrations "
+            f"({report['duplicates']} duplicates skipped, {len(report['errors'])} rows with errors)"
+        ))
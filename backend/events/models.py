@@ -50,6 +50,11 @@ class EventRegistration(models.Model):
     def __str__(self):
         return f"{self.first_name} {self.last_name} - {self.event.title}"
 
+    @property
+    def qr_payload(self):
+        """Text encoded in the registration's check-in QR code."""
+        return self.qr_code or f"checkin_{self.id}"
+
 
 class CheckIn(models.Model):
     """Check-in model for attendance tracking."""
@@ -0,0 +1,55 @@
+"""
+QR code rendering for event registrations.
+Images are rendered on demand and cached, never stored on the registration.
+"""
+import hashlib
+import io
+
+import qrcode
+import qrcode.image.svg
+from django.core.cache import cache
+
+QR_CONTENT_TYPES = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+}
+
+# Rendered images only depend on the payload, so they can be cached for long
+QR_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def qr_etag(payload, image_format):
+    """Build a strong ETag for a QR image."""
+    return '"%s"' % hashlib.sha1(f"{image_format}:{payload}".encode()).hexdigest()
+
+
+def render_qr(payload, image_format='png'):
+    """
+    Render a QR code image.
+    
+    Args:
+        payload: Text encoded in the QR code
+        image_format: 'png' or 'svg'
+        
+    Returns:
+        Image bytes
+    """
+    qr = qrcode.QRCode(version=1, box_size=10, border=5)
+    qr.add_data(payload)
+    qr.make(fit=True)
+    
+    img_io = io.BytesIO()
+    if image_format == 'svg':
+        qr.make_image(image_factory=qrcode.image.svg.SvgPathImage).save(img_io)
+    else:
+        qr.make_image(fill_color="black", back_color="white").save(img_io, 'PNG')
+    return img_io.getvalue()
+
+
+def get_qr(payload, image_format='png'):
+    """Get a QR code image from the cache, rendering it on a miss."""
+    return cache.get_or_set(
+        f"qr:{qr_etag(payload, image_format)}",
+        lambda: render_qr(payload, image_format),
+        QR_CACHE_TIMEOUT,
+    )
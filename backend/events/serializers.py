@@ -2,30 +2,52 @@
 Serializers for Event app.
 """
 from rest_framework import serializers
+from crosscert.fields import SparseFieldsetSerializerMixin
 from .models import Event, EventRegistration, CheckIn
 
 
 class EventSerializer(serializers.ModelSerializer):
     """Serializer for Event model."""
     registration_count = serializers.SerializerMethodField()
+    checked_in_count = serializers.SerializerMethodField()
+    evaluated_count = serializers.SerializerMethodField()
+    certified_count = serializers.SerializerMethodField()
 
     class Meta:
         model = Event
         fields = ['id', 'title', 'description', 'date', 'start_time', 'end_time', 
-                  'location', 'capacity', 'status', 'speakers', 'registration_count']
+                  'location', 'capacity', 'status', 'speakers', 'registration_count',
+                  'checked_in_count', 'evaluated_count', 'certified_count']
+
+    def _annotated_count(self, obj, name, **filters):
+        # Prefer the value annotated by EventViewSet; fall back for fresh instances
+        value = getattr(obj, name, None)
+        if value is None:
+            value = obj.registrations.filter(**filters).count()
+        return value
 
     def get_registration_count(self, obj):
-        return obj.registrations.count()
+        return self._annotated_count(obj, 'registration_count')
+
+    def get_checked_in_count(self, obj):
+        return self._annotated_count(obj, 'checked_in_count', check_in__isnull=False)
+
+    def get_evaluated_count(self, obj):
+        return self._annotated_count(obj, 'evaluated_count', evaluation__isnull=False)
+
+    def get_certified_count(self, obj):
+        return self._annotated_count(obj, 'certified_count', certificate__isnull=False)
 
 
-class EventRegistrationSerializer(serializers.ModelSerializer):
+class EventRegistrationSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     """Serializer for EventRegistration model."""
     class Meta:
         model = EventRegistration
         fields = ['id', 'event', 'email', 'first_name', 'last_name', 'affiliation', 'registered_at', 'qr_code']
+        read_only_fields = ['qr_code']
 
 
-class CheckInSerializer(serializers.ModelSerializer):
+class CheckInSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     """Serializer for CheckIn model."""
     participant_name = serializers.SerializerMethodField()
     event_title = serializers.SerializerMethodField()
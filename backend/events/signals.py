@@ -0,0 +1,52 @@
+"""
+Signal handlers for Event app.
+Keep the cache-backed check-in index in step with the database.
+"""
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from .checkin import checkin_index_enabled, invalidate_checkin_index, mark_checked_in, warm_checkin_index
+from .models import Event, EventRegistration, CheckIn
+
+
+@receiver(pre_save, sender=Event)
+def remember_going_live(sender, instance, update_fields=None, **kwargs):
+    """Note whether this save switches the event to live."""
+    instance._going_live = False
+    if not checkin_index_enabled() or instance.status != 'live':
+        return
+    if update_fields is not None and 'status' not in update_fields:
+        return
+    if instance._state.adding:
+        instance._going_live = True
+    else:
+        stored = Event.objects.filter(pk=instance.pk).values_list('status', flat=True).first()
+        instance._going_live = stored != 'live'
+
+
+@receiver(post_save, sender=Event)
+def warm_index_for_live_event(sender, instance, **kwargs):
+    """Warm the check-in index when an event switches to live."""
+    if getattr(instance, '_going_live', False):
+        warm_checkin_index(instance)
+
+
+@receiver(post_save, sender=EventRegistration)
+@receiver(post_delete, sender=EventRegistration)
+def invalidate_registration(sender, instance, **kwargs):
+    """Drop changed or deleted registrations from the check-in index."""
+    if checkin_index_enabled():
+        invalidate_checkin_index(instance.id)
+
+
+@receiver(post_save, sender=CheckIn)
+def record_check_in(sender, instance, created, **kwargs):
+    """Mark registrations checked in through other paths."""
+    if created:
+        mark_checked_in([instance.registration_id])
+
+
+@receiver(post_delete, sender=CheckIn)
+def invalidate_check_in(sender, instance, **kwargs):
+    """Drop registrations whose check-in was removed from the index."""
+    if checkin_index_enabled():
+        invalidate_checkin_index(instance.registration_id)
@@ -0,0 +1,562 @@
+"""
+Tests for Events app.
+"""
+import csv
+import datetime
+import io
+import statistics
+import tempfile
+import time
+from unittest import mock, skipUnless
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.http import StreamingHttpResponse
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from certificates.models import Certificate
+from crosscert.factories import make_event, make_registrations
+from participants.models import Evaluation
+from .checkin import _index_key
+from .exports import EXPORT_COLUMNS, Workbook
+from .imports import _insert, import_registrations, iter_rows
+from .models import CheckIn, Event, EventRegistration
+
+
+class StaffAPITestCase(TestCase):
+    """Base class with an organizer event and an authenticated staff client."""
+
+    def setUp(self):
+        self.organizer = User.objects.create(username='organizer', is_staff=True, is_superuser=True)
+        self.event = make_event(self.organizer)
+        self.client = APIClient()
+        self.client.force_authenticate(self.organizer)
+
+
+class RegistrationImportTests(StaffAPITestCase):
+    """Unreadable rows are reported per row and do not abort the import."""
+
+    def upload(self, name, content):
+        return self.client.post(
+            f'/api/events/{self.event.id}/import-registrations/',
+            {'file': SimpleUploadedFile(name, content)},
+            format='multipart',
+        )
+
+    def test_json_lines_with_bad_lines(self):
+        content = b'\n'.join([
+            b'{"email": "a@example.com", "first_name": "A", "last_name": "X", "affiliation": "Y"}',
+            b'{"email": "b@example.com", "first_name": ',
+            b'',
+            b'{"email": "c@example.com", "first_name": "C\xff", "last_name": "X", "affiliation": "Y"}',
+            b'{"email": "d@example.com", "first_name": "D", "last_name": "X", "affiliation": "Y"}',
+        ])
+
+        response = self.upload('roster.jsonl', content)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual([error['row'] for error in response.data['errors']], [2, 4])
+        self.assertEqual(
+            set(EventRegistration.objects.values_list('email', flat=True)),
+            {'a@example.com', 'd@example.com'},
+        )
+
+    def test_csv_with_invalid_utf8_row(self):
+        content = (
+            b'\xef\xbb\xbfemail,first_name,last_name,affiliation\n'
+            b'a@example.com,A,X,Y\n'
+            b'b@example.com,B\xff,X,Y\n'
+            b'not-an-email,C,X,Y\n'
+            b'd@example.com,D,X,Y\n'
+        )
+
+        response = self.upload('roster.csv', content)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual([error['row'] for error in response.data['errors']], [2, 3])
+
+    def test_malformed_json_array_imports_nothing(self):
+        response = self.upload('roster.json', b'[{"email": "a@example.com"},')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(EventRegistration.objects.exists())
+
+    def test_rows_after_a_bad_line_span_chunks(self):
+        lines = [b'{oops']
+        lines += [
+            b'{"email": "p%d@example.com", "first_name": "P", "last_name": "X", "affiliation": "Y"}' % i
+            for i in range(5)
+        ]
+        upload = SimpleUploadedFile('roster.jsonl', b'\n'.join(lines))
+
+        report = import_registrations(self.event, iter_rows(upload, 'json'), chunk_size=2)
+
+        self.assertEqual(report['created'], 5)
+        self.assertEqual(report['errors'][0]['row'], 1)
+
+    def test_conflicting_sign_up_is_reported_as_duplicate(self):
+        rows = [
+            (number, {'email': email, 'first_name': 'P', 'last_name': 'X', 'affiliation': 'Y'})
+            for number, email in enumerate(['a@example.com', 'b@example.com'], start=1)
+        ]
+
+        def sign_up_during_import(registrations):
+            # Arrives after the duplicate check but before the chunk is inserted
+            EventRegistration.objects.create(
+                event=self.event, email='b@example.com', first_name='B', last_name='X', affiliation='Y'
+            )
+            return _insert(registrations)
+
+        with mock.patch('events.imports._insert', side_effect=sign_up_during_import):
+            report = import_registrations(self.event, rows)
+
+        self.assertEqual(report['created'], 1)
+        self.assertEqual(report['duplicates'], 1)
+        self.assertEqual(EventRegistration.objects.count(), 2)
+        self.assertEqual(EventRegistration.objects.get(email='b@example.com').first_name, 'B')
+
+    def test_reimport_is_ok_but_creates_nothing(self):
+        content = b'email,first_name,last_name,affiliation\na@example.com,A,X,Y\n'
+        self.assertEqual(self.upload('roster.csv', content).status_code, 201)
+
+        response = self.upload('roster.csv', content)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['created'], 0)
+        self.assertEqual(response.data['duplicates'], 1)
+
+    def test_all_rows_invalid_is_bad_request(self):
+        content = b'email,first_name,last_name,affiliation\nnot-an-email,A,X,Y\n'
+
+        response = self.upload('roster.csv', content)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['created'], 0)
+        self.assertEqual([error['row'] for error in response.data['errors']], [1])
+
+    def test_command_reports_bad_lines(self):
+        with tempfile.NamedTemporaryFile(suffix='.jsonl') as roster:
+            roster.write(b'{"email": "a@example.com", "first_name": "A", "last_name": "X", "affiliation": "Y"}\n{\n')
+            roster.flush()
+            out = io.StringIO()
+            call_command('import_registrations', event_id=self.event.id, file=roster.name, stdout=out)
+
+        self.assertEqual(EventRegistration.objects.count(), 1)
+        self.assertIn('Row 2', out.getvalue())
+
+    def test_command_rejects_malformed_array(self):
+        with tempfile.NamedTemporaryFile(suffix='.json') as roster:
+            roster.write(b'[{"email": ')
+            roster.flush()
+            with self.assertRaises(CommandError):
+                call_command('import_registrations', event_id=self.event.id, file=roster.name)
+
+
+class RegistrationExportTests(StaffAPITestCase):
+    """Exports have one row per registration with attendance, ratings and certificate."""
+
+    def setUp(self):
+        super().setUp()
+        self.registrations = make_registrations(self.event, 3)
+        first = self.registrations[0]
+        CheckIn.objects.create(registration=first)
+        Evaluation.objects.create(
+            registration=first, name='P0', email=first.email, year_level='1',
+            content_rating=5, instructor_rating=4, facilities_rating=3, overall_rating=2,
+        )
+        Certificate.objects.create(registration=first, certificate_number='CERT-1', status='generated')
+
+    def export(self, export_format):
+        return self.client.get(f'/api/events/{self.event.id}/registrations.{export_format}/')
+
+    def test_csv(self):
+        response = self.export('csv')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response, StreamingHttpResponse)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn(f'event_{self.event.id}_registrations.csv', response['Content-Disposition'])
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(list(rows[0]), [header for header, _ in EXPORT_COLUMNS])
+        self.assertEqual([row['Email'] for row in rows], [r.email for r in self.registrations])
+        self.assertTrue(rows[0]['Checked In At'])
+        self.assertEqual(
+            [rows[0][f'{name} Rating'] for name in ('Content', 'Instructor', 'Facilities', 'Overall')],
+            ['5', '4', '3', '2'],
+        )
+        self.assertEqual(rows[0]['Certificate Number'], 'CERT-1')
+        self.assertEqual((rows[1]['Checked In At'], rows[1]['Certificate Number']), ('', ''))
+
+    def test_csv_reads_rows_in_one_query(self):
+        make_registrations(self.event, 20, email='q{i}@example.com')
+        response = self.export('csv')
+
+        with self.assertNumQueries(1):
+            lines = list(response.streaming_content)
+
+        self.assertEqual(len(lines), 24)
+
+    @skipUnless(Workbook, 'openpyxl is not installed')
+    def test_xlsx(self):
+        from openpyxl import load_workbook
+
+        response = self.export('xlsx')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response['Content-Type'], 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        )
+        sheet = load_workbook(io.BytesIO(b''.join(response.streaming_content)))['Registrations']
+        rows = list(sheet.values)
+        self.assertEqual(list(rows[0]), [header for header, _ in EXPORT_COLUMNS])
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[1][-1], 'CERT-1')
+        self.assertIsInstance(rows[1][6], datetime.datetime)
+
+    def test_xlsx_without_openpyxl(self):
+        with mock.patch('events.exports.Workbook', None):
+            response = self.export('xlsx')
+
+        self.assertEqual(response.status_code, 501)
+
+
+class EventListQueryTests(StaffAPITestCase):
+    """The event list reads every per-event count in the same query."""
+
+    def add_events(self, count):
+        for i in range(count):
+            event = make_event(self.organizer, title=f'Event {i}')
+            registrations = make_registrations(event, 3)
+            CheckIn.objects.create(registration=registrations[0])
+            CheckIn.objects.create(registration=registrations[1])
+            Evaluation.objects.create(
+                registration=registrations[0], name='P0', email=registrations[0].email, year_level='1',
+                content_rating=5, instructor_rating=5, facilities_rating=5, overall_rating=5,
+            )
+            Certificate.objects.create(registration=registrations[0], certificate_number=f'CERT-{event.id}-1')
+
+    def test_query_count_does_not_grow_with_events(self):
+        self.add_events(2)
+        with self.assertNumQueries(2):
+            self.client.get('/api/events/')
+
+        self.add_events(15)
+        # One COUNT(*) for the page numbers and one annotated list query
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/events/')
+
+        self.assertEqual(len(response.data['results']), 18)
+        counts = {
+            (event['registration_count'], event['checked_in_count'], event['evaluated_count'], event['certified_count'])
+            for event in response.data['results'] if event['id'] != self.event.id
+        }
+        self.assertEqual(counts, {(3, 2, 1, 1)})
+
+    def test_admin_list_uses_same_query(self):
+        self.add_events(5)
+
+        with self.assertNumQueries(2):
+            self.client.get('/api/admin/events/')
+
+
+class BulkCheckInTests(StaffAPITestCase):
+    """Bulk check-in resolves a whole batch in a fixed number of queries."""
+
+    def setUp(self):
+        super().setUp()
+        self.registrations = make_registrations(self.event, 3)
+
+    def bulk(self, items):
+        return self.client.post('/api/check-ins/bulk/', {'items': items}, format='json')
+
+    def test_per_item_status(self):
+        first, second, third = self.registrations
+        CheckIn.objects.create(registration=first)
+        items = [first.id, f'checkin_{second.id}', str(third.id), 999999, 'unknown', second.id]
+
+        response = self.bulk(items)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(result['item'], result['registration_id'], result['status']) for result in response.data['results']],
+            [
+                (first.id, first.id, 'already_checked_in'),
+                (f'checkin_{second.id}', second.id, 'created'),
+                (str(third.id), third.id, 'created'),
+                (999999, None, 'not_found'),
+                ('unknown', None, 'not_found'),
+                (second.id, second.id, 'already_checked_in'),
+            ],
+        )
+        self.assertEqual(response.data['summary'], {'already_checked_in': 2, 'created': 2, 'not_found': 2})
+        self.assertEqual(CheckIn.objects.count(), 3)
+
+    def test_custom_qr_payload(self):
+        registration = self.registrations[0]
+        EventRegistration.objects.filter(id=registration.id).update(qr_code='badge-0042')
+
+        response = self.bulk(['badge-0042'])
+
+        self.assertEqual(response.data['results'][0]['registration_id'], registration.id)
+        self.assertTrue(CheckIn.objects.filter(registration=registration).exists())
+
+    def test_flushing_a_queue_twice_is_idempotent(self):
+        items = [f'checkin_{registration.id}' for registration in self.registrations]
+
+        self.bulk(items)
+        response = self.bulk(items)
+
+        self.assertEqual(response.data['summary'], {'already_checked_in': 3})
+        self.assertEqual(CheckIn.objects.count(), 3)
+
+    def test_items_must_be_a_list(self):
+        response = self.bulk('checkin_1')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('error', response.data)
+
+    def test_query_count_does_not_grow_with_batch(self):
+        # in_bulk, qr_code lookup, existing check-ins and one INSERT
+        with self.assertNumQueries(4):
+            self.bulk([registration.id for registration in self.registrations] + ['unknown'])
+
+        registrations = make_registrations(make_event(self.organizer, title='Rush'), 200)
+        with self.assertNumQueries(4):
+            response = self.bulk([registration.id for registration in registrations] + ['unknown'])
+
+        self.assertEqual(response.data['summary'], {'created': 200, 'not_found': 1})
+
+    def test_bulk_is_faster_than_single_item_path(self):
+        singles = make_registrations(make_event(self.organizer, title='Singles'), 100)
+        batch = make_registrations(make_event(self.organizer, title='Batch'), 100)
+
+        started = time.perf_counter()
+        with CaptureQueriesContext(connection) as single_queries:
+            for registration in singles:
+                self.client.post('/api/check-ins/check_in/', {'registration_id': registration.id}, format='json')
+        single_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        with CaptureQueriesContext(connection) as bulk_queries:
+            self.bulk([registration.id for registration in batch])
+        bulk_seconds = time.perf_counter() - started
+
+        self.assertEqual(CheckIn.objects.count(), 200)
+        self.assertGreaterEqual(len(single_queries), 2 * len(singles))
+        self.assertLessEqual(len(bulk_queries), 4)
+        self.assertLess(bulk_seconds, single_seconds)
+
+
+@override_settings(CHECKIN_INDEX_ENABLED=True)
+class CheckInIndexTests(StaffAPITestCase):
+    """Live events answer repeat scans from the locmem cache and write first scans through."""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.registrations = make_registrations(self.event, 5)
+
+    def go_live(self, event=None):
+        event = event or self.event
+        event.status = 'live'
+        event.save()
+
+    def scan(self, registration):
+        return self.client.post(
+            '/api/check-ins/check_in/', {'registration_id': f'checkin_{registration.id}'}, format='json'
+        )
+
+    def test_warmed_when_event_goes_live(self):
+        keys = [_index_key(registration.id) for registration in self.registrations]
+        self.assertEqual(cache.get_many(keys), {})
+
+        CheckIn.objects.create(registration=self.registrations[0])
+        self.go_live()
+
+        entries = cache.get_many(keys)
+        self.assertEqual(len(entries), 5)
+        self.assertTrue(entries[keys[0]]['checked_in'])
+        self.assertFalse(entries[keys[1]]['checked_in'])
+        self.assertEqual(entries[keys[1]]['event_title'], self.event.title)
+
+    def test_editing_a_live_event_does_not_rewarm(self):
+        self.go_live()
+        cache.clear()
+
+        with mock.patch('events.signals.warm_checkin_index') as warm:
+            self.event.description = 'Doors open at 8'
+            self.event.save()
+            self.event.save(update_fields=['description'])
+            Event.objects.get(id=self.event.id).save()
+
+        warm.assert_not_called()
+
+    def test_switch_to_live_is_warmed_once(self):
+        with mock.patch('events.signals.warm_checkin_index') as warm:
+            created_live = make_event(self.organizer, title='Walk-in', status='live')
+            self.event.status = 'live'
+            self.event.save(update_fields=['status'])
+            self.event.save(update_fields=['status'])
+
+        self.assertEqual([call.args[0] for call in warm.call_args_list], [created_live, self.event])
+
+    @override_settings(CHECKIN_INDEX_ENABLED=False)
+    def test_disabled_index_is_not_warmed(self):
+        self.go_live()
+
+        self.assertIsNone(cache.get(_index_key(self.registrations[0].id)))
+
+    def test_first_scan_writes_through(self):
+        self.go_live()
+        registration = self.registrations[0]
+
+        # Only the INSERT, inside its savepoint; the response is built from the index
+        with self.assertNumQueries(3):
+            response = self.scan(registration)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['participant_name'], f'{registration.first_name} {registration.last_name}')
+        self.assertEqual(response.data['event_title'], self.event.title)
+        self.assertTrue(CheckIn.objects.filter(registration=registration).exists())
+
+    def test_duplicate_scan_skips_database(self):
+        self.go_live()
+        registration = self.registrations[0]
+        self.scan(registration)
+
+        with self.assertNumQueries(0):
+            response = self.scan(registration)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(CheckIn.objects.filter(registration=registration).count(), 1)
+
+    def test_check_in_outside_index_is_written_to_cache(self):
+        self.go_live()
+        first, second = self.registrations[:2]
+        CheckIn.objects.create(registration=first)
+        self.client.post('/api/check-ins/bulk/', {'items': [second.id]}, format='json')
+
+        for registration in (first, second):
+            with self.assertNumQueries(0):
+                self.assertEqual(self.scan(registration).status_code, 400)
+
+    def test_changed_registration_is_dropped(self):
+        self.go_live()
+        registration = self.registrations[0]
+        registration.first_name = 'Renamed'
+        registration.save()
+
+        self.assertIsNone(cache.get(_index_key(registration.id)))
+        # The database path still checks the registration in
+        response = self.scan(registration)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['participant_name'], f'Renamed {registration.last_name}')
+
+    def test_deleted_registration_is_dropped(self):
+        self.go_live()
+        registration = self.registrations[0]
+        registration_id = registration.id
+        registration.delete()
+
+        self.assertIsNone(cache.get(_index_key(registration_id)))
+        registration.id = registration_id
+        self.assertEqual(self.scan(registration).status_code, 404)
+
+    def test_removed_check_in_can_scan_again(self):
+        self.go_live()
+        registration = self.registrations[0]
+        self.scan(registration)
+
+        CheckIn.objects.get(registration=registration).delete()
+
+        self.assertEqual(self.scan(registration).status_code, 201)
+        self.assertEqual(CheckIn.objects.filter(registration=registration).count(), 1)
+
+    def test_repeat_scan_latency_percentiles(self):
+        indexed = make_registrations(make_event(self.organizer, title='Indexed'), 50)
+        unindexed = make_registrations(make_event(self.organizer, title='Unindexed'), 50)
+        # Checked in before the index is warmed, so every scan below is a repeat
+        CheckIn.objects.bulk_create([CheckIn(registration=registration) for registration in indexed + unindexed])
+        self.go_live(indexed[0].event)
+
+        def latencies(registrations):
+            samples = []
+            for _ in range(4):
+                for registration in registrations:
+                    started = time.perf_counter()
+                    self.assertEqual(self.scan(registration).status_code, 400)
+                    samples.append((time.perf_counter() - started) * 1000)
+            cuts = statistics.quantiles(samples, n=100)
+            return {'p50': cuts[49], 'p95': cuts[94], 'p99': cuts[98]}
+
+        with CaptureQueriesContext(connection) as queries:
+            index_latency = latencies(indexed)
+            self.assertEqual(len(queries), 0)
+        with CaptureQueriesContext(connection) as queries:
+            database_latency = latencies(unindexed)
+            self.assertEqual(len(queries), 2 * 200)
+
+        report = f'index {index_latency} ms, database {database_latency} ms'
+        self.assertLess(index_latency['p50'], database_latency['p50'], report)
+        self.assertLess(index_latency['p95'], database_latency['p95'], report)
+
+
+class RegistrationQRCodeTests(StaffAPITestCase):
+    """QR codes are rendered once, cached, and revalidated with their ETag."""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.registration = make_registrations(self.event, 1)[0]
+
+    def get_qr(self, image_format, **headers):
+        return self.client.get(f'/api/registrations/{self.registration.id}/qr.{image_format}/', **headers)
+
+    def test_png(self):
+        response = self.get_qr('png')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertTrue(response.content.startswith(b'\x89PNG'))
+        self.assertIn('private', response['Cache-Control'])
+
+    def test_svg(self):
+        response = self.get_qr('svg')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/svg+xml')
+        self.assertIn(b'<svg', response.content)
+
+    def test_matching_etag_is_not_modified(self):
+        etag = self.get_qr('png')['ETag']
+
+        with mock.patch('events.views.get_qr') as get_qr:
+            response = self.get_qr('png', HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response.content, b'')
+        get_qr.assert_not_called()
+
+    def test_etag_differs_per_format(self):
+        png_etag = self.get_qr('png')['ETag']
+
+        response = self.get_qr('svg', HTTP_IF_NONE_MATCH=png_etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], png_etag)
+
+    def test_image_is_rendered_once(self):
+        with mock.patch('events.qr.render_qr', return_value=b'png') as render_qr:
+            self.get_qr('png')
+            self.get_qr('png')
+
+        render_qr.assert_called_once_with(self.registration.qr_payload, 'png')
@@ -4,11 +4,18 @@ Views for Event app.
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.db.models import Count
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
 from .models import Event, EventRegistration, CheckIn
 from .serializers import EventSerializer, EventRegistrationSerializer, CheckInSerializer
-import qrcode
-import io
-import base64
+from .qr import QR_CACHE_TIMEOUT, QR_CONTENT_TYPES, get_qr, qr_etag
+from .exports import iter_csv, write_xlsx
+from .imports import IMPORT_FORMATS, import_registrations, iter_rows
+from crosscert.fields import SparseFieldsetViewMixin, defer_unrequested
+from crosscert.metrics import CHECK_INS, phase, timed
+from crosscert.pagination import IdCursorPagination
+from .checkin import CHECKIN_ALREADY, CHECKIN_CREATED, CHECKIN_NOT_FOUND, bulk_check_in, check_in_from_index, checkin_index_enabled, parse_registration_id
 
 
 class EventViewSet(viewsets.ModelViewSet):
@@ -16,67 +23,230 @@ class EventViewSet(viewsets.ModelViewSet):
     queryset = Event.objects.all()
     serializer_class = EventSerializer
 
+    def get_queryset(self):
+        """Annotate per-event registration counts in the list query."""
+        # check_in, evaluation and certificate are one-to-one with a
+        # registration, so these joins do not multiply rows
+        return super().get_queryset().annotate(
+            registration_count=Count('registrations'),
+            checked_in_count=Count('registrations__check_in'),
+            evaluated_count=Count('registrations__evaluation'),
+            certified_count=Count('registrations__certificate'),
+        ).order_by(*Event._meta.ordering)  # Meta.ordering is dropped in GROUP BY queries
+
     @action(detail=True, methods=['get'])
     def registrations(self, request, pk=None):
-        """Get all registrations for an event."""
+        """Get the registrations for an event, one cursor page at a time."""
         event = self.get_object()
-        registrations = event.registrations.all()
-        serializer = EventRegistrationSerializer(registrations, many=True)
-        return Response(serializer.data)
+        registrations = defer_unrequested(
+            event.registrations.all(), request, EventRegistrationViewSet.deferrable_fields
+        )
+        paginator = IdCursorPagination()
+        # No view: EventViewSet's ordering filter describes events, not registrations
+        page = paginator.paginate_queryset(registrations, request)
+        serializer = EventRegistrationSerializer(page, many=True, context=self.get_serializer_context())
+        return paginator.get_paginated_response(serializer.data)
 
+    @action(detail=True, methods=['get'], url_path=r'registrations\.(?P<export_format>csv|xlsx)')
+    def export_registrations(self, request, pk=None, export_format='csv'):
+        """Stream registrations with check-in, ratings and certificate as CSV or XLSX."""
+        event = self.get_object()
+        filename = f"event_{event.id}_registrations.{export_format}"
+        
+        if export_format == 'xlsx':
+            output = write_xlsx(event)
+            if output is None:
+                return Response(
+                    {'error': 'XLSX export requires openpyxl'},
+                    status=status.HTTP_501_NOT_IMPLEMENTED
+                )
+            return FileResponse(
+                output,
+                as_attachment=True,
+                filename=filename,
+                content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            )
+        
+        response = StreamingHttpResponse(iter_csv(event), content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
 
-class EventRegistrationViewSet(viewsets.ModelViewSet):
-    """ViewSet for Event Registration management."""
-    queryset = EventRegistration.objects.all()
-    serializer_class = EventRegistrationSerializer
+    @action(detail=True, methods=['get'], url_path='evaluation-analytics')
+    def evaluation_analytics(self, request, pk=None):
+        """Get rating means, histograms and response rate for an event."""
+        from participants.analytics import event_analytics
+        
+        event = self.get_object()
+        return Response(event_analytics(event.id))
 
-    def create(self, request, *args, **kwargs):
-        """Register a participant for an event."""
-        serializer = self.get_serializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
+    @action(detail=True, methods=['post'], url_path='import-registrations')
+    def bulk_import(self, request, pk=None):
+        """Bulk import registrations from an uploaded CSV or JSON file."""
+        event = self.get_object()
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response(
+                {'error': 'file is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        # Generate QR code
-        registration = serializer.save()
-        qr = qrcode.QRCode(version=1, box_size=10, border=5)
-        qr.add_data(f"checkin_{registration.id}")
-        qr.make(fit=True)
+        file_format = request.data.get('file_format') or ('csv' if upload.name.lower().endswith('.csv') else 'json')
+        if file_format not in IMPORT_FORMATS:
+            return Response(
+                {'error': f"file_format must be one of {', '.join(IMPORT_FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        img = qr.make_image(fill_color="black", back_color="white")
-        img_io = io.BytesIO()
-        img.save(img_io, 'PNG')
-        img_io.seek(0)
-        qr_code_base64 = base64.b64encode(img_io.getvalue()).decode()
+        try:
+            report = import_registrations(event, iter_rows(upload, file_format))
+        except ValueError as e:
+            return Response(
+                {'error': f'Could not parse file: {e}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if report['created']:
+            response_status = status.HTTP_201_CREATED
+        elif report['errors']:
+            # Nothing was imported, so the upload as a whole is rejected
+            response_status = status.HTTP_400_BAD_REQUEST
+        else:
+            response_status = status.HTTP_200_OK
+        return Response(report, status=response_status)
+
+    @action(detail=True, methods=['post'], url_path='export-certificates')
+    def export_certificates(self, request, pk=None):
+        """Export all eligible certificates of an event as one multi-page PDF."""
+        import tempfile
+        from certificates.generator import export_combined_certificates
         
-        registration.qr_code = qr_code_base64
-        registration.save()
+        event = self.get_object()
+        # Streamed from a temporary file that is removed once the response is
+        # closed, so exports do not pile up in certificate storage
+        output = tempfile.TemporaryFile()
+        try:
+            _, count = export_combined_certificates(event.id, output=output)
+        except BaseException:
+            output.close()
+            raise
+        output.seek(0)
+        
+        response = FileResponse(
+            output,
+            as_attachment=True,
+            filename=f"event_{event.id}_certificates.pdf",
+            content_type='application/pdf',
+        )
+        response['X-Certificate-Count'] = str(count)
+        return response
+
+    @action(detail=True, methods=['get'], url_path='certificates.zip')
+    def certificates_zip(self, request, pk=None):
+        """Stream a ZIP archive with all certificates of an event."""
+        from certificates.archive import stream_event_certificates
+        
+        event = self.get_object()
+        response = StreamingHttpResponse(
+            stream_event_certificates(event),
+            content_type='application/zip',
+        )
+        response['Content-Disposition'] = f'attachment; filename="event_{event.id}_certificates.zip"'
+        return response
+
+
+class EventRegistrationViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
+    """ViewSet for Event Registration management."""
+    queryset = EventRegistration.objects.all()
+    serializer_class = EventRegistrationSerializer
+    pagination_class = IdCursorPagination
+    ordering = ['id']
+    ordering_fields = ['id']
+    deferrable_fields = ('qr_code',)
+
+    @action(detail=True, methods=['get'], url_path=r'qr\.(?P<image_format>png|svg)')
+    def qr(self, request, pk=None, image_format='png'):
+        """Serve the registration's check-in QR code as PNG or SVG."""
+        registration = self.get_object()
+        payload = registration.qr_payload
+        etag = qr_etag(payload, image_format)
         
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(get_qr(payload, image_format), content_type=QR_CONTENT_TYPES[image_format])
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, max_age=QR_CACHE_TIMEOUT)
+        return response
 
 
 class CheckInViewSet(viewsets.ModelViewSet):
     """ViewSet for Check-In management."""
-    queryset = CheckIn.objects.all()
+    # participant_name and event_title follow registration -> event
+    queryset = CheckIn.objects.select_related('registration__event')
     serializer_class = CheckInSerializer
+    pagination_class = IdCursorPagination
+    ordering = ['id']
+    ordering_fields = ['id']
 
     @action(detail=False, methods=['post'])
+    @timed('check_in')
     def check_in(self, request):
         """Check in a participant using registration ID."""
         registration_id = request.data.get('registration_id')
         
+        # Live events can answer from the cache-backed index
+        indexed_id = parse_registration_id(registration_id)
+        if checkin_index_enabled() and indexed_id is not None:
+            with phase('check_in', 'query'):
+                result = check_in_from_index(indexed_id)
+            if result is not None:
+                outcome, check_in = result
+                CHECK_INS.inc(outcome=outcome, source='index')
+                if outcome == CHECKIN_ALREADY:
+                    return Response(
+                        {'message': 'Already checked in'},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+                serializer = self.get_serializer(check_in)
+                return Response(serializer.data, status=status.HTTP_201_CREATED)
+        
         try:
-            registration = EventRegistration.objects.get(id=registration_id)
-            check_in, created = CheckIn.objects.get_or_create(registration=registration)
+            with phase('check_in', 'query'):
+                # QR payloads that missed the index resolve to the same ID
+                registration = EventRegistration.objects.select_related('event').get(
+                    id=indexed_id if indexed_id is not None else registration_id
+                )
+            with phase('check_in', 'write'):
+                check_in, created = CheckIn.objects.get_or_create(registration=registration)
             
             if not created:
+                CHECK_INS.inc(outcome=CHECKIN_ALREADY, source='database')
                 return Response(
                     {'message': 'Already checked in'},
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
+            CHECK_INS.inc(outcome=CHECKIN_CREATED, source='database')
             serializer = self.get_serializer(check_in)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         except EventRegistration.DoesNotExist:
+            CHECK_INS.inc(outcome=CHECKIN_NOT_FOUND, source='database')
             return Response(
                 {'error': 'Registration not found'},
                 status=status.HTTP_404_NOT_FOUND
             )
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """Check in a batch of registration IDs or QR payloads."""
+        items = request.data.get('items')
+        if not isinstance(items, list):
+            return Response(
+                {'error': 'items must be a list of registration IDs or QR payloads'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        results = bulk_check_in(items)
+        summary = {}
+        for result in results:
+            summary[result['status']] = summary.get(result['status'], 0) + 1
+        
+        return Response({'results': results, 'summary': summary})
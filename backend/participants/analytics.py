@@ -0,0 +1,117 @@
+"""
+Evaluation analytics for CROSSCERT.
+Keeps per-event rating histograms up to date incrementally and formats them.
+"""
+from django.db import transaction
+from django.db.models import Count, Q
+
+from events.models import CheckIn, EventRegistration
+from .models import Evaluation, EvaluationSummary
+
+RATING_FIELDS = ('content_rating', 'instructor_rating', 'facilities_rating', 'overall_rating')
+RATING_VALUES = range(1, 6)
+
+
+def empty_histograms():
+    return {field: [0] * len(RATING_VALUES) for field in RATING_FIELDS}
+
+
+def rating_snapshot(evaluation):
+    """Capture what an evaluation contributes to its event summary."""
+    return evaluation.registration_id, {field: getattr(evaluation, field) for field in RATING_FIELDS}
+
+
+def apply_ratings(registration_id, ratings, sign):
+    """
+    Add (sign=1) or remove (sign=-1) one evaluation from its event summary.
+    
+    Args:
+        registration_id: ID of the evaluated registration
+        ratings: Dict of rating field to value
+        sign: 1 to add the ratings, -1 to remove them
+    """
+    event_id = EventRegistration.objects.filter(pk=registration_id).values_list('event_id', flat=True).first()
+    if event_id is None:
+        return
+    
+    with transaction.atomic():
+        # Lock the summary row so concurrent evaluations do not lose updates
+        summaries = EvaluationSummary.objects.select_for_update()
+        if sign > 0:
+            summary, _ = summaries.get_or_create(event_id=event_id, defaults={'histograms': empty_histograms()})
+        else:
+            # Removals never create a row: when the event is being deleted its
+            # summary may already be gone earlier in the same cascade
+            summary = summaries.filter(event_id=event_id).first()
+            if summary is None:
+                return
+        histograms = summary.histograms or empty_histograms()
+        for field, value in ratings.items():
+            histograms.setdefault(field, [0] * len(RATING_VALUES))[value - 1] += sign
+        summary.histograms = histograms
+        summary.response_count += sign
+        summary.save()
+
+
+def compute_histograms(event_id):
+    """
+    Compute an event's rating histograms from the evaluation table.
+    
+    Returns:
+        Tuple of (response_count, histograms)
+    """
+    aggregates = {'response_count': Count('id')}
+    for field in RATING_FIELDS:
+        for value in RATING_VALUES:
+            aggregates[f'{field}_{value}'] = Count('id', filter=Q(**{field: value}))
+    
+    totals = Evaluation.objects.filter(registration__event_id=event_id).aggregate(**aggregates)
+    histograms = {
+        field: [totals[f'{field}_{value}'] for value in RATING_VALUES]
+        for field in RATING_FIELDS
+    }
+    return totals['response_count'], histograms
+
+
+def rebuild_summary(event_id):
+    """Recompute and store an event summary from scratch (used for backfill)."""
+    response_count, histograms = compute_histograms(event_id)
+    summary, _ = EvaluationSummary.objects.update_or_create(
+        event_id=event_id,
+        defaults={'response_count': response_count, 'histograms': histograms},
+    )
+    return summary
+
+
+def format_analytics(event_id, response_count, histograms):
+    """
+    Build the analytics payload for an event.
+    
+    Response rate is measured against checked-in attendees.
+    """
+    checked_in = CheckIn.objects.filter(registration__event_id=event_id).count()
+    
+    ratings = {}
+    for field in RATING_FIELDS:
+        counts = histograms.get(field, [0] * len(RATING_VALUES))
+        responses = sum(counts)
+        ratings[field] = {
+            'mean': round(sum(value * count for value, count in zip(RATING_VALUES, counts)) / responses, 2) if responses else None,
+            'histogram': {str(value): count for value, count in zip(RATING_VALUES, counts)},
+            'response_rate': round(responses / checked_in, 4) if checked_in else None,
+        }
+    
+    return {
+        'event': event_id,
+        'response_count': response_count,
+        'checked_in_count': checked_in,
+        'ratings': ratings,
+    }
+
+
+def event_analytics(event_id):
+    """Get an event's evaluation analytics from its summary row."""
+    summary = EvaluationSummary.objects.filter(event_id=event_id).first()
+    if summary is None:
+        return format_analytics(event_id, 0, empty_histograms())
+    return format_analytics(event_id, summary.response_count, summary.histograms)
@@ -0,0 +1,30 @@
+"""
+Django management command to rebuild evaluation summaries from raw evaluations.
+Usage: python manage.py rebuild_evaluation_summaries [--event_id=1]
+"""
+from django.core.management.base import BaseCommand
+from events.models import Event
+from participants.analytics import rebuild_summary
+
+
+class Command(BaseCommand):
+    help = 'Recompute per-event evaluation summaries (backfill or repair)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--event_id',
+            type=int,
+            help='Only rebuild the summary of this event',
+        )
+
+    def handle(self, *args, **options):
+        events = Event.objects.all()
+        if options['event_id']:
+            events = events.filter(id=options['event_id'])
+        
+        count = 0
+        for event_id in events.values_list('id', flat=True).iterator():
+            rebuild_summary(event_id)
+            count += 1
+        
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} evaluation summaries'))
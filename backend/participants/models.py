@@ -2,7 +2,7 @@
 Participant models for CROSSCERT.
 """
 from django.db import models
-from events.models import EventRegistration
+from events.models import Event, EventRegistration
 
 
 class Evaluation(models.Model):
@@ -20,3 +20,15 @@ class Evaluation(models.Model):
 
     def __str__(self):
         return f"Evaluation by {self.name} for {self.registration.event.title}"
+
+
+class EvaluationSummary(models.Model):
+    """Running rating totals per event, updated as evaluations are saved."""
+    event = models.OneToOneField(Event, on_delete=models.CASCADE, primary_key=True, related_name='evaluation_summary')
+    response_count = models.IntegerField(default=0)
+    # {rating field: [count of 1s, 2s, 3s, 4s, 5s]}
+    histograms = models.JSONField(default=dict)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Evaluation summary for {self.event_id}"
@@ -2,10 +2,11 @@
 Serializers for Participants app.
 """
 from rest_framework import serializers
+from crosscert.fields import SparseFieldsetSerializerMixin
 from .models import Evaluation
 
 
-class EvaluationSerializer(serializers.ModelSerializer):
+class EvaluationSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     """Serializer for Evaluation model."""
     class Meta:
         model = Evaluation
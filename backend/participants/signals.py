@@ -0,0 +1,36 @@
+"""
+Signal handlers for Participants app.
+Keep evaluation summaries in step with saved and deleted evaluations.
+"""
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from .analytics import RATING_FIELDS, apply_ratings, rating_snapshot
+from .models import Evaluation
+
+
+@receiver(pre_save, sender=Evaluation)
+def remember_stored_ratings(sender, instance, **kwargs):
+    """Read the stored ratings before an update so they can be replaced."""
+    instance._summary_snapshot = None
+    if not instance._state.adding:
+        row = Evaluation.objects.filter(pk=instance.pk).values_list('registration_id', *RATING_FIELDS).first()
+        if row is not None:
+            instance._summary_snapshot = row[0], dict(zip(RATING_FIELDS, row[1:]))
+
+
+@receiver(post_save, sender=Evaluation)
+def update_summary(sender, instance, created, **kwargs):
+    """Apply a saved evaluation to its event summary."""
+    previous = getattr(instance, '_summary_snapshot', None)
+    current = rating_snapshot(instance)
+    if previous == current:
+        return
+    if previous is not None:
+        apply_ratings(*previous, sign=-1)
+    apply_ratings(*current, sign=1)
+
+
+@receiver(post_delete, sender=Evaluation)
+def remove_from_summary(sender, instance, **kwargs):
+    """Remove a deleted evaluation from its event summary."""
+    apply_ratings(*rating_snapshot(instance), sign=-1)
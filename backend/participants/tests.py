@@ -0,0 +1,76 @@
+"""
+Tests for Participants app.
+"""
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from crosscert.factories import make_event, make_registrations
+from .analytics import compute_histograms
+from .models import Evaluation, EvaluationSummary
+
+
+def make_evaluation(registration, rating):
+    return Evaluation.objects.create(
+        registration=registration,
+        name=registration.first_name,
+        email=registration.email,
+        year_level='1',
+        content_rating=rating,
+        instructor_rating=rating,
+        facilities_rating=6 - rating,
+        overall_rating=rating,
+    )
+
+
+class EvaluationSummaryTests(TestCase):
+    """The incrementally maintained summary matches a full recomputation."""
+
+    def setUp(self):
+        self.organizer = User.objects.create(username='organizer')
+        self.event = make_event(self.organizer)
+        self.registrations = make_registrations(self.event, 5)
+
+    def assertSummaryMatchesRecomputation(self, event):
+        summary = EvaluationSummary.objects.get(event=event)
+        self.assertEqual((summary.response_count, summary.histograms), compute_histograms(event.id))
+
+    def test_create(self):
+        for i, registration in enumerate(self.registrations):
+            make_evaluation(registration, i + 1)
+        self.assertSummaryMatchesRecomputation(self.event)
+
+    def test_update(self):
+        evaluations = [make_evaluation(registration, 3) for registration in self.registrations]
+        evaluations[0].overall_rating = 5
+        evaluations[0].save()
+        evaluations[1].content_rating = 1
+        evaluations[1].save(update_fields=['content_rating'])
+        self.assertSummaryMatchesRecomputation(self.event)
+
+    def test_delete(self):
+        evaluations = [make_evaluation(registration, 4) for registration in self.registrations]
+        evaluations[0].delete()
+        self.registrations[1].delete()
+        self.assertSummaryMatchesRecomputation(self.event)
+
+    def test_delete_event(self):
+        other = make_event(self.organizer, title='Other')
+        other_registration = make_registrations(other, 1)[0]
+        make_evaluation(other_registration, 2)
+        for registration in self.registrations:
+            make_evaluation(registration, 5)
+
+        self.event.delete()
+
+        self.assertFalse(EvaluationSummary.objects.filter(event_id=self.event.id).exists())
+        self.assertSummaryMatchesRecomputation(other)
+
+    def test_delete_event_through_api(self):
+        for registration in self.registrations:
+            make_evaluation(registration, 5)
+        self.client.force_login(User.objects.create(username='admin', is_staff=True, is_superuser=True))
+
+        response = self.client.delete(f'/api/events/{self.event.id}/')
+
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(EvaluationSummary.objects.exists())
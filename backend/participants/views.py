@@ -3,6 +3,8 @@ Views for Participants app.
 """
 from rest_framework import viewsets
 from rest_framework.response import Response
+from crosscert.fields import SparseFieldsetViewMixin
+from crosscert.pagination import IdCursorPagination
 from .models import Evaluation
 from .serializers import EvaluationSerializer
 
@@ -15,7 +17,11 @@ class ParticipantViewSet(viewsets.ViewSet):
         return Response([])
 
 
-class EvaluationViewSet(viewsets.ModelViewSet):
+class EvaluationViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     """ViewSet for Evaluation management."""
     queryset = Evaluation.objects.all()
     serializer_class = EvaluationSerializer
+    pagination_class = IdCursorPagination
+    ordering = ['id']
+    ordering_fields = ['id']
+    deferrable_fields = ('feedback',)